@@ -1,13 +1,33 @@
 import argparse
 import json
 import sys
+from dataclasses import asdict
 from pathlib import Path
 
 from .configuration import create_config_file, get_config_path, load_config
 from .daemon import fetch_once, start_daemon
-from .database import create_database_if_not_exists, query_db_metrics
+from .database import (
+    backfill_rollups,
+    compact_observations,
+    create_database_if_not_exists,
+    migrate_to_epoch_timestamps,
+    partition_observations_by_month,
+    query_db_metrics,
+)
+from .exceptions import Aw2SqliteError
 
-_SUBCOMMANDS = {"serve", "config", "once", "status", "install-launchd"}
+_SUBCOMMANDS = {
+    "serve",
+    "config",
+    "once",
+    "status",
+    "import",
+    "backfill-rollups",
+    "migrate-timestamps",
+    "partition-observations",
+    "compact",
+    "install-launchd",
+}
 _TOP_LEVEL_HELP_FLAGS = {"-h", "--help"}
 
 
@@ -56,6 +76,13 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=None,
         help="Log output format (default: text).",
     )
+    serve_parser.add_argument(
+        "--runtime",
+        choices=["threaded", "asyncio"],
+        default=None,
+        help="Run polling and the API on threads or one asyncio loop "
+        "(default: threaded).",
+    )
 
     # config
     config_parser = subparsers.add_parser(
@@ -78,6 +105,53 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     )
     _add_config_arg(status_parser)
 
+    # import
+    import_parser = subparsers.add_parser(
+        "import",
+        help="Bulk import historical observations from CSV, JSONL or SQLite.",
+    )
+    import_parser.add_argument(
+        "source",
+        type=Path,
+        help="File to import: a CSV export, a JSONL dump or another aw2sqlite DB.",
+    )
+    import_parser.add_argument(
+        "--format",
+        dest="source_format",
+        choices=["csv", "jsonl", "sqlite"],
+        default=None,
+        help="Source format (default: inferred from the file extension).",
+    )
+    _add_config_arg(import_parser)
+
+    # backfill-rollups
+    backfill_parser = subparsers.add_parser(
+        "backfill-rollups",
+        help="Build the hourly rollup table from existing observations.",
+    )
+    _add_config_arg(backfill_parser)
+
+    # migrate-timestamps
+    migrate_parser = subparsers.add_parser(
+        "migrate-timestamps",
+        help="Convert stored timestamps to integer epoch milliseconds.",
+    )
+    _add_config_arg(migrate_parser)
+
+    # partition-observations
+    partition_parser = subparsers.add_parser(
+        "partition-observations",
+        help="Split stored observations into one table per month.",
+    )
+    _add_config_arg(partition_parser)
+
+    # compact
+    compact_parser = subparsers.add_parser(
+        "compact",
+        help="Apply the configured retention policy to old observations now.",
+    )
+    _add_config_arg(compact_parser)
+
     # install-launchd
     launchd_parser = subparsers.add_parser(
         "install-launchd",
@@ -97,12 +171,26 @@ def _resolve_config(args: argparse.Namespace) -> Path:
 def _cmd_serve(args: argparse.Namespace) -> None:
     config_path = _resolve_config(args)
     config = load_config(config_path)
-    create_database_if_not_exists(config.database_path)
-    start_daemon(
+    create_database_if_not_exists(
+        config.database_path,
+        epoch_ts=config.timestamp_storage == "epoch_ms",
+        monthly_partitions=config.partitioning == "monthly",
+        change_only_columns=config.change_only_columns,
+    )
+    run_daemon = start_daemon
+    if (args.runtime or config.runtime) == "asyncio":
+        from .async_runtime import start_async_daemon
+
+        run_daemon = start_async_daemon
+    run_daemon(
         live_data_url=config.live_data_url,
         database_path=config.database_path,
         port=args.port if args.port is not None else config.port,
         log_format=args.log_format or config.log_format,
+        flush_every=config.flush_every,
+        flush_interval_seconds=config.flush_interval_seconds,
+        max_concurrent_requests=config.max_concurrent_requests,
+        retention=config.retention,
     )
 
 
@@ -128,6 +216,87 @@ def _cmd_status(args: argparse.Namespace) -> None:
     print(json.dumps(metrics, indent=2))
 
 
+def _cmd_import(args: argparse.Namespace) -> None:
+    from .importer import import_observations
+
+    config_path = _resolve_config(args)
+    config = load_config(config_path)
+    if not args.source.exists():
+        print(f"Import source not found at {args.source}", file=sys.stderr)
+        sys.exit(1)
+    create_database_if_not_exists(
+        config.database_path,
+        epoch_ts=config.timestamp_storage == "epoch_ms",
+        monthly_partitions=config.partitioning == "monthly",
+        change_only_columns=config.change_only_columns,
+    )
+    try:
+        summary = import_observations(
+            config.database_path,
+            args.source,
+            args.source_format,
+        )
+    except Aw2SqliteError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(asdict(summary), indent=2))
+
+
+def _cmd_backfill_rollups(args: argparse.Namespace) -> None:
+    config_path = _resolve_config(args)
+    config = load_config(config_path)
+    if not Path(config.database_path).exists():
+        print(f"Database not found at {config.database_path}")
+        sys.exit(1)
+    hours_written = backfill_rollups(config.database_path)
+    print(f"Rebuilt hourly rollups for {hours_written} hours")
+
+
+def _cmd_migrate_timestamps(args: argparse.Namespace) -> None:
+    config_path = _resolve_config(args)
+    config = load_config(config_path)
+    if not Path(config.database_path).exists():
+        print(f"Database not found at {config.database_path}")
+        sys.exit(1)
+    try:
+        summary = migrate_to_epoch_timestamps(config.database_path)
+    except Aw2SqliteError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(asdict(summary), indent=2))
+
+
+def _cmd_partition_observations(args: argparse.Namespace) -> None:
+    config_path = _resolve_config(args)
+    config = load_config(config_path)
+    if not Path(config.database_path).exists():
+        print(f"Database not found at {config.database_path}")
+        sys.exit(1)
+    try:
+        summary = partition_observations_by_month(config.database_path)
+    except Aw2SqliteError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(asdict(summary), indent=2))
+
+
+def _cmd_compact(args: argparse.Namespace) -> None:
+    config_path = _resolve_config(args)
+    config = load_config(config_path)
+    if config.retention is None:
+        print("Error: no [retention] policy configured", file=sys.stderr)
+        sys.exit(1)
+    if not Path(config.database_path).exists():
+        print(f"Database not found at {config.database_path}")
+        sys.exit(1)
+    try:
+        summary = compact_observations(config.database_path, config.retention)
+    except Aw2SqliteError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(asdict(summary), indent=2))
+
+
 def _cmd_install_launchd(args: argparse.Namespace) -> None:
     from .launchd import install_launchd
 
@@ -135,7 +304,7 @@ def _cmd_install_launchd(args: argparse.Namespace) -> None:
     install_launchd(config_path)
 
 
-def main(argv: list[str] | None = None) -> None:
+def main(argv: list[str] | None = None) -> None:  # noqa: C901
     args = parse_args(argv)
     match args.command:
         case "serve":
@@ -146,6 +315,16 @@ def main(argv: list[str] | None = None) -> None:
             _cmd_once(args)
         case "status":
             _cmd_status(args)
+        case "import":
+            _cmd_import(args)
+        case "backfill-rollups":
+            _cmd_backfill_rollups(args)
+        case "migrate-timestamps":
+            _cmd_migrate_timestamps(args)
+        case "partition-observations":
+            _cmd_partition_observations(args)
+        case "compact":
+            _cmd_compact(args)
         case "install-launchd":
             _cmd_install_launchd(args)
 
@@ -0,0 +1,446 @@
+"""Single event loop runtime for polling, storing and serving observations.
+
+Station fetches and HTTP connections are handled on one asyncio event loop.
+SQLite work stays off the loop: inserts run on a dedicated single-thread
+executor that owns the ObservationWriter connection, and API queries run on a
+small bounded executor, each opening its own read-only connection.
+"""
+
+import asyncio
+import contextlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from http import HTTPStatus
+from http.client import HTTPException
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from . import mureq
+from .awparser import LiveDataExtractor
+from .daemon import (
+    clear_lines,
+    configure_logging,
+    load_labels,
+    print_observation,
+    sigterm_as_keyboard_interrupt,
+)
+from .database import ObservationWriter
+from .models import build_error_payload
+from .response_cache import ResponseCache
+from .retention import start_compaction_job
+from .server import (
+    KEEP_ALIVE_TIMEOUT_SECONDS,
+    body_headers,
+    cached_live_snapshot,
+    conditional_database_response,
+    encode_body,
+    error_response,
+    keep_alive_headers,
+    live_data_response,
+    live_snapshot_response,
+    response_format,
+)
+from .snapshot import LiveSnapshotStore
+
+if TYPE_CHECKING:
+    import logging
+
+    from .models import EncodedBody, LabelMap, RetentionPolicy
+    from .server import LogFunction, ResponseHeaders, RouteResponse
+
+_REQUEST_READ_TIMEOUT_SECONDS = 10
+_MAX_REQUEST_HEADER_LINES = 100
+
+
+async def fetch_live_page(
+    url: str,
+    *,
+    timeout: float = mureq.DEFAULT_TIMEOUT,  # noqa: ASYNC109
+    auto_retry: bool = False,
+) -> str:
+    """GET a station page without blocking the event loop.
+
+    Mirrors mureq.get: the body is returned whatever the status, a timeout
+    raises TimeoutError (retried once when auto_retry) and other connection
+    errors raise HTTPException. The request is sent as HTTP/1.0 so the station
+    closes the connection after the body and no chunked decoding is needed.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in {"http", "https"} or not parts.hostname:
+        msg = f"unsupported live data url: {url}"
+        raise HTTPException(msg)
+    use_tls = parts.scheme == "https"
+    port = parts.port or (443 if use_tls else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    request = (
+        f"GET {target} HTTP/1.0\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"User-Agent: {mureq.DEFAULT_UA}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode("ascii")
+
+    try:
+        async with asyncio.timeout(timeout):
+            reader, writer = await asyncio.open_connection(
+                parts.hostname,
+                port,
+                ssl=use_tls or None,
+            )
+            try:
+                writer.write(request)
+                await writer.drain()
+                response = await reader.read()
+            finally:
+                writer.close()
+                with contextlib.suppress(OSError):
+                    await writer.wait_closed()
+    except TimeoutError:
+        if auto_retry:
+            return await fetch_live_page(url, timeout=timeout)
+        raise
+    except OSError as e:
+        raise HTTPException(str(e)) from e
+
+    head, separator, body = response.partition(b"\r\n\r\n")
+    if not separator or not head.startswith(b"HTTP/"):
+        msg = "malformed response from weather station"
+        raise HTTPException(msg)
+    return body.decode("utf-8")
+
+
+async def _live_data_response(
+    live_data_url: str,
+    target: str,
+    snapshots: LiveSnapshotStore | None,
+    log: LogFunction,
+) -> RouteResponse:
+    if (snapshot := cached_live_snapshot(snapshots, target)) is not None:
+        return live_snapshot_response(snapshot)
+    try:
+        body = await fetch_live_page(live_data_url, auto_retry=True)
+    except Exception as e:  # noqa: BLE001
+        return error_response(log, e, 500)
+    return live_data_response(body, snapshots)
+
+
+@dataclass(frozen=True, slots=True)
+class _Request:
+    method: str
+    target: str
+    version: str
+    headers: dict[str, str]
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+async def _read_request(reader: asyncio.StreamReader) -> _Request | None:
+    """Read the request line and headers, or None if the client closed first.
+
+    Header names are lowercased. A malformed request line raises ValueError.
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    headers: dict[str, str] = {}
+    for _ in range(_MAX_REQUEST_HEADER_LINES):
+        line = await reader.readline()
+        if line in {b"\r\n", b"\n", b""}:
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    method, target, version = request_line.decode("latin-1").split(" ", 2)
+    return _Request(method, target, version.strip(), headers)
+
+
+def _encode_response(
+    body: EncodedBody,
+    status: int,
+    headers: ResponseHeaders | None = None,
+) -> bytes:
+    lines = [
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+        "Content-type: application/json",
+        "Access-Control-Allow-Origin: *",
+        *(
+            f"{name}: {value}"
+            for name, value in [*body_headers(body, status), *(headers or [])]
+        ),
+    ]
+    head = "\r\n".join(lines) + "\r\n\r\n"
+    return head.encode("latin-1") + body.content
+
+
+@dataclass(frozen=True, slots=True)
+class _ApiContext:
+    live_data_url: str
+    db_path: str
+    query_executor: ThreadPoolExecutor
+    log: LogFunction
+    snapshots: LiveSnapshotStore | None = None
+    response_cache: ResponseCache | None = None
+
+
+async def _route_request(
+    context: _ApiContext,
+    request: _Request,
+) -> tuple[EncodedBody, int, ResponseHeaders]:
+    body_format = response_format(
+        request.target,
+        request.headers.get("accept-encoding"),
+    )
+    if request.method != "GET":
+        payload = build_error_payload("Unsupported method")
+        return encode_body(payload, body_format), 501, []
+    if request.target.partition("?")[0] == "/":
+        payload, status = await _live_data_response(
+            context.live_data_url,
+            request.target,
+            context.snapshots,
+            context.log,
+        )
+        return encode_body(payload, body_format), status, []
+    return await asyncio.get_running_loop().run_in_executor(
+        context.query_executor,
+        partial(
+            conditional_database_response,
+            context.db_path,
+            request.target,
+            context.log,
+            context.response_cache,
+            body_format,
+            if_none_match=request.headers.get("if-none-match"),
+            if_modified_since=request.headers.get("if-modified-since"),
+        ),
+    )
+
+
+async def _serve_next_request(
+    reader: asyncio.StreamReader,
+    context: _ApiContext,
+    requests_served: int,
+) -> tuple[bytes, bool] | None:
+    """Answer the next request on a connection.
+
+    Returns:
+        The encoded response and whether to close the connection after it, or
+        None when the client closed the connection or stayed idle too long.
+
+    """
+    read_timeout = (
+        KEEP_ALIVE_TIMEOUT_SECONDS if requests_served else _REQUEST_READ_TIMEOUT_SECONDS
+    )
+    try:
+        async with asyncio.timeout(read_timeout):
+            request = await _read_request(reader)
+    except TimeoutError:
+        return None
+    except ValueError:
+        body = encode_body(build_error_payload("Bad request"))
+        return _encode_response(body, 400, [("Connection", "close")]), True
+    if request is None:
+        return None
+
+    body, status, headers = await _route_request(context, request)
+    connection_headers, close = keep_alive_headers(
+        requests_served + 1,
+        # Unread request bodies would be parsed as the next request
+        client_keep_alive=request.keep_alive and request.method == "GET",
+        http_1_0=request.version == "HTTP/1.0",
+    )
+    return _encode_response(body, status, [*connection_headers, *headers]), close
+
+
+async def _handle_connection(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    context: _ApiContext,
+) -> None:
+    """Serve requests on a persistent connection with the threaded server's routes."""
+    requests_served = 0
+    try:
+        while (
+            response := await _serve_next_request(reader, context, requests_served)
+        ) is not None:
+            requests_served += 1
+            data, close = response
+            writer.write(data)
+            await writer.drain()
+            if close:
+                break
+    except ConnectionError as e:
+        context.log("%s\n%s", type(e).__name__, str(e))
+    finally:
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+
+
+async def _wait_for_next_update(period_seconds: int) -> None:
+    for i in range(period_seconds, 0, -1):
+        print(f"\033[KNext update in {i} seconds", end="\r")
+        await asyncio.sleep(1)
+
+
+async def _poll_station(  # noqa: PLR0913
+    live_data_url: str,
+    *,
+    writer: ObservationWriter,
+    db_executor: ThreadPoolExecutor,
+    snapshots: LiveSnapshotStore,
+    labels: LabelMap,
+    period_seconds: int,
+    logger: logging.Logger,
+) -> None:
+    loop = asyncio.get_running_loop()
+    extractor = LiveDataExtractor()
+    remove_newlines = 0
+    while True:
+        clear_lines(remove_newlines)
+        # A station that stops answering must not hold rows back forever
+        await loop.run_in_executor(db_executor, writer.flush_if_due)
+        try:
+            body = await fetch_live_page(live_data_url)
+            live_data, live_labels = extractor.extract(body)
+        except TimeoutError:
+            logger.info("TimeoutError")
+            print("Warming up weather station's server...")
+            remove_newlines = 1
+            continue
+        except HTTPException as e:
+            logger.info("%s\n%s", type(e).__name__, e)
+            print(f"Error fetching live data: {e}")
+            remove_newlines = 1
+            await _wait_for_next_update(period_seconds)
+            continue
+        snapshots.publish(live_data, live_labels)
+        remove_newlines = print_observation(live_data, labels)
+        await loop.run_in_executor(db_executor, writer.insert, live_data)
+        await _wait_for_next_update(period_seconds)
+
+
+async def run_event_loop(  # noqa: PLR0913
+    live_data_url: str,
+    database_path: str,
+    *,
+    labels: LabelMap,
+    logger: logging.Logger,
+    port: int | None = None,
+    period_seconds: int = 60,
+    flush_every: int = 1,
+    flush_interval_seconds: int | None = None,
+    max_concurrent_requests: int = 8,
+) -> None:
+    """Poll the station and serve the JSON API until cancelled."""
+    loop = asyncio.get_running_loop()
+    snapshots = LiveSnapshotStore()
+    response_cache = ResponseCache()
+    with (
+        ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="aw2sqlite-writer",
+        ) as db_executor,
+        ThreadPoolExecutor(
+            max_workers=max_concurrent_requests,
+            thread_name_prefix="aw2sqlite-query",
+        ) as query_executor,
+    ):
+        server = None
+        if port is not None:
+            host = "localhost"
+            print(f"Starting JSON server on http://{host}:{port}")
+            context = _ApiContext(
+                live_data_url=live_data_url,
+                db_path=database_path,
+                query_executor=query_executor,
+                log=logger.info,
+                snapshots=snapshots,
+                response_cache=response_cache,
+            )
+            server = await asyncio.start_server(
+                partial(_handle_connection, context=context),
+                host,
+                port,
+            )
+
+        # SQLite connections belong to the thread that opened them, so the
+        # writer is created, used and closed on the single writer thread.
+        writer = await loop.run_in_executor(
+            db_executor,
+            partial(
+                ObservationWriter,
+                database_path,
+                flush_every=flush_every,
+                flush_interval_seconds=flush_interval_seconds,
+                on_flush=response_cache.invalidate,
+            ),
+        )
+        try:
+            await _poll_station(
+                live_data_url,
+                writer=writer,
+                db_executor=db_executor,
+                snapshots=snapshots,
+                labels=labels,
+                period_seconds=period_seconds,
+                logger=logger,
+            )
+        finally:
+            await loop.run_in_executor(db_executor, writer.close)
+            if server is not None:
+                server.close()
+
+
+def start_async_daemon(  # noqa: PLR0913
+    live_data_url: str,
+    database_path: str,
+    *,
+    port: int | None = None,
+    period_seconds: int = 60,
+    log_format: str = "text",
+    flush_every: int = 1,
+    flush_interval_seconds: int | None = None,
+    max_concurrent_requests: int = 8,
+    retention: RetentionPolicy | None = None,
+) -> None:
+    """Run the daemon on the asyncio runtime; a drop-in for start_daemon."""
+    print(f"Observing {live_data_url}")
+    print("Press Ctrl+C to stop")
+
+    log_path = Path(database_path).parent / f"{Path(database_path).stem}_daemon.log"
+    logger = configure_logging(log_path, log_format=log_format)
+
+    labels = load_labels(database_path, live_data_url, logger)
+
+    # Compaction runs on its own thread and connection, like the writer's
+    compaction_job = start_compaction_job(database_path, retention, logger)
+    with sigterm_as_keyboard_interrupt():
+        try:
+            asyncio.run(
+                run_event_loop(
+                    live_data_url,
+                    database_path,
+                    labels=labels,
+                    logger=logger,
+                    port=port,
+                    period_seconds=period_seconds,
+                    flush_every=flush_every,
+                    flush_interval_seconds=flush_interval_seconds,
+                    max_concurrent_requests=max_concurrent_requests,
+                ),
+            )
+        except KeyboardInterrupt:
+            print(f"\nStopping... results saved to {database_path}")
+            sys.exit(0)
+        finally:
+            if compaction_job is not None:
+                compaction_job.stop()
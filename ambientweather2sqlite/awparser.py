@@ -1,3 +1,6 @@
+import re
+from dataclasses import dataclass
+from html import unescape
 from html.parser import HTMLParser
 from typing import TYPE_CHECKING, override
 
@@ -6,6 +9,91 @@ from .units_mapping import Units
 if TYPE_CHECKING:
     from .models import LabelMap, LiveData
 
+# The fast path below only accepts markup that every supported html.parser
+# version tokenizes the same way; anything else is left to HTMLParser.
+_SPACE = r"[\t\n\r\f ]"
+_ATTRIBUTES = rf"""
+    (?:
+        {_SPACE}+[a-zA-Z_:][-a-zA-Z0-9_:.]*
+        (?:
+            {_SPACE}*={_SPACE}*
+            (?:"[^"<>]*"|'[^'<>]*'|[!#-&(-;?-_a-~]+(?![^\t\n\r\f >]))
+        )?
+    )*
+"""
+# Splits the attributes of a tag _DOCUMENT accepted into names and raw values
+_ATTRIBUTE = re.compile(
+    rf"""
+    ([a-zA-Z_:][-a-zA-Z0-9_:.]*)
+    (?:{_SPACE}*={_SPACE}*("[^"]*"|'[^']*'|[^\t\n\r\f >]+))?
+    """,
+    re.VERBOSE,
+)
+# Elements whose content html.parser (in some version) does not parse as markup.
+# Pages with <plaintext>, which hides the rest of the page, are not accepted.
+_SCRIPT_ELEMENTS = "script|style"
+_RAW_TEXT_ELEMENTS = "iframe|noembed|noframes|noscript|textarea|title|xmp"
+_DOCUMENT = re.compile(
+    rf"""
+    (?:
+        (?>[^<]+)
+      | <(?!(?:{_SCRIPT_ELEMENTS}|{_RAW_TEXT_ELEMENTS}|plaintext)(?![a-zA-Z0-9]))
+        [a-zA-Z][a-zA-Z0-9]*{_ATTRIBUTES}{_SPACE}*/?>  # start tag
+      | </[a-zA-Z][a-zA-Z0-9]*{_SPACE}*>                # end tag
+      | <(?P<script>{_SCRIPT_ELEMENTS})(?![a-zA-Z0-9])
+        {_ATTRIBUTES}{_SPACE}*(?<!/)>
+        (?:[^<]|<(?![/!]))*</(?P=script)>
+      | <(?P<raw>{_RAW_TEXT_ELEMENTS})(?![a-zA-Z0-9])
+        {_ATTRIBUTES}{_SPACE}*(?<!/)>
+        [^<]*</(?P=raw)>
+      | <!--(?!-?>)(?:[^-]|-(?!-))*-->                  # comment
+      | <![a-zA-Z][^<>"']*>                             # doctype
+      | <(?![a-zA-Z/!?])                                # literal "<"
+    )*
+    """,
+    re.VERBOSE | re.IGNORECASE | re.ASCII,
+)
+# In a document _DOCUMENT accepts, finds every input tag outside comments and
+# script or raw text elements
+_INPUT_TAG = re.compile(
+    rf"""
+    <!--.*?-->
+  | <(?:{_SCRIPT_ELEMENTS}|{_RAW_TEXT_ELEMENTS})(?![a-zA-Z0-9])[^>]*>.*?</
+  | <input(?![a-zA-Z0-9])([^>]*)>
+    """,
+    re.VERBOSE | re.IGNORECASE | re.ASCII | re.DOTALL,
+)
+# Splits a document _DOCUMENT accepted into the events html.parser reports
+_TOKEN = re.compile(
+    rf"""
+    ([^<]+)                                             # text
+  | <({_SCRIPT_ELEMENTS}|{_RAW_TEXT_ELEMENTS})(?![a-zA-Z0-9])
+    {_ATTRIBUTES}{_SPACE}*>([^<]*(?:<(?!/)[^<]*)*)</[^>]*>  # raw text element
+  | <(/?)([a-zA-Z][a-zA-Z0-9]*)({_ATTRIBUTES}){_SPACE}*(/?)>  # start or end tag
+  | <!--.*?-->
+  | <![^>]*>
+  | (<)                                                 # literal "<"
+    """,
+    re.VERBOSE | re.IGNORECASE | re.ASCII | re.DOTALL,
+)
+
+
+def _store_value(values: LiveData, name: str | None, value: str | None) -> None:
+    if name and value:
+        if "Batt" in name or "Time" in name or "ID" in name:
+            return
+
+        try:
+            values[name] = float(value)
+        except ValueError:
+            values[name] = None
+
+
+def _store_disabled_input(values: LiveData, attrs: dict[str, str | None]) -> None:
+    # Check if input is disabled (disabled attribute present)
+    if "disabled" in attrs:
+        _store_value(values, attrs.get("name"), attrs.get("value"))
+
 
 class DisabledInputParser(HTMLParser):
     def __init__(self) -> None:
@@ -16,26 +104,44 @@ class DisabledInputParser(HTMLParser):
     def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
         if tag == "input":
             # Convert attrs list to dict for easier access
-            attr_dict = dict(attrs)
+            _store_disabled_input(self.filtered_values, dict(attrs))
+
 
-            # Check if input is disabled (disabled attribute present)
-            if "disabled" in attr_dict:
-                name = attr_dict.get("name")
-                value = attr_dict.get("value")
+def _input_attributes(attrs: str) -> dict[str, str | None]:
+    attr_dict: dict[str, str | None] = {}
+    for name, raw_value in _ATTRIBUTE.findall(attrs):
+        if not raw_value:
+            attr_dict[name.lower()] = None
+            continue
+        value = raw_value[1:-1] if raw_value[0] in "\"'" else raw_value
+        attr_dict[name.lower()] = unescape(value) if "&" in value else value
+    return attr_dict
 
-                if name and value:
-                    if "Batt" in name or "Time" in name or "ID" in name:
-                        return
 
-                    try:
-                        self.filtered_values[name] = float(value)
-                    except ValueError:
-                        self.filtered_values[name] = None
+def scan_disabled_inputs(html_content: str) -> LiveData | None:
+    """Extract disabled input values without a full HTML parse.
+
+    Checks the page against a well-formed subset of HTML with one regular
+    expression, then parses the attributes of its input tags only, producing
+    the same result as DisabledInputParser. Returns None when the page falls
+    outside that subset, such as unterminated tags or script bodies containing
+    end tags, so the caller can fall back to the full parser.
+    """
+    if _DOCUMENT.fullmatch(html_content) is None:
+        return None
+    values: LiveData = {}
+    for attrs in _INPUT_TAG.findall(html_content):
+        if attrs:
+            _store_disabled_input(values, _input_attributes(attrs))
+    return values
 
 
 def extract_values(html_content: str) -> LiveData:
     """Extracts values from disabled input fields in HTML content.
 
+    Uses scan_disabled_inputs and falls back to DisabledInputParser for pages
+    the scanner does not handle.
+
     Args:
         html_content (str): The HTML content as a string.
 
@@ -44,6 +150,8 @@ def extract_values(html_content: str) -> LiveData:
               and values are their 'value' attributes, filtered as described.
 
     """
+    if (values := scan_disabled_inputs(html_content)) is not None:
+        return values
     parser = DisabledInputParser()
     parser.feed(html_content)
     return parser.filtered_values
@@ -106,6 +214,96 @@ class LabeledInputParser(HTMLParser):
                     self.data_dict[input_name] = self.current_label
 
 
+class LiveDataParser(LabeledInputParser):
+    """Collects disabled input values and their row labels in one pass."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.filtered_values: LiveData = {}
+
+    @override
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        super().handle_starttag(tag, attrs)
+        if tag == "input":
+            _store_disabled_input(self.filtered_values, dict(attrs))
+
+
+def _replay_tokens(parser: LiveDataParser, html_content: str) -> bool:
+    """Feed parser the events html.parser would report for the page.
+
+    Returns:
+        False if the page uses markup whose text html.parser versions decode
+        differently, in which case parser must be discarded.
+
+    """
+    for (
+        text,
+        raw_tag,
+        raw_text,
+        end_slash,
+        tag,
+        attrs,
+        self_closing,
+        less_than,
+    ) in _TOKEN.findall(html_content):
+        if text:
+            parser.handle_data(unescape(text) if "&" in text else text)
+        elif tag:
+            element = tag.lower()
+            if end_slash:
+                parser.handle_endtag(element)
+                continue
+            attr_list = (
+                list(_input_attributes(attrs).items()) if element == "input" else []
+            )
+            parser.handle_starttag(element, attr_list)
+            if self_closing:
+                parser.handle_endtag(element)
+        elif raw_tag:
+            element = raw_tag.lower()
+            if "&" in raw_text and element not in {"script", "style"}:
+                return False
+            parser.handle_starttag(element, [])
+            if raw_text:
+                parser.handle_data(raw_text)
+            parser.handle_endtag(element)
+        elif less_than:
+            parser.handle_data(less_than)
+    return True
+
+
+def scan_live_data(html_content: str) -> tuple[LiveData, LabelMap] | None:
+    """Extract values and labels without running html.parser over the page.
+
+    Tokenizes a page in the subset of HTML scan_disabled_inputs accepts with
+    regular expressions and replays the tokens into a LiveDataParser, giving
+    the same result as feeding it the page. Returns None for other pages.
+    """
+    if _DOCUMENT.fullmatch(html_content) is None:
+        return None
+    parser = LiveDataParser()
+    if not _replay_tokens(parser, html_content):
+        return None
+    return parser.filtered_values, parser.data_dict
+
+
+def extract_live_data(html_content: str) -> tuple[LiveData, LabelMap]:
+    """Parses livedata.htm once for both its values and their labels.
+
+    Args:
+        html_content (str): The HTML content of the file.
+
+    Returns:
+        tuple: The result of extract_values and the result of extract_labels.
+
+    """
+    if (live_data := scan_live_data(html_content)) is not None:
+        return live_data
+    parser = LiveDataParser()
+    parser.feed(html_content)
+    return parser.filtered_values, parser.data_dict
+
+
 def extract_labels(html_content: str) -> LabelMap:
     """Parses the HTML content from livedata.htm to extract input names
     and their corresponding labels using Python's html.parser.
@@ -118,11 +316,103 @@ def extract_labels(html_content: str) -> LabelMap:
               preceding <td> element.
 
     """
+    if (live_data := scan_live_data(html_content)) is not None:
+        return live_data[1]
     parser = LabeledInputParser()
     parser.feed(html_content)
     return parser.data_dict
 
 
+@dataclass(frozen=True, slots=True)
+class _PageTemplate:
+    # The page split around the quoted value of every input tag. Each segment
+    # after the first starts with the quote closing the preceding value.
+    segments: tuple[str, ...]
+    # The name a value is stored under, or None for inputs that are not
+    # disabled, paired with the quote delimiting it
+    slots: tuple[tuple[str | None, str], ...]
+    labels: LabelMap
+
+
+def _learn_template(html_content: str, labels: LabelMap) -> _PageTemplate | None:
+    if _DOCUMENT.fullmatch(html_content) is None:
+        return None
+    segments: list[str] = []
+    slots: list[tuple[str | None, str]] = []
+    segment_start = 0
+    for tag in _INPUT_TAG.finditer(html_content):
+        if not (attrs := tag.group(1)):
+            continue
+        value_span = None
+        for attribute in _ATTRIBUTE.finditer(attrs):
+            if attribute.group(1).lower() == "value":
+                value_span = attribute.span(2)
+        if value_span is None:
+            continue
+        quote = attrs[value_span[0]]
+        if quote not in "\"'":
+            return None
+        input_attrs = _input_attributes(attrs)
+        start = tag.start(1) + value_span[0] + 1
+        segments.append(html_content[segment_start:start])
+        slots.append(
+            (input_attrs.get("name") if "disabled" in input_attrs else None, quote),
+        )
+        segment_start = tag.start(1) + value_span[1] - 1
+    segments.append(html_content[segment_start:])
+    return _PageTemplate(tuple(segments), tuple(slots), labels)
+
+
+def _match_template(template: _PageTemplate, html_content: str) -> LiveData | None:
+    if not html_content.startswith(template.segments[0]):
+        return None
+    values: LiveData = {}
+    position = len(template.segments[0])
+    for (name, quote), segment in zip(
+        template.slots,
+        template.segments[1:],
+        strict=True,
+    ):
+        end = html_content.find(quote, position)
+        if end < 0 or not html_content.startswith(segment, end):
+            return None
+        value = html_content[position:end]
+        if "<" in value or ">" in value:
+            return None
+        _store_value(values, name, unescape(value) if "&" in value else value)
+        position = end + len(segment)
+    if position != len(html_content):
+        return None
+    return values
+
+
+class LiveDataExtractor:
+    """Extracts values and labels from successive fetches of one station's page.
+
+    The station serves livedata.htm with the same markup on every poll apart
+    from the value attributes of its inputs. The first page is parsed with
+    extract_live_data and kept as a template; a later page that differs from
+    it only inside those values is read by slicing the values out between the
+    template's fixed segments, reusing the labels parsed the first time. Any
+    other difference falls back to extract_live_data and learns the new page
+    as the template. Use one extractor per station.
+    """
+
+    def __init__(self) -> None:
+        self._template: _PageTemplate | None = None
+
+    def extract(self, html_content: str) -> tuple[LiveData, LabelMap]:
+        """Return the values and labels extract_live_data would for the page."""
+        template = self._template
+        if template is not None:
+            values = _match_template(template, html_content)
+            if values is not None:
+                return values, dict(template.labels)
+        values, labels = extract_live_data(html_content)
+        self._template = _learn_template(html_content, dict(labels))
+        return values, labels
+
+
 class UnitsHTMLParser(HTMLParser):
     """A parser to extract selected weather station units from an HTML file.
 
@@ -1,12 +1,16 @@
 import tomllib
 from pathlib import Path
 
-from .models import AppConfig
+from .models import AppConfig, RetentionPolicy
 
 _CURRENT_PATH = Path.cwd()
 _DEFAULT_CONFIG_NAME = "aw2sqlite.toml"
 _DEFAULT_DATABASE_NAME = "aw2sqlite.db"
 _VALID_LOG_FORMATS = frozenset({"text", "json"})
+_VALID_RUNTIMES = frozenset({"threaded", "asyncio"})
+_VALID_TIMESTAMP_STORAGES = frozenset({"text", "epoch_ms"})
+_VALID_PARTITIONINGS = frozenset({"none", "monthly"})
+_MINUTES_PER_HOUR = 60
 
 
 def _config_type_error(key: str, expected_type: str) -> TypeError:
@@ -30,6 +34,23 @@ def _optional_int(config_data: dict[str, object], key: str) -> int | None:
     return value
 
 
+def _positive_int_or_none(config_data: dict[str, object], key: str) -> int | None:
+    value = _optional_int(config_data, key)
+    if value is not None and value < 1:
+        msg = f"{key} must be at least 1"
+        raise ValueError(msg)
+    return value
+
+
+def _optional_positive_int(
+    config_data: dict[str, object],
+    key: str,
+    default: int,
+) -> int:
+    value = _positive_int_or_none(config_data, key)
+    return default if value is None else value
+
+
 def _optional_str(
     config_data: dict[str, object],
     key: str,
@@ -41,23 +62,101 @@ def _optional_str(
     return value
 
 
-def _optional_log_format(config_data: dict[str, object]) -> str:
-    value = _optional_str(config_data, "log_format", "text")
-    if value not in _VALID_LOG_FORMATS:
-        valid_formats = ", ".join(sorted(_VALID_LOG_FORMATS))
-        msg = f"log_format must be one of: {valid_formats}"
+def _optional_choice(
+    config_data: dict[str, object],
+    key: str,
+    choices: frozenset[str],
+    default: str,
+) -> str:
+    value = _optional_str(config_data, key, default)
+    if value not in choices:
+        valid_choices = ", ".join(sorted(choices))
+        msg = f"{key} must be one of: {valid_choices}"
         raise ValueError(msg)
     return value
 
 
+def _optional_str_tuple(config_data: dict[str, object], key: str) -> tuple[str, ...]:
+    value = config_data.get(key, [])
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise _config_type_error(key, "a list of strings")
+    return tuple(value)
+
+
+def _optional_retention(config_data: dict[str, object]) -> RetentionPolicy | None:
+    """Read the [retention] table, or None when the config has none."""
+    retention_data = config_data.get("retention")
+    if retention_data is None:
+        return None
+    if not isinstance(retention_data, dict):
+        raise _config_type_error("retention", "a table")
+    raw_days = _optional_int(retention_data, "raw_days")
+    if raw_days is None:
+        raise _config_type_error("retention.raw_days", "an integer")
+    if raw_days < 1:
+        msg = "retention.raw_days must be at least 1"
+        raise ValueError(msg)
+    downsample_minutes = _optional_positive_int(
+        retention_data,
+        "downsample_minutes",
+        5,
+    )
+    if _MINUTES_PER_HOUR % downsample_minutes:
+        msg = "retention.downsample_minutes must divide an hour evenly"
+        raise ValueError(msg)
+    downsampled_days = _optional_int(retention_data, "downsampled_days")
+    if downsampled_days is not None and downsampled_days < raw_days:
+        msg = "retention.downsampled_days must be at least retention.raw_days"
+        raise ValueError(msg)
+    return RetentionPolicy(
+        raw_days=raw_days,
+        downsample_minutes=downsample_minutes,
+        downsampled_days=downsampled_days,
+    )
+
+
 def load_config(config_path: Path) -> AppConfig:
     config_data = tomllib.loads(config_path.read_text(encoding="utf-8"))
-    return AppConfig(
+    config = AppConfig(
         live_data_url=_require_str(config_data, "live_data_url"),
         database_path=_require_str(config_data, "database_path"),
         port=_optional_int(config_data, "port"),
-        log_format=_optional_log_format(config_data),
+        log_format=_optional_choice(
+            config_data,
+            "log_format",
+            _VALID_LOG_FORMATS,
+            "text",
+        ),
+        flush_every=_optional_positive_int(config_data, "flush_every", 1),
+        flush_interval_seconds=_positive_int_or_none(
+            config_data,
+            "flush_interval_seconds",
+        ),
+        max_concurrent_requests=_optional_positive_int(
+            config_data,
+            "max_concurrent_requests",
+            8,
+        ),
+        runtime=_optional_choice(config_data, "runtime", _VALID_RUNTIMES, "threaded"),
+        timestamp_storage=_optional_choice(
+            config_data,
+            "timestamp_storage",
+            _VALID_TIMESTAMP_STORAGES,
+            "text",
+        ),
+        partitioning=_optional_choice(
+            config_data,
+            "partitioning",
+            _VALID_PARTITIONINGS,
+            "none",
+        ),
+        retention=_optional_retention(config_data),
+        change_only_columns=_optional_str_tuple(config_data, "change_only_columns"),
     )
+    if config.partitioning != "none" and config.timestamp_storage != "text":
+        msg = 'partitioning requires timestamp_storage = "text"'
+        raise ValueError(msg)
+    return config
 
 
 def get_config_path() -> Path | None:
@@ -1,17 +1,30 @@
 import json
 import logging
+import signal
 import sys
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
 from http.client import HTTPException
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from ambientweather2sqlite import mureq
-from ambientweather2sqlite.awparser import extract_values
+from ambientweather2sqlite.awparser import LiveDataExtractor, extract_values
 from ambientweather2sqlite.server import Server
 
-from .database import insert_observation
+from .database import ObservationWriter
 from .metadata import create_metadata
+from .response_cache import ResponseCache
+from .retention import start_compaction_job
+from .snapshot import LiveSnapshotStore
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from types import FrameType
+
+    from .models import LabelMap, LiveData, RetentionPolicy
 
 
 class _JsonFormatter(logging.Formatter):
@@ -29,7 +42,7 @@ class _JsonFormatter(logging.Formatter):
         return json.dumps(entry)
 
 
-def _configure_logging(
+def configure_logging(
     log_path: Path,
     *,
     log_format: str = "text",
@@ -51,6 +64,28 @@ def _configure_logging(
     return logger
 
 
+def _raise_keyboard_interrupt(signum: int, frame: FrameType | None) -> None:  # noqa: ARG001
+    raise KeyboardInterrupt
+
+
+@contextmanager
+def sigterm_as_keyboard_interrupt() -> Iterator[None]:
+    """Stop on SIGTERM the way Ctrl+C does, so buffered observations are saved.
+
+    Service managers such as systemd and launchd stop the daemon with SIGTERM.
+    Signal handlers can only be installed from the main thread; elsewhere the
+    default disposition is left alone.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    previous_handler = signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+
+
 def clear_lines(n: int) -> None:
     for _ in range(n):
         print("\033[A\033[K", end="")
@@ -62,6 +97,32 @@ def wait_for_next_update(period_seconds: int) -> None:
         time.sleep(1)
 
 
+def print_observation(live_data: LiveData, labels: LabelMap) -> int:
+    """Print a labeled observation and return how many lines it used."""
+    print(f"Updated at: {datetime.now()}")
+    labeled_data = {labels.get(key, key): value for key, value in live_data.items()}
+    pretty_data = json.dumps(labeled_data, indent=4)
+    print(pretty_data)
+    # + 2 for the "Updated at" line and the newline generated by print()
+    return pretty_data.count("\n") + 2
+
+
+def load_labels(
+    database_path: str,
+    live_data_url: str,
+    logger: logging.Logger,
+    pool: mureq.ConnectionPool | None = None,
+) -> LabelMap:
+    """Write the Datasette metadata file and return the station's labels."""
+    try:
+        labels, _ = create_metadata(database_path, live_data_url, pool)
+    except (HTTPException, TimeoutError) as e:
+        logger.info("%s\n%s", type(e).__name__, e)
+        print(f"Error fetching metadata: {e}")
+        return {}
+    return labels
+
+
 def fetch_once(live_data_url: str) -> None:
     """Fetch a single observation and print it without writing to the DB."""
     try:
@@ -76,65 +137,88 @@ def fetch_once(live_data_url: str) -> None:
     print(json.dumps(live_data, indent=4))
 
 
-def start_daemon(
+def start_daemon(  # noqa: PLR0913, PLR0915
     live_data_url: str,
     database_path: str,
     *,
     port: int | None = None,
     period_seconds: int = 60,
     log_format: str = "text",
+    flush_every: int = 1,
+    flush_interval_seconds: int | None = None,
+    max_concurrent_requests: int = 8,
+    retention: RetentionPolicy | None = None,
 ) -> None:
     print(f"Observing {live_data_url}")
     print("Press Ctrl+C to stop")
 
     log_path = Path(database_path).parent / f"{Path(database_path).stem}_daemon.log"
-    logger = _configure_logging(log_path, log_format=log_format)
+    logger = configure_logging(log_path, log_format=log_format)
 
-    labels: dict[str, str] = {}
-    try:
-        labels, _ = create_metadata(database_path, live_data_url)
-    except (HTTPException, TimeoutError) as e:
-        logger.info("%s\n%s", type(e).__name__, e)
-        print(f"Error fetching metadata: {e}")
+    # Reuse keep-alive connections to the station across polls, the metadata
+    # fetch and live-data API requests
+    station_pool = mureq.ConnectionPool()
+    labels = load_labels(database_path, live_data_url, logger, station_pool)
 
     server = None
+    snapshots = LiveSnapshotStore()
+    response_cache = ResponseCache()
 
     if port is not None:
         host = "localhost"
         print(f"Starting JSON server on http://{host}:{port}")
-        server = Server(live_data_url, database_path, port, host)
+        server = Server(
+            live_data_url,
+            database_path,
+            port,
+            host,
+            max_concurrent_requests=max_concurrent_requests,
+            snapshots=snapshots,
+            response_cache=response_cache,
+            station_pool=station_pool,
+        )
         server.start()
 
+    writer = ObservationWriter(
+        database_path,
+        flush_every=flush_every,
+        flush_interval_seconds=flush_interval_seconds,
+        on_flush=response_cache.invalidate,
+    )
+    compaction_job = start_compaction_job(database_path, retention, logger)
+    extractor = LiveDataExtractor()
     remove_newlines = 0
-    try:
-        while True:
-            clear_lines(remove_newlines)
-            try:
-                body = mureq.get(live_data_url)
-                live_data = extract_values(body)
-            except TimeoutError:
-                logger.info("TimeoutError")
-                print("Warming up weather station's server...")
-                remove_newlines = 1
-                continue
-            except HTTPException as e:
-                logger.info("%s\n%s", type(e).__name__, e)
-                print(f"Error fetching live data: {e}")
-                remove_newlines = 1
+    with sigterm_as_keyboard_interrupt():
+        try:
+            while True:
+                clear_lines(remove_newlines)
+                # A station that stops answering must not hold rows back forever
+                writer.flush_if_due()
+                try:
+                    body = mureq.get(live_data_url, pool=station_pool)
+                    live_data, live_labels = extractor.extract(body)
+                except TimeoutError:
+                    logger.info("TimeoutError")
+                    print("Warming up weather station's server...")
+                    remove_newlines = 1
+                    continue
+                except HTTPException as e:
+                    logger.info("%s\n%s", type(e).__name__, e)
+                    print(f"Error fetching live data: {e}")
+                    remove_newlines = 1
+                    wait_for_next_update(period_seconds)
+                    continue
+                snapshots.publish(live_data, live_labels)
+                remove_newlines = print_observation(live_data, labels)
+                writer.insert(live_data)
                 wait_for_next_update(period_seconds)
-                continue
-            print(f"Updated at: {datetime.now()}")
-            labeled_data = {
-                labels.get(key, key): value for key, value in live_data.items()
-            }
-            pretty_data = json.dumps(labeled_data, indent=4)
-            # + 2 for the "Updated at" line and the newline generated by print()
-            remove_newlines = pretty_data.count("\n") + 2
-            print(pretty_data)
-            insert_observation(database_path, live_data)
-            wait_for_next_update(period_seconds)
-    except KeyboardInterrupt:
-        print(f"\nStopping... results saved to {database_path}")
-        if server is not None:
-            server.shutdown()
-        sys.exit(0)
+        except KeyboardInterrupt:
+            print(f"\nStopping... results saved to {database_path}")
+            if server is not None:
+                server.shutdown()
+            sys.exit(0)
+        finally:
+            if compaction_job is not None:
+                compaction_job.stop()
+            writer.close()
+            station_pool.close()
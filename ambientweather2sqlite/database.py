@@ -1,13 +1,22 @@
+import itertools
 import logging
 import re
 import sqlite3
+from bisect import bisect_right
+from collections import defaultdict
 from contextlib import closing
-from datetime import UTC, date, datetime, time, timedelta
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta, tzinfo
+from functools import lru_cache
+from itertools import batched
 from pathlib import Path
-from typing import TYPE_CHECKING
+from time import monotonic
+from typing import TYPE_CHECKING, Self
 from zoneinfo import ZoneInfo
 
 from .exceptions import (
+    CompactedRangeError,
+    EpochTimestampsNotPartitionableError,
     InvalidColumnNameError,
     InvalidDateError,
     InvalidDateRangeError,
@@ -15,16 +24,28 @@ from .exceptions import (
     InvalidPriorDaysError,
     InvalidTimezoneError,
     MissingAggregationFieldsError,
+    ObservationsAlreadyPartitionedError,
+    RollupsRequiredError,
+    TimestampsAlreadyMigratedError,
     UnexpectedEmptyDictionaryError,
 )
+from .models import (
+    CompactionSummary,
+    PartitionMigrationSummary,
+    TimestampMigrationSummary,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Collection, Iterable, Iterator, Mapping
+
     from .models import (
         AggregatedRow,
         AggregationField,
         DbMetrics,
         HourlyAggregatedData,
         Observation,
+        ObservationValue,
+        RetentionPolicy,
     )
 
 _DEFAULT_TABLE_NAME = "observations"
@@ -32,6 +53,36 @@ _TS_COL = "ts"
 _SQLITE_BUSY_TIMEOUT_MS = 5_000
 _SQLITE_MMAP_SIZE_BYTES = 268_435_456
 _SQLITE_TS_DEFAULT = "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+# ts as integer milliseconds since the Unix epoch, rounded half up like
+# SQLite's own julian day arithmetic
+_EPOCH_TS_TYPE = "INTEGER"
+_UNIX_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MS_PER_HOUR = 3_600_000
+_MS_PER_DAY = 86_400_000
+_SQLITE_EPOCH_MS_SQL = "CAST(ROUND((julianday({}) - 2440587.5) * 86400000) AS INTEGER)"
+_SQLITE_EPOCH_TS_DEFAULT = _SQLITE_EPOCH_MS_SQL.format("'now'")
+_SQLITE_EPOCH_TS_TEXT = (
+    f"strftime('%Y-%m-%d %H:%M:%f', {_TS_COL} / 1000.0, 'unixepoch')"
+)
+_INSERT_STATEMENT_CACHE_SIZE = 32
+_BULK_INSERT_BATCH_SIZE = 5_000
+_OFFSET_SAMPLE_INTERVAL = timedelta(hours=1)
+_BUCKET_BOUNDARY_CACHE_SIZE = 64
+_ROLLUP_TABLE_NAME = f"{_DEFAULT_TABLE_NAME}_hourly"
+_ROLLUP_HOUR_FORMAT = "%Y-%m-%d %H:00:00"
+# Rollup rows under this name carry COUNT(*) for the hour, not a column's stats
+_ROLLUP_ROW_COUNT_NAME = "*"
+# Monthly partitions are observations_YYYY_MM tables listed in this registry,
+# which also keeps their row counts and ts bounds
+_PARTITION_REGISTRY_NAME = f"{_DEFAULT_TABLE_NAME}_partitions"
+_PARTITION_MONTH_PATTERN = re.compile(r"\d{4}-\d{2}")
+# Retention compacts old raw rows into averaged buckets kept in this table
+_DOWNSAMPLED_TABLE_NAME = f"{_DEFAULT_TABLE_NAME}_downsampled"
+_COMPACTION_CHUNK_HOURS = 6
+_COMPACTION_BATCH_SIZE = 5_000
+_STATS_TABLE_NAME = f"{_DEFAULT_TABLE_NAME}_stats"
+_CHANGE_ONLY_REGISTRY_NAME = f"{_DEFAULT_TABLE_NAME}_change_only"
+_CHANGE_ONLY_NULLS_NAME = f"{_DEFAULT_TABLE_NAME}_change_only_nulls"
 
 _logger = logging.getLogger(__name__)
 
@@ -198,10 +249,15 @@ def _current_date_for_timezone(timezone: str | ZoneInfo) -> date:
     if timezone == "localtime":
         return datetime.now().date()
 
-    offset_hours = float(timezone.removesuffix(" hours"))
+    offset_hours = _fixed_offset_hours(timezone)
     return (datetime.now(UTC) + timedelta(hours=offset_hours)).date()
 
 
+def _fixed_offset_hours(timezone: str) -> float:
+    """Return N for a validated "N hours" SQLite modifier."""
+    return float(timezone.removesuffix(" hours"))
+
+
 def _normalize_hourly_date_range(
     start_date: str,
     end_date: str | None,
@@ -291,121 +347,536 @@ def _parse_stored_timestamp(value: str) -> datetime:
     return parsed.astimezone(UTC)
 
 
-def _fetch_rows_for_zoneinfo_range(
-    db_path: str,
-    columns: set[str],
+def _epoch_ms(value: str) -> int:
+    """Convert a text timestamp to the epoch milliseconds stored in its place."""
+    elapsed = _parse_stored_timestamp(value) - _UNIX_EPOCH
+    return (elapsed // timedelta(microseconds=1) + 500) // 1000
+
+
+def _format_epoch_ms(value: int) -> str:
+    """Format stored epoch milliseconds like the ts column of the text view."""
+    moment = _UNIX_EPOCH + timedelta(milliseconds=value)
+    return moment.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def _local_midnight_as_utc(day: date, timezone: str | ZoneInfo) -> str:
+    """Return local midnight at the start of day as a stored UTC timestamp."""
+    if isinstance(timezone, ZoneInfo):
+        return _format_sqlite_timestamp(
+            datetime.combine(day, time.min, tzinfo=timezone),
+        )
+    local_midnight = datetime.combine(day, time.min)
+    if timezone == "localtime":
+        return _format_sqlite_timestamp(local_midnight.astimezone())
+    utc_midnight = local_midnight - timedelta(hours=_fixed_offset_hours(timezone))
+    return utc_midnight.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _local_days_as_utc_range(
     start_date: date,
     end_date: date,
-    timezone: ZoneInfo,
-) -> list[sqlite3.Row]:
-    start_ts = _format_sqlite_timestamp(
-        datetime.combine(start_date, time.min, tzinfo=timezone),
+    timezone: str | ZoneInfo,
+) -> tuple[str, str]:
+    """Return the half-open stored UTC ts range covering local start..end days."""
+    return (
+        _local_midnight_as_utc(start_date, timezone),
+        _local_midnight_as_utc(end_date + timedelta(days=1), timezone),
     )
-    end_ts = _format_sqlite_timestamp(
-        datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=timezone),
+
+
+def daily_query_window(prior_days: int, tz: str | None = None) -> tuple[str, str]:
+    """Return the UTC [start, end) ts range query_daily_aggregated_data reads."""
+    if not isinstance(prior_days, int):
+        raise InvalidPriorDaysError(prior_days)
+    timezone = _validate_timezone(tz)
+    today = _current_date_for_timezone(timezone)
+    return _local_days_as_utc_range(
+        today - timedelta(days=prior_days),
+        today,
+        timezone,
     )
-    select_columns = ", ".join([_TS_COL, *sorted(columns)])
-    query = (
-        f"SELECT {select_columns} FROM {_DEFAULT_TABLE_NAME} "
-        f"WHERE {_TS_COL} >= ? AND {_TS_COL} < ? ORDER BY {_TS_COL}"
+
+
+def hourly_query_window(
+    start_date: str,
+    end_date: str | None = None,
+    tz: str | None = None,
+) -> tuple[str, str]:
+    """Return the UTC [start, end) ts range query_hourly_aggregated_data reads."""
+    timezone = _validate_timezone(tz)
+    start_date_obj, end_date_obj = _normalize_hourly_date_range(
+        start_date=start_date,
+        end_date=end_date,
+        timezone=timezone,
     )
+    return _local_days_as_utc_range(start_date_obj, end_date_obj, timezone)
+
+
+@lru_cache(maxsize=_BUCKET_BOUNDARY_CACHE_SIZE)
+def _utc_offset_segments(
+    timezone: ZoneInfo | None,
+    start: datetime,
+    end: datetime,
+) -> list[tuple[datetime, timedelta]]:
+    """Split [start, end) into runs where timezone has a constant UTC offset.
+
+    A timezone of None stands for the system's local time, as SQLite's
+    "localtime" modifier does. Returns (segment_start, offset) pairs, the
+    first starting at start. Offsets
+    are sampled hourly and each change is bisected down to the second, so a
+    year-long range costs about 9k utcoffset calls however many rows it holds,
+    and repeated ranges are served from a cache.
+    """
 
-    with closing(
-        _connect_database(db_path, read_only=True, use_row_factory=True),
-    ) as conn:
-        cursor = conn.cursor().execute(query, (start_ts, end_ts))
-        return cursor.fetchall()
+    def offset_at(moment: datetime) -> timedelta:
+        return moment.astimezone(timezone).utcoffset() or timedelta(0)
+
+    segments = [(start, offset_at(start))]
+    probe = start
+    while probe < end:
+        next_probe = min(probe + _OFFSET_SAMPLE_INTERVAL, end)
+        current_offset = segments[-1][1]
+        if offset_at(next_probe) != current_offset:
+            low, high = 0, int((next_probe - probe).total_seconds())
+            while high - low > 1:
+                middle = (low + high) // 2
+                if offset_at(probe + timedelta(seconds=middle)) == current_offset:
+                    low = middle
+                else:
+                    high = middle
+            boundary = probe + timedelta(seconds=high)
+            segments.append((boundary, offset_at(boundary)))
+        probe = next_probe
+    return segments
+
+
+def _offset_modifier(offset: timedelta) -> str:
+    return f"{int(offset.total_seconds()):+d} seconds"
+
+
+def _segment_case(
+    segments: list[tuple[datetime, timedelta]],
+    boundary: Callable[[datetime], str | int],
+    offset: Callable[[timedelta], str | int],
+) -> tuple[str, list[str | int]]:
+    """Build a CASE on ts picking the offset of the segment each row falls in."""
+    params: list[str | int] = []
+    for (_, segment_offset), (next_start, _) in itertools.pairwise(segments):
+        params.extend((boundary(next_start), offset(segment_offset)))
+    params.append(offset(segments[-1][1]))
+    if len(segments) == 1:
+        return "?", params
+    cases = " ".join(f"WHEN {_TS_COL} < ? THEN ?" for _ in segments[1:])
+    return f"CASE {cases} ELSE ? END", params
+
+
+def _local_time_modifier(
+    timezone: str | ZoneInfo,
+    start_ts: str,
+    end_ts: str,
+) -> tuple[str, list[str | int]]:
+    """Build a SQL expression yielding the date/time modifier for each row's ts.
+
+    Fixed offsets and "localtime" bind the modifier itself. ZoneInfo ranges are
+    split into constant-offset segments and mapped with a CASE on ts, so SQLite
+    can convert and group rows without Python touching them.
+    """
+    if not isinstance(timezone, ZoneInfo):
+        return "?", [timezone]
+
+    segments = _utc_offset_segments(
+        timezone,
+        _parse_stored_timestamp(start_ts),
+        _parse_stored_timestamp(end_ts),
+    )
+    return _segment_case(segments, _format_sqlite_timestamp, _offset_modifier)
+
+
+def _epoch_offset_ms(
+    timezone: str | ZoneInfo,
+    start_ts: str,
+    end_ts: str,
+) -> tuple[str, list[str | int]]:
+    """Build a SQL expression yielding each epoch-ms ts's UTC offset in ms.
+
+    Like _local_time_modifier, but "localtime" is resolved into segments in
+    Python too, so rows are shifted into local time by integer addition alone.
+    """
+    if isinstance(timezone, str) and timezone != "localtime":
+        return "?", [round(_fixed_offset_hours(timezone) * _MS_PER_HOUR)]
+
+    segments = _utc_offset_segments(
+        timezone if isinstance(timezone, ZoneInfo) else None,
+        _parse_stored_timestamp(start_ts),
+        _parse_stored_timestamp(end_ts),
+    )
+    return _segment_case(
+        segments,
+        lambda boundary: (boundary - _UNIX_EPOCH) // timedelta(milliseconds=1),
+        lambda offset: offset // timedelta(milliseconds=1),
+    )
 
 
-def _aggregate_rows(
-    rows: list[sqlite3.Row],
+def _raw_aggregation_query(  # noqa: PLR0913
     parsed_fields: list[AggregationField],
-) -> AggregatedRow:
-    result: AggregatedRow = {"count": len(rows)}
+    timezone: str | ZoneInfo,
+    start_ts: str,
+    end_ts: str,
+    *,
+    by_hour: bool,
+    epoch_ts: bool = False,
+    partitions: Mapping[str, Collection[str]] | None = None,
+    change_only: Collection[str] = (),
+) -> tuple[str, list[str | int]]:
+    """Build the query aggregating raw observations into local days or hours.
+
+    Rows are selected by their UTC ts so the UNIQUE ts index bounds the scan.
+    The tz modifier is computed once per row in a subquery and reused for the
+    local date and hour, and SQLite returns one row per bucket. Tables storing
+    ts as epoch milliseconds are handed to _raw_epoch_aggregation_query. When
+    partitions maps the monthly tables overlapping the range to their columns,
+    the subquery reads each of them directly and joins them with UNION ALL.
+    Requested change-only columns are decoded from the start of the UTC hour
+    holding start_ts.
+    """
+    if epoch_ts:
+        return _raw_epoch_aggregation_query(
+            parsed_fields,
+            timezone,
+            start_ts,
+            end_ts,
+            by_hour=by_hour,
+            change_only=change_only,
+        )
+    modifier_sql, modifier_params = _local_time_modifier(timezone, start_ts, end_ts)
+    where_clause, range_params = _half_open_range_clause(_TS_COL, start_ts, end_ts)
+    columns = sorted({column_name for _, column_name, _ in parsed_fields})
+    decoded_columns = set(change_only).intersection(columns)
+    hour_where, hour_params = _half_open_range_clause(
+        _TS_COL,
+        _rollup_hour(start_ts),
+        end_ts,
+    )
 
-    for agg_func, column_name, alias in parsed_fields:
-        values = [row[column_name] for row in rows if row[column_name] is not None]
-        if not values:
-            result[alias] = None
-        elif agg_func == "AVG":
-            result[alias] = sum(values) / len(values)
-        elif agg_func == "MAX":
-            result[alias] = max(values)
-        elif agg_func == "MIN":
-            result[alias] = min(values)
-        elif agg_func == "SUM":
-            result[alias] = sum(values)
+    bucket_parts = [f"DATE({_TS_COL}, tz_modifier) as date"]
+    if by_hour:
+        bucket_parts.append(f"strftime('%H', {_TS_COL}, tz_modifier) as hour")
+    group_by_expr = "date, hour" if by_hour else "date"
 
-    return result
+    select_parts = _select_parts_from_parsed_fields(
+        parsed_fields=parsed_fields,
+        datetime_expression=", ".join(bucket_parts),
+    )
 
+    if partitions is None:
+        partitions = {_DEFAULT_TABLE_NAME: columns}
+    arms: list[str] = []
+    params: list[str | int] = []
+    for table_name, select_list in _partition_select_lists(
+        [_TS_COL, *columns],
+        partitions,
+    ):
+        source = table_name
+        params.extend(modifier_params)
+        table_columns = [
+            column for column in columns if column in partitions[table_name]
+        ]
+        if decoded_columns.intersection(table_columns):
+            source = _decoded_source(
+                table_name,
+                table_columns,
+                decoded_columns,
+                hour_where,
+                epoch_ts=False,
+            )
+            params.extend(hour_params)
+        params.extend(range_params)
+        arms.append(
+            f"""SELECT {select_list}, {modifier_sql} AS tz_modifier
+        FROM {source}
+        {where_clause}""",
+        )
+    source_sql = "\n        UNION ALL\n        ".join(arms)
 
-def _query_daily_aggregated_data_with_zoneinfo(
-    db_path: str,
+    query = f"""
+    SELECT
+        {','.join(select_parts)}
+    FROM (
+        {source_sql}
+    )
+    GROUP BY {group_by_expr}
+    ORDER BY {group_by_expr}
+    """
+    return query, params
+
+
+def _raw_epoch_aggregation_query(  # noqa: PLR0913
     parsed_fields: list[AggregationField],
-    prior_days: int,
-    timezone: ZoneInfo,
-) -> list[AggregatedRow]:
-    today = datetime.now(timezone).date()
-    start_date = today - timedelta(days=prior_days)
-    rows = _fetch_rows_for_zoneinfo_range(
-        db_path=db_path,
-        columns={column_name for _, column_name, _ in parsed_fields},
-        start_date=start_date,
-        end_date=today,
-        timezone=timezone,
+    timezone: str | ZoneInfo,
+    start_ts: str,
+    end_ts: str,
+    *,
+    by_hour: bool,
+    change_only: Collection[str] = (),
+) -> tuple[str, list[str | int]]:
+    """Build the raw aggregation query for a table storing epoch-ms ts values.
+
+    Each row is shifted into local time by adding its UTC offset and grouped
+    by integer division into local days or hours; the date and hour strings
+    are only formatted once per bucket.
+    """
+    offset_sql, offset_params = _epoch_offset_ms(timezone, start_ts, end_ts)
+    start_ms, end_ms = _epoch_ms(start_ts), _epoch_ms(end_ts)
+    where_clause, range_params = _half_open_range_clause(_TS_COL, start_ms, end_ms)
+    columns = sorted({column_name for _, column_name, _ in parsed_fields})
+    source = _DEFAULT_TABLE_NAME
+    source_params: list[str | int] = []
+    if set(change_only).intersection(columns):
+        hour_where, source_params = _half_open_range_clause(
+            _TS_COL,
+            start_ms // _MS_PER_HOUR * _MS_PER_HOUR,
+            end_ms,
+        )
+        source = _decoded_source(
+            _DEFAULT_TABLE_NAME,
+            columns,
+            change_only,
+            hour_where,
+            epoch_ts=True,
+        )
+
+    bucket_parts = [f"DATE(local_ms / {_MS_PER_DAY} * 86400, 'unixepoch') as date"]
+    group_by_parts = [f"local_ms / {_MS_PER_DAY}"]
+    if by_hour:
+        bucket_parts.append(f"printf('%02d', local_ms / {_MS_PER_HOUR} % 24) as hour")
+        group_by_parts.append(f"local_ms / {_MS_PER_HOUR} % 24")
+    group_by_expr = ", ".join(group_by_parts)
+
+    select_parts = _select_parts_from_parsed_fields(
+        parsed_fields=parsed_fields,
+        datetime_expression=", ".join(bucket_parts),
     )
-    rows_by_date: dict[str, list[sqlite3.Row]] = {}
 
-    for row in rows:
-        date_key = _parse_stored_timestamp(row[_TS_COL]).astimezone(timezone).date()
-        rows_by_date.setdefault(date_key.isoformat(), []).append(row)
+    query = f"""
+    SELECT
+        {','.join(select_parts)}
+    FROM (
+        SELECT {", ".join(columns)}, {_TS_COL} + {offset_sql} AS local_ms
+        FROM {source}
+        {where_clause}
+    )
+    GROUP BY {group_by_expr}
+    ORDER BY {group_by_expr}
+    """
+    return query, [*offset_params, *source_params, *range_params]
+
+
+def _hour_aligned_local_time(
+    timezone: str | ZoneInfo,
+) -> Callable[[datetime], datetime | None] | None:
+    """Return a function mapping a UTC hour start to its local start time.
+
+    Hourly rollups can only be regrouped into local hours and days when the
+    timezone sits a whole number of hours from UTC. Fixed offsets are checked
+    once and yield None when misaligned; ZoneInfo offsets are checked per hour
+    and the returned function yields None for a misaligned hour. "localtime"
+    is checked per hour like a ZoneInfo, using the system's offset at that
+    hour as SQLite's modifier does for each row.
+    """
+    if isinstance(timezone, ZoneInfo) or timezone == "localtime":
+        zone = timezone if isinstance(timezone, ZoneInfo) else None
 
-    result: list[AggregatedRow] = []
-    for date_key in sorted(rows_by_date):
-        row_result: AggregatedRow = {"date": date_key}
-        row_result.update(_aggregate_rows(rows_by_date[date_key], parsed_fields))
-        result.append(row_result)
+        def to_zone(utc_hour: datetime) -> datetime | None:
+            local_start = utc_hour.astimezone(zone)
+            offset = local_start.utcoffset()
+            if offset is None or offset % timedelta(hours=1):
+                return None
+            return local_start
 
+        return to_zone
+
+    offset_hours = _fixed_offset_hours(timezone)
+    if not offset_hours.is_integer():
+        return None
+    offset = timedelta(hours=offset_hours)
+    return lambda utc_hour: utc_hour + offset
+
+
+@lru_cache(maxsize=_BUCKET_BOUNDARY_CACHE_SIZE)
+def _local_bucket_boundaries(
+    timezone: str | ZoneInfo,
+    start_date: date,
+    end_date: date,
+    *,
+    by_hour: bool,
+    system_zone: tzinfo | None = None,  # noqa: ARG001
+) -> tuple[tuple[str, ...], tuple[tuple[str, int], ...]] | None:
+    """Precompute where each local day (or hour) in the date range begins in UTC.
+
+    Returns sorted UTC boundary strings in the stored timestamp format and the
+    (date, hour) bucket starting at each one, with hour 0 for daily buckets. A
+    stored ts falls in bucket_keys[bisect_right(boundaries, ts) - 1], so rows
+    are bucketed by string comparison alone. Returns None when a bucket does
+    not start on a UTC hour, i.e. when hourly rollups cannot be regrouped.
+
+    Cached per (timezone, range) because dashboards repeat the same windows.
+    system_zone is only part of the cache key: callers pass the current system
+    zone so "localtime" boundaries are recomputed when TZ changes.
+    """
+    to_local = _hour_aligned_local_time(timezone)
+    if to_local is None:
+        return None
+
+    utc_hour = _parse_stored_timestamp(_local_midnight_as_utc(start_date, timezone))
+    end = _parse_stored_timestamp(
+        _local_midnight_as_utc(end_date + timedelta(days=1), timezone),
+    )
+    boundaries: list[str] = []
+    bucket_keys: list[tuple[str, int]] = []
+    while utc_hour < end:
+        local_start = to_local(utc_hour)
+        if local_start is None:
+            return None
+        bucket_key = (
+            local_start.date().isoformat(),
+            local_start.hour if by_hour else 0,
+        )
+        if not bucket_keys or bucket_keys[-1] != bucket_key:
+            boundaries.append(utc_hour.strftime(_ROLLUP_HOUR_FORMAT))
+            bucket_keys.append(bucket_key)
+        utc_hour += timedelta(hours=1)
+    return tuple(boundaries), tuple(bucket_keys)
+
+
+@dataclass(slots=True)
+class _RunningAggregate:
+    """Count, sum, min and max of one column, merged from partial aggregates.
+
+    Partials arrive one rollup hour at a time, so a bucket's result is built
+    while the cursor streams and no source rows are retained.
+    """
+
+    count: int = 0
+    total: float = 0.0
+    minimum: float | None = None
+    maximum: float | None = None
+
+    def merge(
+        self,
+        count: int,
+        total: float | None,
+        minimum: float | None,
+        maximum: float | None,
+    ) -> None:
+        """Fold in the aggregate of another disjoint set of values."""
+        self.count += count
+        if total is not None:
+            self.total += total
+        if minimum is not None and (self.minimum is None or minimum < self.minimum):
+            self.minimum = minimum
+        if maximum is not None and (self.maximum is None or maximum > self.maximum):
+            self.maximum = maximum
+
+    def result(self, agg_func: str) -> float | None:
+        """Return the AVG, MAX, MIN or SUM of the values seen so far."""
+        if not self.count:
+            return None
+        match agg_func:
+            case "AVG":
+                return self.total / self.count
+            case "MAX":
+                return self.maximum
+            case "MIN":
+                return self.minimum
+            case "SUM":
+                return self.total
+            case _:
+                return None
+
+
+def _aggregated_row_from_running(
+    aggregates: dict[str, _RunningAggregate],
+    parsed_fields: list[AggregationField],
+) -> AggregatedRow:
+    result: AggregatedRow = {}
+
+    for agg_func, column_name, alias in parsed_fields:
+        aggregate = aggregates.get(column_name)
+        result[alias] = None if aggregate is None else aggregate.result(agg_func)
+
+    result["count"] = aggregates[_ROLLUP_ROW_COUNT_NAME].count
     return result
 
 
-def _query_hourly_aggregated_data_with_zoneinfo(
+def _query_rollup_buckets(  # noqa: PLR0913
     db_path: str,
     parsed_fields: list[AggregationField],
     start_date: date,
     end_date: date,
-    timezone: ZoneInfo,
-) -> HourlyAggregatedData:
-    rows = _fetch_rows_for_zoneinfo_range(
-        db_path=db_path,
-        columns={column_name for _, column_name, _ in parsed_fields},
-        start_date=start_date,
-        end_date=end_date,
-        timezone=timezone,
+    timezone: str | ZoneInfo,
+    *,
+    by_hour: bool,
+) -> dict[tuple[str, int], AggregatedRow] | None:
+    """Aggregate hourly rollups into local days, or local hours when by_hour.
+
+    Buckets are keyed by (date, hour), with hour 0 for every daily bucket.
+    Returns None when rollups cannot answer the query: the rollup table is
+    missing, a requested column does not exist, or the timezone is not aligned
+    to whole hours. Callers then fall back to the raw observations, which
+    refuse ranges reaching into compacted hours.
+    """
+    bucket_boundaries = _local_bucket_boundaries(
+        timezone,
+        start_date,
+        end_date,
+        by_hour=by_hour,
+        system_zone=datetime.now(UTC).astimezone().tzinfo,
+    )
+    if bucket_boundaries is None:
+        return None
+    boundaries, bucket_keys = bucket_boundaries
+
+    columns = {column_name for _, column_name, _ in parsed_fields}
+    names = [_ROLLUP_ROW_COUNT_NAME, *sorted(columns)]
+    range_clause, params = _half_open_range_clause(
+        "hour",
+        _local_midnight_as_utc(start_date, timezone),
+        _local_midnight_as_utc(end_date + timedelta(days=1), timezone),
+    )
+    query = (
+        "SELECT hour, name, count, total, minimum, maximum "
+        f"FROM {_ROLLUP_TABLE_NAME} {range_clause} "
+        f"AND name IN ({', '.join('?' for _ in names)})"
     )
-    rows_by_date_and_hour: dict[str, dict[int, list[sqlite3.Row]]] = {}
 
-    for row in rows:
-        local_dt = _parse_stored_timestamp(row[_TS_COL]).astimezone(timezone)
-        date_key = local_dt.date().isoformat()
-        hour_rows = rows_by_date_and_hour.setdefault(date_key, {})
-        hour_rows.setdefault(local_dt.hour, []).append(row)
+    aggregates_by_bucket: defaultdict[
+        tuple[str, int],
+        defaultdict[str, _RunningAggregate],
+    ] = defaultdict(lambda: defaultdict(_RunningAggregate))
+    with closing(_connect_database(db_path, read_only=True)) as conn:
+        if not _has_table(conn, _ROLLUP_TABLE_NAME):
+            return None
+        if not columns <= _existing_columns(conn):
+            return None
+        for hour, name, *partial in conn.execute(query, [*params, *names]):
+            bucket_key = bucket_keys[bisect_right(boundaries, hour) - 1]
+            aggregates_by_bucket[bucket_key][name].merge(*partial)
 
-    result: HourlyAggregatedData = {
-        date_key: _empty_hourly_slots()
-        for date_key in _date_keys_in_range(start_date, end_date)
+    return {
+        bucket_key: _aggregated_row_from_running(aggregates, parsed_fields)
+        for bucket_key, aggregates in aggregates_by_bucket.items()
     }
-    for date_key, hour_rows in rows_by_date_and_hour.items():
-        hours = result[date_key]
-        for hour, bucket_rows in hour_rows.items():
-            row_result: AggregatedRow = {
-                "date": date_key,
-                "hour": f"{hour:02d}",
-            }
-            row_result.update(_aggregate_rows(bucket_rows, parsed_fields))
-            hours[hour] = row_result
 
-    return result
+
+def _existing_columns(
+    conn: sqlite3.Connection,
+    table_name: str = _DEFAULT_TABLE_NAME,
+) -> set[str]:
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    existing_columns = {row[1] for row in cursor.fetchall()}  # row[1] is column name
+    cursor.close()
+    return existing_columns
 
 
 def _ensure_columns(
@@ -430,139 +901,1516 @@ def _ensure_columns(
     """
     added_columns = []
 
-    cursor = conn.cursor()
-
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    existing_columns = {row[1] for row in cursor.fetchall()}  # row[1] is column name
+    existing_columns = _existing_columns(conn, table_name)
 
     missing_columns = required_columns - existing_columns
 
+    cursor = conn.cursor()
+
     for column_name in missing_columns:
         valid_column_name = _column_name(column_name)
         cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {valid_column_name} REAL")
         added_columns.append(column_name)
 
     cursor.close()
+    if added_columns and _uses_epoch_ts(conn, table_name):
+        _create_text_view(conn, table_name)
     conn.commit()
 
     return added_columns
 
 
-def create_database_if_not_exists(
-    db_path: str,
+def _uses_epoch_ts(
+    conn: sqlite3.Connection,
     table_name: str = _DEFAULT_TABLE_NAME,
 ) -> bool:
-    """Check if a SQLite database exists at the specified path.
-    If not, create the database and a table with the given name.
+    """Return whether table stores ts as epoch milliseconds rather than text."""
+    for _, column_name, column_type, *_ in conn.execute(
+        f"PRAGMA table_info({table_name})",
+    ):
+        if column_name == _TS_COL:
+            return column_type.upper() == _EPOCH_TS_TYPE
+    return False
 
-    Args:
-        db_path (str): Path to the SQLite database file
-        table_name (str): Name of the table to create
 
-    Returns:
-        bool: True if database was created, False if it already existed
+def _epoch_table_sql(
+    table_name: str,
+    value_columns: Iterable[tuple[str, str]] = (),
+) -> str:
+    """Build the WITHOUT ROWID table keyed by epoch-ms ts, given (name, type)s."""
+    column_definitions = [
+        (
+            f"{_TS_COL} {_EPOCH_TS_TYPE} PRIMARY KEY NOT NULL "
+            f"DEFAULT ({_SQLITE_EPOCH_TS_DEFAULT})"
+        ),
+        *(f"{name} {column_type}".rstrip() for name, column_type in value_columns),
+    ]
+    return f"CREATE TABLE {table_name} ({', '.join(column_definitions)}) WITHOUT ROWID"
 
-    """
-    if Path(db_path).exists():
-        _ensure_unique_ts_index(db_path, table_name)
-        return False
 
-    with closing(_connect_database(db_path, read_only=False)) as conn:
-        cursor = conn.cursor()
+def _text_view_name(table_name: str = _DEFAULT_TABLE_NAME) -> str:
+    """Return the view exposing an epoch-ms table with the text ts column."""
+    return f"{table_name}_text"
 
-        table_schema = f"""
-            CREATE TABLE {table_name} (
-                {_TS_COL} TIMESTAMP DEFAULT ({_SQLITE_TS_DEFAULT})
-            )
-        """
 
-        cursor.execute(table_schema)
-        cursor.execute(_unique_ts_index_sql(table_name))
-        conn.commit()
+def _create_text_view(
+    conn: sqlite3.Connection,
+    table_name: str = _DEFAULT_TABLE_NAME,
+) -> None:
+    """Create or replace the text view of an epoch-ms table.
 
-        print(f"Database created with table '{table_name}' at: {db_path}")
-        return True
+    The view names the table's columns explicitly so Datasette and other SQL
+    clients see ts in the text format, which means it is rebuilt whenever a
+    column is added.
+    """
+    columns = [
+        f"{_SQLITE_EPOCH_TS_TEXT} AS {_TS_COL}"
+        if column_name == _TS_COL
+        else column_name
+        for _, column_name, *_ in conn.execute(f"PRAGMA table_info({table_name})")
+    ]
+    view_name = _text_view_name(table_name)
+    conn.execute(f"DROP VIEW IF EXISTS {view_name}")
+    conn.execute(
+        f"CREATE VIEW {view_name} AS SELECT {', '.join(columns)} FROM {table_name}",
+    )
 
 
-def _insert_dict_row(
-    conn: sqlite3.Connection,
+def _with_epoch_ts(
+    rows: list[dict[str, str | int | float | None]],
+) -> list[dict[str, str | int | float | None]]:
+    return [{**row, _TS_COL: _epoch_ms(str(row[_TS_COL]))} for row in rows]
+
+
+def _text_table_sql(
     table_name: str,
-    data_dict: Observation,
-) -> int | None:
-    """Alternative version that takes an existing connection.
+    value_columns: Iterable[tuple[str, str]] = (),
+) -> str:
+    """Build a table keyed by a text ts, given (name, type) value columns."""
+    column_definitions = [
+        f"{_TS_COL} TIMESTAMP DEFAULT ({_SQLITE_TS_DEFAULT})",
+        *(f"{name} {column_type}".rstrip() for name, column_type in value_columns),
+    ]
+    return f"CREATE TABLE {table_name} ({', '.join(column_definitions)})"
 
-    Args:
-        conn (sqlite3.Connection): Existing database connection
-        table_name (str): Name of the table to insert into
-        data_dict (dict): Dictionary where keys are column names and values are the data
 
-    Returns:
-        int: The rowid of the inserted row
+def _is_partitioned(conn: sqlite3.Connection) -> bool:
+    """Return whether observations is a view over monthly partition tables."""
+    return _has_table(conn, _PARTITION_REGISTRY_NAME)
 
+
+def _partition_month(ts: str) -> str:
+    """Return the YYYY-MM partition holding a stored text ts.
+
+    The month is the ts's own prefix rather than its parsed value, so a
+    partition holds exactly the ts strings in [month, _partition_end(month))
+    and range filters on the text column can be routed by comparing months.
     """
-    if not data_dict:
-        raise UnexpectedEmptyDictionaryError
+    month = ts[:7]
+    if not _PARTITION_MONTH_PATTERN.fullmatch(month):
+        raise InvalidDateError(ts)
+    return month
 
-    cursor = conn.cursor()
 
-    columns = [_column_name(c) for c in list(data_dict.keys())]
-    values = list(data_dict.values())
+def _partition_end(month: str) -> str:
+    """Return the smallest string sorting after every ts in month's partition."""
+    return month[:-1] + chr(ord(month[-1]) + 1)
 
-    placeholders = ", ".join(["?" for _ in values])
-    columns_str = ", ".join(columns)
 
-    query = (
-        f"INSERT OR IGNORE INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-    )
-    cursor.execute(query, values)
-    conn.commit()
-    if cursor.rowcount <= 0:
-        _logger.debug(
-            "Ignored insert into %s because the row already exists",
-            table_name,
-        )
-        return None
-    return cursor.lastrowid
+def _partition_table_name(month: str) -> str:
+    return f"{_DEFAULT_TABLE_NAME}_{month.replace('-', '_')}"
 
 
-def _has_unique_ts_index(
+def _partition_months(
     conn: sqlite3.Connection,
-    table_name: str,
-) -> bool:
-    cursor = conn.cursor()
-    cursor.execute(f"PRAGMA index_list({table_name})")
-    for _, index_name, is_unique, *_ in cursor.fetchall():
-        if not is_unique:
-            continue
-        cursor.execute(f"PRAGMA index_info({index_name})")
-        indexed_columns = [row[2] for row in cursor.fetchall()]
-        if indexed_columns == [_TS_COL]:
-            return True
-    return False
+    start_ts: str | None = None,
+    end_ts: str | None = None,
+) -> list[str]:
+    """Return the partitions that can hold a ts in [start_ts, end_ts), oldest first.
+
+    None bounds leave that side of the range open.
+    """
+    return [
+        month
+        for (month,) in conn.execute(
+            f"SELECT month FROM {_PARTITION_REGISTRY_NAME} ORDER BY month",
+        )
+        if (start_ts is None or _partition_end(month) > start_ts)
+        and (end_ts is None or month < end_ts)
+    ]
 
 
-def _deduplicate_timestamps(
+def _partition_columns(
     conn: sqlite3.Connection,
-    table_name: str,
-) -> int:
-    cursor = conn.cursor()
-    cursor.execute(f"PRAGMA table_info({table_name})")
-    columns = [row[1] for row in cursor.fetchall()]
-    value_columns = [column for column in columns if column != _TS_COL]
+    start_ts: str | None = None,
+    end_ts: str | None = None,
+) -> dict[str, set[str]]:
+    """Map each partition table overlapping [start_ts, end_ts) to its columns."""
+    return {
+        table_name: _existing_columns(conn, table_name)
+        for table_name in map(
+            _partition_table_name,
+            _partition_months(conn, start_ts, end_ts),
+        )
+    }
 
-    cursor.execute(
-        f"SELECT {_TS_COL} FROM {table_name} "
-        f"WHERE {_TS_COL} IS NOT NULL "
-        f"GROUP BY {_TS_COL} HAVING COUNT(*) > 1",
-    )
-    duplicate_timestamps = [row[0] for row in cursor.fetchall()]
 
-    if not duplicate_timestamps:
-        return 0
+def _partition_select_lists(
+    columns: list[str],
+    partitions: Mapping[str, Collection[str]],
+) -> list[tuple[str, str]]:
+    """Return (table, select list) pairs reading columns from every partition.
 
-    removed_rows = 0
-    selected_columns = ", ".join([_TS_COL, *value_columns])
-    assignments = ", ".join(f"{column} = ?" for column in [_TS_COL, *value_columns])
+    A column a partition lacks is selected as NULL, unless no partition has
+    it, so an unknown column fails the same way it does against one table.
+    """
+    known_columns = set().union(*partitions.values())
+    return [
+        (
+            table_name,
+            ", ".join(
+                column
+                if column in table_columns or column not in known_columns
+                else f"NULL AS {column}"
+                for column in columns
+            ),
+        )
+        for table_name, table_columns in partitions.items()
+    ]
+
+
+def _create_partition_view(conn: sqlite3.Connection) -> None:
+    """Create or replace the observations view over every partition.
+
+    The view is a UNION ALL of the partitions, oldest first, over the union
+    of their columns, so it is rebuilt whenever a partition or column is
+    added. SQLite pushes ts filters into each arm of the view, where the
+    partition's UNIQUE ts index serves them.
+    """
+    partitions = {
+        table_name: [
+            column_name
+            for _, column_name, *_ in conn.execute(f"PRAGMA table_info({table_name})")
+        ]
+        for table_name in map(_partition_table_name, _partition_months(conn))
+    }
+    columns = list(dict.fromkeys(itertools.chain.from_iterable(partitions.values())))
+    if partitions:
+        select_sql = " UNION ALL ".join(
+            f"SELECT {select_list} FROM {table_name}"
+            for table_name, select_list in _partition_select_lists(columns, partitions)
+        )
+    else:
+        select_sql = f"SELECT CAST(NULL AS TIMESTAMP) AS {_TS_COL} WHERE 0"
+    conn.execute(f"DROP VIEW IF EXISTS {_DEFAULT_TABLE_NAME}")
+    conn.execute(f"CREATE VIEW {_DEFAULT_TABLE_NAME} AS {select_sql}")
+
+
+def _ensure_partition(
+    conn: sqlite3.Connection,
+    month: str,
+    value_columns: Iterable[str],
+    known_columns: dict[str, set[str]],
+) -> str:
+    """Create month's partition or add the value columns it lacks.
+
+    known_columns caches the columns of each partition table and is updated in
+    place. The observations view is rebuilt when the schema changes.
+
+    Returns:
+        The partition's table name.
+
+    """
+    table_name = _partition_table_name(month)
+    existing_columns = known_columns.get(table_name)
+    if existing_columns is None:
+        existing_columns = _existing_columns(conn, table_name)
+        known_columns[table_name] = existing_columns
+    missing_columns = set(value_columns) - existing_columns - {_TS_COL}
+    if existing_columns and not missing_columns:
+        return table_name
+
+    if existing_columns:
+        for column_name in sorted(missing_columns):
+            conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} REAL")
+    else:
+        conn.execute(
+            _text_table_sql(
+                table_name,
+                ((column_name, "REAL") for column_name in sorted(missing_columns)),
+            ),
+        )
+        conn.execute(_unique_ts_index_sql(table_name))
+        conn.execute(
+            f"INSERT INTO {_PARTITION_REGISTRY_NAME} (month) VALUES (?)",
+            (month,),
+        )
+        existing_columns.add(_TS_COL)
+    existing_columns.update(missing_columns)
+    _create_partition_view(conn)
+    return table_name
+
+
+def _record_partition_rows(
+    conn: sqlite3.Connection,
+    month: str,
+    inserted_rows: int,
+    timestamps: list[str],
+) -> None:
+    """Add inserted rows to month's registry entry and widen its ts bounds.
+
+    Rows ignored as duplicates already hold their ts, so widening the bounds
+    by every attempted ts keeps them exact.
+    """
+    earliest_ts, latest_ts = min(timestamps), max(timestamps)
+    conn.execute(
+        f"UPDATE {_PARTITION_REGISTRY_NAME} SET "
+        "row_count = row_count + ?, "
+        "earliest_ts = MIN(COALESCE(earliest_ts, ?), ?), "
+        "latest_ts = MAX(COALESCE(latest_ts, ?), ?) "
+        "WHERE month = ?",
+        (inserted_rows, earliest_ts, earliest_ts, latest_ts, latest_ts, month),
+    )
+
+
+def _insert_partitioned_rows(
+    conn: sqlite3.Connection,
+    rows: list[dict[str, str | int | float | None]],
+    known_columns: dict[str, set[str]],
+) -> int:
+    """Insert prepared rows into their monthly partitions.
+
+    Partitions and columns are created as needed and the registry's counts and
+    bounds are kept in step. The caller owns the transaction.
+
+    Returns:
+        The number of rows inserted.
+
+    """
+    rows_by_month: dict[str, list[dict[str, str | int | float | None]]] = {}
+    for row in rows:
+        rows_by_month.setdefault(_partition_month(str(row[_TS_COL])), []).append(row)
+
+    inserted_rows = 0
+    for month, month_rows in rows_by_month.items():
+        table_name = _ensure_partition(
+            conn,
+            month,
+            {_column_name(key) for row in month_rows for key in row},
+            known_columns,
+        )
+        month_inserted = _insert_rows(conn, table_name, month_rows)
+        _record_partition_rows(
+            conn,
+            month,
+            month_inserted,
+            [str(row[_TS_COL]) for row in month_rows],
+        )
+        inserted_rows += month_inserted
+    return inserted_rows
+
+
+_CHANGE_ONLY_REGISTRY_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {_CHANGE_ONLY_REGISTRY_NAME} (
+        name TEXT PRIMARY KEY
+    ) WITHOUT ROWID
+"""
+
+
+# The stored ts of each change-only NULL that is a missing reading rather than
+# a repeat of the row before it
+_CHANGE_ONLY_NULLS_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {_CHANGE_ONLY_NULLS_NAME} (
+        name TEXT NOT NULL,
+        {_TS_COL} NOT NULL,
+        PRIMARY KEY (name, {_TS_COL})
+    ) WITHOUT ROWID
+"""
+
+
+def _change_only_columns(conn: sqlite3.Connection) -> set[str]:
+    """Return the columns stored as NULL when unchanged from the previous row."""
+    if not _has_table(conn, _CHANGE_ONLY_REGISTRY_NAME):
+        return set()
+    return {
+        name
+        for (name,) in conn.execute(f"SELECT name FROM {_CHANGE_ONLY_REGISTRY_NAME}")
+    }
+
+
+def _utc_hour_sql(*, epoch_ts: bool) -> str:
+    """Return the SQL grouping rows by the UTC hour of their ts."""
+    if epoch_ts:
+        return f"{_TS_COL} / {_MS_PER_HOUR}"
+    return f"strftime('{_ROLLUP_HOUR_FORMAT}', {_TS_COL})"
+
+
+def _utc_hour(ts: ObservationValue, *, epoch_ts: bool) -> str | int | None:
+    """Return the UTC hour of a stored ts, matching _utc_hour_sql's grouping."""
+    if epoch_ts:
+        return None if ts is None else int(ts) // _MS_PER_HOUR
+    try:
+        return _rollup_hour(str(ts))
+    except ValueError:
+        return None
+
+
+def _decoded_source(
+    table_name: str,
+    columns: Iterable[str],
+    change_only: Collection[str],
+    where_clause: str,
+    *,
+    epoch_ts: bool,
+) -> str:
+    """Build a subquery of ts and columns with change-only NULLs carried forward.
+
+    A NULL in a change-only column stands for the value of the row before it
+    in the same UTC hour, unless the nulls table records it as missing. Each
+    row counts the values and missing readings up to it in its hour, and the
+    rows sharing a count take the value that started the run, or NULL when a
+    missing reading did. Rows before the first value of their hour stay NULL,
+    so where_clause, which is applied to table_name, must select whole hours.
+    """
+    value_columns = [column for column in columns if column != _TS_COL]
+    decoded_columns = [column for column in value_columns if column in change_only]
+    hour_sql = _utc_hour_sql(epoch_ts=epoch_ts)
+    inner_parts = [
+        _TS_COL,
+        *value_columns,
+        f"{hour_sql} AS change_hour",
+        *(
+            f"SUM({column} IS NOT NULL OR {_TS_COL} IN ("
+            f"SELECT {_TS_COL} FROM {_CHANGE_ONLY_NULLS_NAME} "
+            f"WHERE name = '{column}')) OVER hour_rows AS {column}__run"
+            for column in decoded_columns
+        ),
+    ]
+    outer_parts = [
+        _TS_COL,
+        *(
+            f"MAX({column}) OVER (PARTITION BY change_hour, {column}__run) AS {column}"
+            if column in decoded_columns
+            else column
+            for column in value_columns
+        ),
+    ]
+    return (
+        f"(SELECT {', '.join(outer_parts)} FROM ("
+        f"SELECT {', '.join(inner_parts)} FROM {table_name} {where_clause} "
+        f"WINDOW hour_rows AS (PARTITION BY {hour_sql} ORDER BY {_TS_COL})))"
+    )
+
+
+def _materialize_change_only(  # noqa: PLR0913
+    conn: sqlite3.Connection,
+    table_name: str,
+    columns: Collection[str],
+    start: str | int | None = None,
+    end: str | int | None = None,
+    *,
+    epoch_ts: bool,
+) -> None:
+    """Replace change-only NULLs in [start, end) with the values they stand for.
+
+    The range must cover whole UTC hours. The caller owns the transaction.
+    """
+    columns = sorted(set(columns) & _existing_columns(conn, table_name))
+    if not columns:
+        return
+    where_clause, params = _half_open_range_clause(_TS_COL, start, end)
+    assignments = [f"{column} = decoded.{column}" for column in columns]
+    null_checks = [f"{table_name}.{column} IS NULL" for column in columns]
+    source = _decoded_source(
+        table_name,
+        columns,
+        columns,
+        where_clause,
+        epoch_ts=epoch_ts,
+    )
+    conn.execute(
+        f"UPDATE {table_name} SET {', '.join(assignments)} "
+        f"FROM {source} AS decoded "
+        f"WHERE {table_name}.{_TS_COL} = decoded.{_TS_COL} "
+        f"AND ({' OR '.join(null_checks)})",
+        params,
+    )
+
+
+def _mark_missing_values(  # noqa: PLR0913
+    conn: sqlite3.Connection,
+    table_name: str,
+    columns: Collection[str],
+    start: str | int | None = None,
+    end: str | int | None = None,
+    *,
+    epoch_ts: bool,
+) -> None:
+    """Record change-only NULLs in [start, end) that follow a value as missing.
+
+    The range must cover whole UTC hours whose values are stored in full, as
+    after materializing them or storing rows as given. A NULL following
+    another NULL in its hour already reads as missing, so only the first of
+    a run is recorded. The caller owns the transaction.
+    """
+    where_clause, params = _half_open_range_clause(_TS_COL, start, end)
+    hour_sql = _utc_hour_sql(epoch_ts=epoch_ts)
+    for column in sorted(set(columns) & _existing_columns(conn, table_name)):
+        conn.execute(
+            f"INSERT OR IGNORE INTO {_CHANGE_ONLY_NULLS_NAME} (name, {_TS_COL}) "
+            f"SELECT ?, {_TS_COL} FROM ("
+            f"SELECT {_TS_COL}, {column}, LAG({column}) OVER ("
+            f"PARTITION BY {hour_sql} ORDER BY {_TS_COL}) AS previous "
+            f"FROM {table_name} {where_clause}) "
+            f"WHERE {column} IS NULL AND previous IS NOT NULL",
+            [column, *params],
+        )
+
+
+def _hour_ranges(
+    conn: sqlite3.Connection,
+    hours: Iterable[str],
+    *,
+    epoch_ts: bool,
+) -> Iterator[tuple[str, str | int, str | int]]:
+    """Yield the table and stored ts range of each UTC hour.
+
+    Partitioned hours are read from their month's table, and hours whose
+    month has no table are skipped.
+    """
+    partitioned = _is_partitioned(conn)
+    for hour in sorted(hours):
+        table_name = _DEFAULT_TABLE_NAME
+        if partitioned:
+            table_name = _partition_table_name(_partition_month(hour))
+            if not _has_table(conn, table_name):
+                continue
+        start, end = hour, _next_rollup_hour(hour)
+        if epoch_ts:
+            yield table_name, _epoch_ms(start), _epoch_ms(end)
+        else:
+            yield table_name, start, end
+
+
+def _materialize_hours(
+    conn: sqlite3.Connection,
+    hours: Iterable[str],
+    change_only: Collection[str],
+    *,
+    epoch_ts: bool,
+) -> None:
+    """Materialize change-only values in UTC hours that rows are inserted into.
+
+    A row inserted before others in its hour would otherwise become the
+    previous row their NULLs stand for. Once the rows are stored,
+    _mark_missing_hours records the NULLs among them.
+    """
+    for table_name, start, end in _hour_ranges(conn, hours, epoch_ts=epoch_ts):
+        _materialize_change_only(
+            conn,
+            table_name,
+            change_only,
+            start,
+            end,
+            epoch_ts=epoch_ts,
+        )
+
+
+def _mark_missing_hours(
+    conn: sqlite3.Connection,
+    hours: Iterable[str],
+    change_only: Collection[str],
+    *,
+    epoch_ts: bool,
+) -> None:
+    """Record the missing change-only values of materialized UTC hours."""
+    for table_name, start, end in _hour_ranges(conn, hours, epoch_ts=epoch_ts):
+        _mark_missing_values(
+            conn,
+            table_name,
+            change_only,
+            start,
+            end,
+            epoch_ts=epoch_ts,
+        )
+
+
+def _record_missing_values(
+    conn: sqlite3.Connection,
+    missing: Iterable[tuple[str, str | int]],
+) -> None:
+    """Record (column, stored ts) pairs whose change-only NULL is missing."""
+    conn.executemany(
+        f"INSERT OR IGNORE INTO {_CHANGE_ONLY_NULLS_NAME} (name, {_TS_COL}) "
+        "VALUES (?, ?)",
+        missing,
+    )
+
+
+def _set_change_only_columns(
+    conn: sqlite3.Connection,
+    columns: Iterable[str],
+) -> None:
+    """Record which columns are stored change-only.
+
+    Columns dropped from the set have their NULLs materialized first, so
+    their stored values keep reading the same, and their missing records
+    are deleted. NULLs already stored in added columns are recorded as
+    missing. The caller owns the transaction.
+    """
+    requested = {_column_name(column) for column in columns}
+    current = _change_only_columns(conn)
+    if requested or current:
+        conn.execute(_CHANGE_ONLY_REGISTRY_SQL)
+        conn.execute(_CHANGE_ONLY_NULLS_SQL)
+    if requested == current:
+        return
+    removed, added = current - requested, requested - current
+    table_names = (
+        [_partition_table_name(month) for month in _partition_months(conn)]
+        if _is_partitioned(conn)
+        else [_DEFAULT_TABLE_NAME]
+    )
+    epoch_ts = _uses_epoch_ts(conn)
+    for table_name in table_names:
+        if removed:
+            _materialize_change_only(conn, table_name, removed, epoch_ts=epoch_ts)
+        if added:
+            _mark_missing_values(conn, table_name, added, epoch_ts=epoch_ts)
+    conn.executemany(
+        f"DELETE FROM {_CHANGE_ONLY_NULLS_NAME} WHERE name = ?",
+        [(column,) for column in sorted(removed)],
+    )
+    conn.executemany(
+        f"DELETE FROM {_CHANGE_ONLY_REGISTRY_NAME} WHERE name = ?",
+        [(column,) for column in sorted(removed)],
+    )
+    conn.executemany(
+        f"INSERT INTO {_CHANGE_ONLY_REGISTRY_NAME} (name) VALUES (?)",
+        [(column,) for column in sorted(added)],
+    )
+
+
+def create_database_if_not_exists(
+    db_path: str,
+    table_name: str = _DEFAULT_TABLE_NAME,
+    *,
+    epoch_ts: bool = False,
+    monthly_partitions: bool = False,
+    change_only_columns: Iterable[str] = (),
+) -> bool:
+    """Check if a SQLite database exists at the specified path.
+    If not, create the database and a table with the given name.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        table_name (str): Name of the table to create
+        epoch_ts (bool): Store ts as integer epoch milliseconds in a WITHOUT
+            ROWID table, with a view exposing it as text, instead of as text
+        monthly_partitions (bool): Store observations in one table per month
+            behind a view with the table's name. Requires text ts storage
+        change_only_columns (Iterable[str]): Columns to store as NULL while
+            their value repeats the previous row's. Also applied to an
+            existing database, materializing columns no longer listed
+
+    Returns:
+        bool: True if database was created, False if it already existed
+
+    """
+    if epoch_ts and monthly_partitions:
+        msg = "Monthly partitions require text timestamps"
+        raise ValueError(msg)
+    if Path(db_path).exists():
+        _ensure_unique_ts_index(db_path, table_name)
+        if table_name == _DEFAULT_TABLE_NAME:
+            with closing(_connect_database(db_path, read_only=False)) as conn, conn:
+                conn.execute("BEGIN")
+                _ensure_stats(conn)
+                _set_change_only_columns(conn, change_only_columns)
+        return False
+
+    with closing(_connect_database(db_path, read_only=False)) as conn:
+        cursor = conn.cursor()
+
+        if epoch_ts:
+            cursor.execute(_epoch_table_sql(table_name))
+            _create_text_view(conn, table_name)
+        elif monthly_partitions:
+            cursor.execute(_PARTITION_REGISTRY_SQL)
+            _create_partition_view(conn)
+        else:
+            cursor.execute(_text_table_sql(table_name))
+            cursor.execute(_unique_ts_index_sql(table_name))
+        cursor.execute(_ROLLUP_TABLE_SQL)
+        if table_name == _DEFAULT_TABLE_NAME:
+            _rebuild_stats(conn)
+            _set_change_only_columns(conn, change_only_columns)
+        conn.commit()
+
+        print(f"Database created with table '{table_name}' at: {db_path}")
+        return True
+
+
+_ROLLUP_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {_ROLLUP_TABLE_NAME} (
+        hour TEXT NOT NULL,
+        name TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        total REAL,
+        minimum REAL,
+        maximum REAL,
+        PRIMARY KEY (hour, name)
+    ) WITHOUT ROWID
+"""
+
+
+_PARTITION_REGISTRY_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {_PARTITION_REGISTRY_NAME} (
+        month TEXT PRIMARY KEY,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        earliest_ts TEXT,
+        latest_ts TEXT
+    ) WITHOUT ROWID
+"""
+
+
+_DOWNSAMPLED_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {_DOWNSAMPLED_TABLE_NAME} (
+        {_TS_COL} TEXT PRIMARY KEY NOT NULL,
+        sample_count INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+
+
+def _has_table(conn: sqlite3.Connection, table_name: str) -> bool:
+    cursor = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table_name,),
+    )
+    return cursor.fetchone() is not None
+
+
+_STATS_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {_STATS_TABLE_NAME} (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        row_count INTEGER NOT NULL,
+        earliest_ts TEXT,
+        latest_ts TEXT,
+        column_count INTEGER NOT NULL
+    )
+"""
+
+
+def _observation_bounds(conn: sqlite3.Connection) -> tuple[str | None, str | None]:
+    """Return the earliest and latest ts as text, read from the ends of its index.
+
+    A partitioned database answers from its registry instead.
+    """
+    if _is_partitioned(conn):
+        earliest, latest = conn.execute(
+            f"SELECT MIN(earliest_ts), MAX(latest_ts) FROM {_PARTITION_REGISTRY_NAME}",
+        ).fetchone()
+        return earliest, latest
+    # Separate subqueries, since SQLite only reads MIN or MAX from an index
+    # when it is the sole aggregate
+    earliest, latest = conn.execute(
+        f"SELECT (SELECT MIN({_TS_COL}) FROM {_DEFAULT_TABLE_NAME}), "
+        f"(SELECT MAX({_TS_COL}) FROM {_DEFAULT_TABLE_NAME})",
+    ).fetchone()
+    if _uses_epoch_ts(conn) and earliest is not None:
+        return _format_epoch_ms(earliest), _format_epoch_ms(latest)
+    return earliest, latest
+
+
+def _count_stats(conn: sqlite3.Connection) -> tuple[int, str | None, str | None, int]:
+    """Compute the row count, ts bounds and column count of observations.
+
+    The row count scans the whole ts index unless the database is partitioned.
+    """
+    if _is_partitioned(conn):
+        (row_count,) = conn.execute(
+            f"SELECT COALESCE(SUM(row_count), 0) FROM {_PARTITION_REGISTRY_NAME}",
+        ).fetchone()
+    else:
+        (row_count,) = conn.execute(
+            f"SELECT COUNT(*) FROM {_DEFAULT_TABLE_NAME}",
+        ).fetchone()
+    earliest_ts, latest_ts = _observation_bounds(conn)
+    column_count = len(_existing_columns(conn))
+    return row_count, earliest_ts, latest_ts, column_count
+
+
+def _rebuild_stats(conn: sqlite3.Connection) -> None:
+    """Create the stats table if needed and recount observations into it."""
+    conn.execute(_STATS_TABLE_SQL)
+    conn.execute(
+        f"INSERT OR REPLACE INTO {_STATS_TABLE_NAME} "
+        "(id, row_count, earliest_ts, latest_ts, column_count) "
+        "VALUES (0, ?, ?, ?, ?)",
+        _count_stats(conn),
+    )
+
+
+def _ensure_stats(conn: sqlite3.Connection) -> None:
+    """Build the stats table for databases created before it existed."""
+    if not _has_table(conn, _STATS_TABLE_NAME):
+        _rebuild_stats(conn)
+
+
+def _record_inserted_rows(
+    conn: sqlite3.Connection,
+    inserted_rows: int,
+    stored_ts: Iterable[str | int | float | None],
+    column_count: int,
+    *,
+    epoch_ts: bool,
+) -> None:
+    """Add inserted rows to the stats and widen its ts bounds to stored_ts.
+
+    stored_ts may include rows ignored as duplicates, since each shares its ts
+    with a row already inside the bounds.
+    """
+    timestamps = [ts for ts in stored_ts if ts is not None]
+    earliest = latest = None
+    if timestamps:
+        earliest, latest = min(timestamps), max(timestamps)
+        if epoch_ts:
+            earliest, latest = _format_epoch_ms(earliest), _format_epoch_ms(latest)
+    conn.execute(
+        f"UPDATE {_STATS_TABLE_NAME} SET row_count = row_count + ?, "
+        "earliest_ts = COALESCE(MIN(earliest_ts, ?), earliest_ts, ?), "
+        "latest_ts = COALESCE(MAX(latest_ts, ?), latest_ts, ?), column_count = ?",
+        (inserted_rows, earliest, earliest, latest, latest, column_count),
+    )
+
+
+def _record_deleted_rows(conn: sqlite3.Connection, deleted_rows: int) -> None:
+    """Subtract deleted rows from the stats and reread its ts bounds."""
+    earliest_ts, latest_ts = _observation_bounds(conn)
+    conn.execute(
+        f"UPDATE {_STATS_TABLE_NAME} SET row_count = row_count - ?, "
+        "earliest_ts = ?, latest_ts = ?",
+        (deleted_rows, earliest_ts, latest_ts),
+    )
+
+
+def _half_open_range_clause(
+    column: str,
+    start: str | int | None,
+    end: str | int | None,
+) -> tuple[str, list[str | int]]:
+    """Build a WHERE clause for start <= column < end, skipping None bounds."""
+    conditions: list[str] = []
+    params: list[str | int] = []
+    if start is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append(f"{column} < ?")
+        params.append(end)
+    if not conditions:
+        return "", params
+    return f"WHERE {' AND '.join(conditions)}", params
+
+
+def _rollup_hour(ts: str) -> str:
+    return _parse_stored_timestamp(ts).strftime(_ROLLUP_HOUR_FORMAT)
+
+
+def _next_rollup_hour(hour: str) -> str:
+    next_hour = datetime.fromisoformat(hour) + timedelta(hours=1)
+    return next_hour.strftime(_ROLLUP_HOUR_FORMAT)
+
+
+def _refresh_rollups(
+    conn: sqlite3.Connection,
+    value_columns: Iterable[str],
+    start_hour: str | None = None,
+    end_hour: str | None = None,
+    *,
+    epoch_ts: bool = False,
+) -> int:
+    """Recompute hourly rollups for UTC hours in [start_hour, end_hour).
+
+    Each hour gets one row named _ROLLUP_ROW_COUNT_NAME holding COUNT(*) and one
+    row per column with non-null values holding its count, sum, min and max.
+    Hours are rebuilt from the raw rows rather than adjusted in place, so
+    duplicate and late inserts cannot skew them. A None bound leaves that side
+    of the range open. Hours whose raw rows retention has compacted away are
+    never rebuilt. With epoch_ts, rows are grouped by integer division of
+    their epoch-ms ts and each hour is formatted once. Change-only columns
+    are aggregated over the values their NULLs stand for. The caller owns the
+    transaction.
+
+    Returns:
+        The number of hours written.
+
+    """
+    compacted_before = _compacted_before(conn)
+    if compacted_before is not None and (
+        start_hour is None or start_hour < compacted_before
+    ):
+        start_hour = compacted_before
+        if end_hour is not None and end_hour <= start_hour:
+            return 0
+    columns = sorted(set(value_columns) - {_TS_COL})
+    hour_where, params = _half_open_range_clause("hour", start_hour, end_hour)
+    if epoch_ts:
+        ts_where, ts_params = _half_open_range_clause(
+            _TS_COL,
+            None if start_hour is None else _epoch_ms(start_hour),
+            None if end_hour is None else _epoch_ms(end_hour),
+        )
+    else:
+        ts_where, ts_params = _half_open_range_clause(_TS_COL, start_hour, end_hour)
+    rollup_hour_sql = _utc_hour_sql(epoch_ts=epoch_ts)
+    source = f"{_DEFAULT_TABLE_NAME} {ts_where}"
+    change_only = _change_only_columns(conn).intersection(columns)
+    if change_only:
+        source = _decoded_source(
+            _DEFAULT_TABLE_NAME,
+            columns,
+            change_only,
+            ts_where,
+            epoch_ts=epoch_ts,
+        )
+
+    select_parts = [f"{rollup_hour_sql} AS rollup_hour", "COUNT(*)"]
+    select_parts.extend(
+        f"COUNT({column}), SUM({column}), MIN({column}), MAX({column})"
+        for column in columns
+    )
+
+    conn.execute(f"DELETE FROM {_ROLLUP_TABLE_NAME} {hour_where}", params)
+    cursor = conn.execute(
+        f"SELECT {', '.join(select_parts)} FROM {source} GROUP BY rollup_hour",
+        ts_params,
+    )
+    rollup_rows: list[tuple[str, str, int, float | None, float | None, float | None]]
+    rollup_rows = []
+    hours_written = 0
+    for record in cursor:
+        hour = record[0]
+        if hour is None:
+            continue
+        if epoch_ts:
+            hour = (_UNIX_EPOCH + timedelta(hours=hour)).strftime(_ROLLUP_HOUR_FORMAT)
+        rollup_rows.append((hour, _ROLLUP_ROW_COUNT_NAME, record[1], None, None, None))
+        for index, column in enumerate(columns):
+            count, total, minimum, maximum = record[2 + index * 4 : 6 + index * 4]
+            if count:
+                rollup_rows.append((hour, column, count, total, minimum, maximum))
+        hours_written += 1
+    conn.executemany(
+        f"INSERT INTO {_ROLLUP_TABLE_NAME} "
+        "(hour, name, count, total, minimum, maximum) VALUES (?, ?, ?, ?, ?, ?)",
+        rollup_rows,
+    )
+    return hours_written
+
+
+def _merge_into_rollups(
+    conn: sqlite3.Connection,
+    rows: Iterable[Mapping[str, ObservationValue]],
+) -> bool:
+    """Add newly inserted rows to the rollups of their UTC hours in place.
+
+    Each hour's partial count, sum, min and max are folded into its existing
+    rollup rows, so no raw rows are read. Only valid when every row was
+    inserted, since an ignored duplicate would be counted twice, and with
+    values as change-only columns read them. Hours whose raw rows retention
+    has compacted away are left alone, as _refresh_rollups leaves them. The
+    caller owns the transaction.
+
+    Returns:
+        False, with nothing written, when a row holds a non-numeric value
+        that only SQLite can convert, so the hours must be recomputed.
+
+    """
+    compacted_before = _compacted_before(conn)
+    partials: defaultdict[tuple[str, str], _RunningAggregate] = defaultdict(
+        _RunningAggregate,
+    )
+    for row in rows:
+        hour = _rollup_hour(str(row[_TS_COL]))
+        if compacted_before is not None and hour < compacted_before:
+            continue
+        partials[hour, _ROLLUP_ROW_COUNT_NAME].merge(1, None, None, None)
+        for name, value in row.items():
+            if name == _TS_COL or value is None:
+                continue
+            if isinstance(value, str):
+                return False
+            partials[hour, _column_name(name)].merge(1, value, value, value)
+    conn.executemany(
+        f"INSERT INTO {_ROLLUP_TABLE_NAME} "
+        "(hour, name, count, total, minimum, maximum) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (hour, name) DO UPDATE SET "
+        "count = count + excluded.count, total = total + excluded.total, "
+        "minimum = MIN(minimum, excluded.minimum), "
+        "maximum = MAX(maximum, excluded.maximum)",
+        [
+            (
+                hour,
+                name,
+                partial.count,
+                *(
+                    (None, None, None)
+                    if name == _ROLLUP_ROW_COUNT_NAME
+                    else (partial.total, partial.minimum, partial.maximum)
+                ),
+            )
+            for (hour, name), partial in sorted(partials.items())
+        ],
+    )
+    return True
+
+
+def backfill_rollups(db_path: str) -> int:
+    """Create the hourly rollup table if needed and rebuild it from raw rows.
+
+    Databases created before rollups existed only maintain them once this has
+    run; until then queries read the raw observations. The stats table is
+    recounted as well, which corrects it after rows were written by other
+    SQL clients.
+
+    Returns:
+        The number of hours written.
+
+    """
+    with closing(_connect_database(db_path, read_only=False)) as conn, conn:
+        conn.execute("BEGIN")
+        conn.execute(_ROLLUP_TABLE_SQL)
+        _rebuild_stats(conn)
+        return _refresh_rollups(
+            conn,
+            _existing_columns(conn),
+            epoch_ts=_uses_epoch_ts(conn),
+        )
+
+
+def migrate_to_epoch_timestamps(db_path: str) -> TimestampMigrationSummary:
+    """Convert the observations table to store ts as epoch milliseconds.
+
+    The rows are copied in ts order into a WITHOUT ROWID table keyed by the
+    integer ts, which replaces the old table and its UNIQUE ts index, and the
+    text view is created for SQL clients that expect the old column. Rows
+    whose ts SQLite cannot parse, or that round to a millisecond already
+    taken, are dropped. The database is vacuumed afterwards to return the
+    space the old table and index used. Stop the daemon before migrating.
+
+    Returns:
+        Counts of rows migrated and dropped.
+
+    """
+    table_name = _DEFAULT_TABLE_NAME
+    migration_table_name = f"{table_name}_migrating"
+    with closing(_connect_database(db_path, read_only=False)) as conn:
+        if _uses_epoch_ts(conn, table_name):
+            raise TimestampsAlreadyMigratedError(db_path)
+        if _is_partitioned(conn):
+            raise ObservationsAlreadyPartitionedError(db_path)
+        value_columns = [
+            (column_name, column_type)
+            for _, column_name, column_type, *_ in conn.execute(
+                f"PRAGMA table_info({table_name})",
+            )
+            if column_name != _TS_COL
+        ]
+        column_list = ", ".join(name for name, _ in value_columns)
+        epoch_ms_sql = _SQLITE_EPOCH_MS_SQL.format(_TS_COL)
+
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute(f"DROP TABLE IF EXISTS {migration_table_name}")
+            conn.execute(_epoch_table_sql(migration_table_name, value_columns))
+            (rows_read,) = conn.execute(
+                f"SELECT COUNT(*) FROM {table_name}",
+            ).fetchone()
+            rows_migrated = conn.execute(
+                f"INSERT OR IGNORE INTO {migration_table_name} "
+                f"({', '.join([_TS_COL, *(name for name, _ in value_columns)])}) "
+                f"SELECT {', '.join(filter(None, [epoch_ms_sql, column_list]))} "
+                f"FROM {table_name} WHERE {epoch_ms_sql} IS NOT NULL "
+                f"ORDER BY {_TS_COL}",
+            ).rowcount
+            conn.execute(f"DROP TABLE {table_name}")
+            conn.execute(f"ALTER TABLE {migration_table_name} RENAME TO {table_name}")
+            _create_text_view(conn, table_name)
+            if _has_table(conn, _CHANGE_ONLY_NULLS_NAME):
+                conn.execute(
+                    f"DELETE FROM {_CHANGE_ONLY_NULLS_NAME} "
+                    f"WHERE {epoch_ms_sql} IS NULL",
+                )
+                conn.execute(
+                    f"UPDATE OR REPLACE {_CHANGE_ONLY_NULLS_NAME} "
+                    f"SET {_TS_COL} = {epoch_ms_sql}",
+                )
+            if rows_migrated < rows_read and _has_table(conn, _ROLLUP_TABLE_NAME):
+                _refresh_rollups(
+                    conn,
+                    (name for name, _ in value_columns),
+                    epoch_ts=True,
+                )
+            _rebuild_stats(conn)
+        conn.execute("VACUUM")
+
+    return TimestampMigrationSummary(
+        rows_migrated=rows_migrated,
+        rows_dropped=rows_read - rows_migrated,
+    )
+
+
+def partition_observations_by_month(db_path: str) -> PartitionMigrationSummary:
+    """Split the observations table into monthly partitions behind a view.
+
+    Each month's rows are copied along the ts index into an observations_YYYY_MM
+    table with the same columns and its own UNIQUE ts index, and recorded in
+    the partition registry. The table is then replaced by a view with its
+    name, so SQL clients keep working. Rows whose ts does not start with a
+    YYYY-MM month are dropped. The database is vacuumed afterwards to return
+    the space the old table and index used. Stop the daemon before migrating.
+
+    Returns:
+        Counts of partitions created and rows migrated and dropped.
+
+    """
+    table_name = _DEFAULT_TABLE_NAME
+    with closing(_connect_database(db_path, read_only=False)) as conn:
+        if _is_partitioned(conn):
+            raise ObservationsAlreadyPartitionedError(db_path)
+        if _uses_epoch_ts(conn, table_name):
+            raise EpochTimestampsNotPartitionableError(db_path)
+        value_columns = [
+            (column_name, column_type)
+            for _, column_name, column_type, *_ in conn.execute(
+                f"PRAGMA table_info({table_name})",
+            )
+            if column_name != _TS_COL
+        ]
+        column_list = ", ".join([_TS_COL, *(name for name, _ in value_columns)])
+
+        with conn:
+            conn.execute("BEGIN")
+            (rows_read,) = conn.execute(
+                f"SELECT COUNT(*) FROM {table_name}",
+            ).fetchone()
+            months = [
+                month
+                for (month,) in conn.execute(
+                    f"SELECT DISTINCT substr({_TS_COL}, 1, 7) FROM {table_name} "
+                    f"WHERE {_TS_COL} IS NOT NULL ORDER BY 1",
+                )
+                if _PARTITION_MONTH_PATTERN.fullmatch(month)
+            ]
+            conn.execute(_PARTITION_REGISTRY_SQL)
+            rows_migrated = 0
+            for month in months:
+                partition_name = _partition_table_name(month)
+                conn.execute(_text_table_sql(partition_name, value_columns))
+                conn.execute(_unique_ts_index_sql(partition_name))
+                rows_migrated += conn.execute(
+                    f"INSERT OR IGNORE INTO {partition_name} ({column_list}) "
+                    f"SELECT {column_list} FROM {table_name} "
+                    f"WHERE {_TS_COL} >= ? AND {_TS_COL} < ? ORDER BY {_TS_COL}",
+                    (month, _partition_end(month)),
+                ).rowcount
+                conn.execute(
+                    f"INSERT INTO {_PARTITION_REGISTRY_NAME} "
+                    "(month, row_count, earliest_ts, latest_ts) "
+                    f"SELECT ?, COUNT(*), MIN({_TS_COL}), MAX({_TS_COL}) "
+                    f"FROM {partition_name}",
+                    (month,),
+                )
+            conn.execute(f"DROP TABLE {table_name}")
+            _create_partition_view(conn)
+            if rows_migrated < rows_read and _has_table(conn, _ROLLUP_TABLE_NAME):
+                _refresh_rollups(conn, (name for name, _ in value_columns))
+            _rebuild_stats(conn)
+        conn.execute("VACUUM")
+
+    return PartitionMigrationSummary(
+        partitions_created=len(months),
+        rows_migrated=rows_migrated,
+        rows_dropped=rows_read - rows_migrated,
+    )
+
+
+def _compacted_before(conn: sqlite3.Connection) -> str | None:
+    """Return the hour before which raw rows have been compacted away.
+
+    Compaction works in whole hours, so the hour holding the newest
+    downsampled bucket and every hour before it keep only their rollups.
+    """
+    if not _has_table(conn, _DOWNSAMPLED_TABLE_NAME):
+        return None
+    (latest,) = conn.execute(
+        f"SELECT MAX({_TS_COL}) FROM {_DOWNSAMPLED_TABLE_NAME}",
+    ).fetchone()
+    return None if latest is None else _next_rollup_hour(_rollup_hour(latest))
+
+
+def _oldest_hour_before(
+    conn: sqlite3.Connection,
+    horizon: str,
+    *,
+    epoch_ts: bool,
+) -> str | None:
+    """Return the UTC hour of the oldest parseable raw ts before horizon."""
+    if epoch_ts:
+        row = conn.execute(
+            f"SELECT {_TS_COL} FROM {_DEFAULT_TABLE_NAME} WHERE {_TS_COL} < ? "
+            f"ORDER BY {_TS_COL} LIMIT 1",
+            (_epoch_ms(horizon),),
+        ).fetchone()
+        if row is None:
+            return None
+        oldest = _UNIX_EPOCH + timedelta(hours=row[0] // _MS_PER_HOUR)
+        return oldest.strftime(_ROLLUP_HOUR_FORMAT)
+
+    table_names = [_DEFAULT_TABLE_NAME]
+    if _is_partitioned(conn):
+        table_names = [
+            _partition_table_name(month)
+            for month in _partition_months(conn, end_ts=horizon)
+        ]
+    for table_name in table_names:
+        row = conn.execute(
+            f"SELECT strftime('{_ROLLUP_HOUR_FORMAT}', {_TS_COL}) AS hour "
+            f"FROM {table_name} WHERE {_TS_COL} < ? AND hour IS NOT NULL "
+            f"ORDER BY {_TS_COL} LIMIT 1",
+            (horizon,),
+        ).fetchone()
+        if row is not None:
+            return row[0]
+    return None
+
+
+def _downsample_rows(  # noqa: PLR0913
+    conn: sqlite3.Connection,
+    value_columns: list[str],
+    start_hour: str,
+    end_hour: str,
+    downsample_minutes: int,
+    *,
+    epoch_ts: bool,
+) -> int:
+    """Average raw rows in [start_hour, end_hour) into downsampled buckets.
+
+    A bucket that already exists, because late rows arrived after its hour
+    was compacted, is merged with the new rows weighted by sample count.
+    Change-only columns are averaged over the values their NULLs stand for.
+
+    Returns:
+        The number of buckets written.
+
+    """
+    bucket_seconds = downsample_minutes * 60
+    if epoch_ts:
+        bucket_sql = f"{_TS_COL} / {bucket_seconds * 1000} * {bucket_seconds}"
+        range_start, range_end = _epoch_ms(start_hour), _epoch_ms(end_hour)
+    else:
+        bucket_sql = (
+            f"CAST(strftime('%s', {_TS_COL}) AS INTEGER) "
+            f"/ {bucket_seconds} * {bucket_seconds}"
+        )
+        range_start, range_end = start_hour, end_hour
+    where_clause, params = _half_open_range_clause(_TS_COL, range_start, range_end)
+    source = f"{_DEFAULT_TABLE_NAME} {where_clause}"
+    change_only = _change_only_columns(conn).intersection(value_columns)
+    if change_only:
+        source = _decoded_source(
+            _DEFAULT_TABLE_NAME,
+            value_columns,
+            change_only,
+            where_clause,
+            epoch_ts=epoch_ts,
+        )
+    merges = [
+        f"{column} = CASE "
+        f"WHEN {column} IS NULL THEN excluded.{column} "
+        f"WHEN excluded.{column} IS NULL THEN {column} "
+        f"ELSE ({column} * sample_count "
+        f"+ excluded.{column} * excluded.sample_count) "
+        "/ (sample_count + excluded.sample_count) END"
+        for column in value_columns
+    ]
+    merges.append("sample_count = sample_count + excluded.sample_count")
+    select_parts = [
+        f"datetime({bucket_sql}, 'unixepoch') AS bucket",
+        "COUNT(*)",
+        *(f"AVG({column})" for column in value_columns),
+    ]
+    cursor = conn.execute(
+        f"INSERT INTO {_DOWNSAMPLED_TABLE_NAME} "
+        f"({', '.join([_TS_COL, 'sample_count', *value_columns])}) "
+        f"SELECT {', '.join(select_parts)} FROM {source} "
+        "GROUP BY bucket HAVING bucket IS NOT NULL "
+        f"ON CONFLICT ({_TS_COL}) DO UPDATE SET {', '.join(merges)}",
+        params,
+    )
+    return max(cursor.rowcount, 0)
+
+
+def _delete_raw_rows(
+    conn: sqlite3.Connection,
+    start_hour: str,
+    end_hour: str,
+    *,
+    epoch_ts: bool,
+) -> int:
+    """Delete raw rows in [start_hour, end_hour) and return how many went.
+
+    In a partitioned database the registry is updated, and partitions left
+    empty once the range has passed their whole month are dropped.
+    """
+    if epoch_ts:
+        return conn.execute(
+            f"DELETE FROM {_DEFAULT_TABLE_NAME} WHERE {_TS_COL} >= ? AND {_TS_COL} < ?",
+            (_epoch_ms(start_hour), _epoch_ms(end_hour)),
+        ).rowcount
+    if not _is_partitioned(conn):
+        return conn.execute(
+            f"DELETE FROM {_DEFAULT_TABLE_NAME} WHERE {_TS_COL} >= ? AND {_TS_COL} < ?",
+            (start_hour, end_hour),
+        ).rowcount
+
+    deleted_rows = 0
+    dropped_partitions = False
+    for month in _partition_months(conn, start_hour, end_hour):
+        table_name = _partition_table_name(month)
+        month_deleted = conn.execute(
+            f"DELETE FROM {table_name} WHERE {_TS_COL} >= ? AND {_TS_COL} < ?",
+            (start_hour, end_hour),
+        ).rowcount
+        deleted_rows += month_deleted
+        conn.execute(
+            f"UPDATE {_PARTITION_REGISTRY_NAME} SET "
+            "row_count = row_count - ?, "
+            f"earliest_ts = (SELECT MIN({_TS_COL}) FROM {table_name}), "
+            f"latest_ts = (SELECT MAX({_TS_COL}) FROM {table_name}) "
+            "WHERE month = ?",
+            (month_deleted, month),
+        )
+        (row_count,) = conn.execute(
+            f"SELECT row_count FROM {_PARTITION_REGISTRY_NAME} WHERE month = ?",
+            (month,),
+        ).fetchone()
+        if row_count == 0 and _partition_end(month) <= end_hour:
+            conn.execute(f"DROP TABLE {table_name}")
+            conn.execute(
+                f"DELETE FROM {_PARTITION_REGISTRY_NAME} WHERE month = ?",
+                (month,),
+            )
+            dropped_partitions = True
+    if dropped_partitions:
+        _create_partition_view(conn)
+    return deleted_rows
+
+
+def _expire_downsampled_rows(conn: sqlite3.Connection, cutoff: str) -> int:
+    """Delete downsampled buckets older than cutoff in bounded transactions.
+
+    The newest bucket is always kept, since it marks how far raw rows have
+    been compacted.
+    """
+    expired_rows = 0
+    while True:
+        with conn:
+            deleted_rows = conn.execute(
+                f"DELETE FROM {_DOWNSAMPLED_TABLE_NAME} WHERE {_TS_COL} IN ("
+                f"SELECT {_TS_COL} FROM {_DOWNSAMPLED_TABLE_NAME} "
+                f"WHERE {_TS_COL} < ? AND {_TS_COL} < "
+                f"(SELECT MAX({_TS_COL}) FROM {_DOWNSAMPLED_TABLE_NAME}) "
+                f"ORDER BY {_TS_COL} LIMIT ?)",
+                (cutoff, _COMPACTION_BATCH_SIZE),
+            ).rowcount
+        expired_rows += deleted_rows
+        if deleted_rows < _COMPACTION_BATCH_SIZE:
+            return expired_rows
+
+
+def compact_observations(
+    db_path: str,
+    policy: RetentionPolicy,
+    *,
+    now: datetime | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> CompactionSummary:
+    """Apply a retention policy to the stored observations.
+
+    Raw rows older than policy.raw_days are averaged into buckets of
+    policy.downsample_minutes in the observations_downsampled table and then
+    deleted, _COMPACTION_CHUNK_HOURS at a time so each transaction stays short
+    and the writer is not held up. Each chunk's hours are recomputed in the
+    rollup table first and kept there for good; later rollup refreshes never
+    reach back into compacted hours. Downsampled buckets older than
+    policy.downsampled_days are then deleted in batches. In a partitioned
+    database, months left empty are dropped. Freed pages are reused by later
+    writes rather than returned to the filesystem. should_stop is checked
+    between transactions.
+
+    Returns:
+        Counts of raw rows compacted, buckets written and buckets expired.
+
+    """
+    now = now or datetime.now(UTC)
+    horizon = (now - timedelta(days=policy.raw_days)).astimezone(UTC)
+    raw_horizon = horizon.strftime(_ROLLUP_HOUR_FORMAT)
+    rows_compacted = buckets_written = buckets_expired = 0
+
+    with closing(_connect_database(db_path, read_only=False)) as conn:
+        if not _has_table(conn, _ROLLUP_TABLE_NAME):
+            raise RollupsRequiredError(db_path)
+        epoch_ts = _uses_epoch_ts(conn)
+        value_columns = sorted(_existing_columns(conn) - {_TS_COL})
+        has_missing_values = _has_table(conn, _CHANGE_ONLY_NULLS_NAME)
+        with conn:
+            _ensure_stats(conn)
+        conn.execute(_DOWNSAMPLED_TABLE_SQL)
+        _ensure_columns(conn, set(value_columns), _DOWNSAMPLED_TABLE_NAME)
+
+        while not (should_stop and should_stop()):
+            start_hour = _oldest_hour_before(conn, raw_horizon, epoch_ts=epoch_ts)
+            if start_hour is None:
+                break
+            end_hour = min(
+                (
+                    datetime.fromisoformat(start_hour)
+                    + timedelta(hours=_COMPACTION_CHUNK_HOURS)
+                ).strftime(_ROLLUP_HOUR_FORMAT),
+                raw_horizon,
+            )
+            with conn:
+                conn.execute("BEGIN")
+                _refresh_rollups(
+                    conn,
+                    value_columns,
+                    start_hour,
+                    end_hour,
+                    epoch_ts=epoch_ts,
+                )
+                buckets_written += _downsample_rows(
+                    conn,
+                    value_columns,
+                    start_hour,
+                    end_hour,
+                    policy.downsample_minutes,
+                    epoch_ts=epoch_ts,
+                )
+                deleted_rows = _delete_raw_rows(
+                    conn,
+                    start_hour,
+                    end_hour,
+                    epoch_ts=epoch_ts,
+                )
+                if has_missing_values:
+                    conn.execute(
+                        f"DELETE FROM {_CHANGE_ONLY_NULLS_NAME} "
+                        f"WHERE {_TS_COL} >= ? AND {_TS_COL} < ?",
+                        (_epoch_ms(start_hour), _epoch_ms(end_hour))
+                        if epoch_ts
+                        else (start_hour, end_hour),
+                    )
+                _record_deleted_rows(conn, deleted_rows)
+                rows_compacted += deleted_rows
+
+        if policy.downsampled_days is not None and not (should_stop and should_stop()):
+            cutoff = now - timedelta(days=policy.downsampled_days)
+            buckets_expired = _expire_downsampled_rows(
+                conn,
+                _format_sqlite_timestamp(cutoff),
+            )
+
+    return CompactionSummary(
+        rows_compacted=rows_compacted,
+        buckets_written=buckets_written,
+        buckets_expired=buckets_expired,
+    )
+
+
+@lru_cache(maxsize=_INSERT_STATEMENT_CACHE_SIZE)
+def _insert_statement(table_name: str, keys: tuple[str, ...]) -> str:
+    """Build the INSERT for one observation shape.
+
+    Cached per (table, key tuple) so the sanitized column list and SQL text are
+    built once per payload shape, which also keeps sqlite3's statement cache warm.
+    """
+    columns_str = ", ".join(_column_name(key) for key in keys)
+    placeholders = ", ".join("?" for _ in keys)
+    return f"INSERT OR IGNORE INTO {table_name} ({columns_str}) VALUES ({placeholders})"
+
+
+def _insert_dict_row(
+    conn: sqlite3.Connection,
+    table_name: str,
+    data_dict: Observation,
+) -> int | None:
+    """Alternative version that takes an existing connection.
+
+    Args:
+        conn (sqlite3.Connection): Existing database connection
+        table_name (str): Name of the table to insert into
+        data_dict (dict): Dictionary where keys are column names and values are the data
+
+    Returns:
+        int: The rowid of the inserted row
+
+    """
+    if not data_dict:
+        raise UnexpectedEmptyDictionaryError
+
+    cursor = conn.cursor()
+    query = _insert_statement(table_name, tuple(data_dict.keys()))
+    cursor.execute(query, list(data_dict.values()))
+    conn.commit()
+    if cursor.rowcount <= 0:
+        _logger.debug(
+            "Ignored insert into %s because the row already exists",
+            table_name,
+        )
+        return None
+    return cursor.lastrowid
+
+
+def _has_unique_ts_index(
+    conn: sqlite3.Connection,
+    table_name: str,
+) -> bool:
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA index_list({table_name})")
+    for _, index_name, is_unique, *_ in cursor.fetchall():
+        if not is_unique:
+            continue
+        cursor.execute(f"PRAGMA index_info({index_name})")
+        indexed_columns = [row[2] for row in cursor.fetchall()]
+        if indexed_columns == [_TS_COL]:
+            return True
+    return False
+
+
+def _deduplicate_timestamps(
+    conn: sqlite3.Connection,
+    table_name: str,
+) -> int:
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    columns = [row[1] for row in cursor.fetchall()]
+    value_columns = [column for column in columns if column != _TS_COL]
+
+    cursor.execute(
+        f"SELECT {_TS_COL} FROM {table_name} "
+        f"WHERE {_TS_COL} IS NOT NULL "
+        f"GROUP BY {_TS_COL} HAVING COUNT(*) > 1",
+    )
+    duplicate_timestamps = [row[0] for row in cursor.fetchall()]
+
+    if not duplicate_timestamps:
+        return 0
+
+    removed_rows = 0
+    selected_columns = ", ".join([_TS_COL, *value_columns])
+    assignments = ", ".join(f"{column} = ?" for column in [_TS_COL, *value_columns])
 
     for timestamp in duplicate_timestamps:
         cursor.execute(
@@ -604,9 +2452,12 @@ def _ensure_unique_ts_index(
     db_path: str,
     table_name: str = _DEFAULT_TABLE_NAME,
 ) -> None:
-    """Add a UNIQUE index on ts for existing databases that lack one."""
+    """Add a UNIQUE index on ts for existing databases that lack one.
+
+    Monthly partitions are indexed as they are created.
+    """
     with closing(_connect_database(db_path, read_only=False)) as conn:
-        if _has_unique_ts_index(conn, table_name):
+        if _has_unique_ts_index(conn, table_name) or _is_partitioned(conn):
             return
 
         try:
@@ -622,58 +2473,706 @@ def _ensure_unique_ts_index(
         conn.commit()
 
 
+def _insert_rows(
+    conn: sqlite3.Connection,
+    table_name: str,
+    rows: list[dict[str, str | int | float | None]],
+) -> int:
+    """Insert prepared rows with one executemany per key shape.
+
+    The caller owns the transaction. Returns the number of rows actually
+    inserted; rows whose timestamp already exists are ignored.
+    """
+    rows_by_shape: dict[tuple[str, ...], list[list[str | int | float | None]]] = {}
+    for row in rows:
+        rows_by_shape.setdefault(tuple(row.keys()), []).append(list(row.values()))
+
+    inserted_rows = 0
+    cursor = conn.cursor()
+    for keys, values in rows_by_shape.items():
+        cursor.executemany(_insert_statement(table_name, keys), values)
+        inserted_rows += max(cursor.rowcount, 0)
+    cursor.close()
+
+    if inserted_rows < len(rows):
+        _logger.debug(
+            "Ignored %s inserts into %s because the rows already exist",
+            len(rows) - inserted_rows,
+            table_name,
+        )
+    return inserted_rows
+
+
+@dataclass(frozen=True, slots=True)
+class _ChangeOnlyRow:
+    """The last row a writer stored and the change-only values it reads as.
+
+    key orders rows the way the table does: epoch ms or the text ts. values
+    is None when the row was stored by someone else and is not known.
+    """
+
+    key: str | int
+    hour: int
+    values: dict[str, ObservationValue] | None
+
+
+def _blank_repeated_values(
+    row: dict[str, str | int | float | None],
+    key: str | int,
+    previous: _ChangeOnlyRow | None,
+    change_only: Collection[str],
+) -> tuple[dict[str, str | int | float | None], list[str], _ChangeOnlyRow]:
+    """Store NULL for change-only values equal to what previous reads as.
+
+    Also returns the change-only columns whose value is missing from row
+    and must be recorded as such, because the NULL stored for them would
+    otherwise read as previous's value. A row starting a new hour has no
+    previous value to repeat.
+    """
+    hour = _epoch_ms(str(row[_TS_COL])) // _MS_PER_HOUR
+    carried = previous.values if previous is not None and previous.hour == hour else {}
+    names = {_column_name(name): name for name in row}
+    values: dict[str, ObservationValue] = {}
+    missing: list[str] = []
+    stored_row = dict(row)
+    for column in sorted(change_only):
+        name = names.get(column)
+        value = None if name is None else row[name]
+        values[column] = value
+        if value is None:
+            if carried is None or carried.get(column) is not None:
+                missing.append(column)
+        elif carried is not None and carried.get(column) == value:
+            stored_row[name] = None
+    return stored_row, missing, _ChangeOnlyRow(key, hour, values)
+
+
+class ObservationWriter:
+    """Long-lived writer that keeps one configured connection open for inserts.
+
+    The PRAGMAs from _configure_connection run once and the table's column set is
+    cached, so the schema is only touched when an observation carries a new key.
+
+    Observations are buffered in memory and written with a single transaction
+    once flush_every observations are pending or the oldest pending observation
+    is flush_interval_seconds old. The defaults write every observation
+    immediately. In a partitioned database rows go to their month's table. When
+    the database has an hourly rollup table, a flush whose rows were all
+    inserted adds them to the rollups of their hours; otherwise the hours it
+    touched are recomputed from raw rows. Either happens in the same
+    transaction, which also updates the stats table.
+    Change-only columns that repeat the previous row's value are stored as
+    NULL. After a flush commits new rows, on_flush is called with the
+    earliest and latest ts that were written.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        table_name: str = _DEFAULT_TABLE_NAME,
+        *,
+        flush_every: int = 1,
+        flush_interval_seconds: float | None = None,
+        on_flush: Callable[[str, str], object] | None = None,
+    ) -> None:
+        self.db_path = db_path
+        self.table_name = table_name
+        self.flush_every = max(flush_every, 1)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.on_flush = on_flush
+        self._conn = _connect_database(db_path, read_only=False)
+        self._known_columns = _existing_columns(self._conn, table_name)
+        self._epoch_ts = _uses_epoch_ts(self._conn, table_name)
+        self._partitioned = table_name == _DEFAULT_TABLE_NAME and _is_partitioned(
+            self._conn,
+        )
+        self._partition_columns: dict[str, set[str]] = {}
+        self._maintain_rollups = table_name == _DEFAULT_TABLE_NAME and _has_table(
+            self._conn,
+            _ROLLUP_TABLE_NAME,
+        )
+        self._maintain_stats = table_name == _DEFAULT_TABLE_NAME and _has_table(
+            self._conn,
+            _STATS_TABLE_NAME,
+        )
+        self._change_only = (
+            _change_only_columns(self._conn)
+            if table_name == _DEFAULT_TABLE_NAME
+            else set()
+        )
+        self._previous: _ChangeOnlyRow | None = None
+        self._known_shapes: set[tuple[str, ...]] = set()
+        self._pending: list[dict[str, str | int | float | None]] = []
+        self._oldest_pending_at: float | None = None
+
+    def __enter__(self) -> Self:
+        """Return the writer for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Flush pending observations and close the connection."""
+        self.close()
+
+    @property
+    def pending_count(self) -> int:
+        """Number of buffered observations not yet written."""
+        return len(self._pending)
+
+    def _add_missing_columns(self, keys: tuple[str, ...]) -> None:
+        if keys in self._known_shapes:
+            return
+        missing_columns = {_column_name(key) for key in keys} - self._known_columns
+        for column_name in sorted(missing_columns):
+            self._conn.execute(
+                f"ALTER TABLE {self.table_name} ADD COLUMN {column_name} REAL",
+            )
+            self._known_columns.add(column_name)
+        if missing_columns and self._epoch_ts:
+            _create_text_view(self._conn, self.table_name)
+        self._known_shapes.add(keys)
+
+    def _flush_due(self) -> bool:
+        if len(self._pending) >= self.flush_every:
+            return True
+        if self.flush_interval_seconds is None or self._oldest_pending_at is None:
+            return False
+        elapsed = monotonic() - self._oldest_pending_at
+        return elapsed >= self.flush_interval_seconds
+
+    def flush_if_due(self) -> int:
+        """Flush when the buffer is full or its oldest observation is too old.
+
+        Lets a polling loop apply flush_interval_seconds while the station
+        is not producing observations to insert.
+
+        Returns:
+            The number of rows inserted.
+
+        """
+        return self.flush() if self._pending and self._flush_due() else 0
+
+    def insert(self, observation: Observation) -> None:
+        """Validate and buffer an observation, flushing when a limit is reached."""
+        prepared_observation = _prepare_observation(observation)
+        _validate_observation(prepared_observation)
+        if not self._pending:
+            self._oldest_pending_at = monotonic()
+        self._pending.append(prepared_observation)
+        if self._flush_due():
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all buffered observations in one transaction.
+
+        If the transaction fails the observations stay buffered and the error
+        is raised, so a later flush or close writes them.
+
+        Returns:
+            The number of rows inserted.
+
+        """
+        if not self._pending:
+            return 0
+        rows, self._pending = self._pending, []
+        oldest_pending_at, self._oldest_pending_at = self._oldest_pending_at, None
+        # Until this flush commits, the newest stored row is unknown
+        previous, self._previous = self._previous, None
+        try:
+            if not self._partitioned:
+                for row in rows:
+                    self._add_missing_columns(tuple(row.keys()))
+            with self._conn:
+                # Begin explicitly so a new partition's DDL rolls back with the
+                # rows, and nothing else writes between reading the newest row
+                # and storing change-only rows encoded against it
+                self._conn.execute("BEGIN IMMEDIATE")
+                if self._change_only:
+                    inserted_rows, previous = self._store_changes_only(rows, previous)
+                else:
+                    inserted_rows = self._insert(rows)
+                if (
+                    inserted_rows
+                    and self._maintain_rollups
+                    and not (
+                        inserted_rows == len(rows)
+                        and _merge_into_rollups(self._conn, rows)
+                    )
+                ):
+                    self._refresh_rollups(rows)
+                if self._maintain_stats:
+                    _record_inserted_rows(
+                        self._conn,
+                        inserted_rows,
+                        (
+                            _epoch_ms(str(row[_TS_COL]))
+                            if self._epoch_ts
+                            else row[_TS_COL]
+                            for row in rows
+                        ),
+                        # Partitions gain columns on their own; the view has them all
+                        len(_existing_columns(self._conn))
+                        if self._partitioned
+                        else len(self._known_columns),
+                        epoch_ts=self._epoch_ts,
+                    )
+        except BaseException:
+            # Keep the batch buffered so the next flush or close retries it.
+            # The rollback also dropped any partition or column this flush
+            # created, so the cached partition columns may be stale.
+            self._pending[:0] = rows
+            self._oldest_pending_at = oldest_pending_at
+            self._partition_columns.clear()
+            raise
+        self._previous = previous
+        if inserted_rows and self.on_flush is not None:
+            timestamps = [str(row[_TS_COL]) for row in rows]
+            self.on_flush(min(timestamps), max(timestamps))
+        return inserted_rows
+
+    def _insert(self, rows: list[dict[str, str | int | float | None]]) -> int:
+        if self._partitioned:
+            return _insert_partitioned_rows(self._conn, rows, self._partition_columns)
+        stored_rows = _with_epoch_ts(rows) if self._epoch_ts else rows
+        return _insert_rows(self._conn, self.table_name, stored_rows)
+
+    def _store_changes_only(
+        self,
+        rows: list[dict[str, str | int | float | None]],
+        previous: _ChangeOnlyRow | None,
+    ) -> tuple[int, _ChangeOnlyRow | None]:
+        """Insert rows, blanking change-only values that repeat the previous row's.
+
+        Rows after the newest stored row are encoded in ts order, continuing
+        from the last flush while its final row is still the newest, and
+        their missing values are recorded. Rows at or before it are stored as
+        given, after the hours they land in are materialized, and the missing
+        values of those hours are recorded before the later rows are
+        inserted. Of later rows sharing a ts, only the first is kept.
+
+        Returns:
+            The number of rows inserted and the last row encoded.
+
+        """
+        _, latest_ts = _observation_bounds(self._conn)
+        latest_key: str | int | None = None
+        if latest_ts is None:
+            previous = None
+        else:
+            latest_key = _epoch_ms(latest_ts) if self._epoch_ts else latest_ts
+            if previous is None or previous.key != latest_key:
+                # Written by someone else, so its values are unknown
+                previous = _ChangeOnlyRow(
+                    latest_key,
+                    _epoch_ms(latest_ts) // _MS_PER_HOUR,
+                    None,
+                )
+
+        def row_key(row: dict[str, str | int | float | None]) -> str | int:
+            ts = str(row[_TS_COL])
+            return _epoch_ms(ts) if self._epoch_ts else ts
+
+        past_rows: list[dict[str, str | int | float | None]] = []
+        later_rows: list[dict[str, str | int | float | None]] = []
+        missing: list[tuple[str, str | int]] = []
+        for row in sorted(rows, key=row_key):
+            key = row_key(row)
+            if latest_key is not None and key <= latest_key:
+                past_rows.append(row)
+                continue
+            if previous is not None and key == previous.key:
+                continue
+            stored_row, missing_columns, previous = _blank_repeated_values(
+                row,
+                key,
+                previous,
+                self._change_only,
+            )
+            later_rows.append(stored_row)
+            missing.extend((column, key) for column in missing_columns)
+
+        inserted_rows = 0
+        if past_rows:
+            past_hours = {_rollup_hour(str(row[_TS_COL])) for row in past_rows}
+            _materialize_hours(
+                self._conn,
+                past_hours,
+                self._change_only,
+                epoch_ts=self._epoch_ts,
+            )
+            inserted_rows += self._insert(past_rows)
+            _mark_missing_hours(
+                self._conn,
+                past_hours,
+                self._change_only,
+                epoch_ts=self._epoch_ts,
+            )
+        if later_rows:
+            inserted_rows += self._insert(later_rows)
+            _record_missing_values(self._conn, missing)
+        return inserted_rows, previous
+
+    def _refresh_rollups(self, rows: list[dict[str, str | int | float | None]]) -> None:
+        hours = {_rollup_hour(str(row[_TS_COL])) for row in rows}
+        # A partitioned database is read through its view, which has every
+        # partition's columns and filters each partition by its own index
+        value_columns = (
+            _existing_columns(self._conn) if self._partitioned else self._known_columns
+        )
+        for hour in sorted(hours):
+            _refresh_rollups(
+                self._conn,
+                value_columns,
+                hour,
+                _next_rollup_hour(hour),
+                epoch_ts=self._epoch_ts,
+            )
+
+    def close(self) -> None:
+        """Flush pending observations and close the underlying connection."""
+        try:
+            self.flush()
+        finally:
+            self._conn.close()
+
+
 def insert_observation(
     db_path: str,
     observation: Observation,
 ) -> None:
-    prepared_observation = _prepare_observation(observation)
-    _validate_observation(prepared_observation)
+    with ObservationWriter(db_path) as writer:
+        writer.insert(observation)
+
+
+def bulk_insert_observations(
+    db_path: str,
+    columns: Iterable[str],
+    observations: Iterable[Observation],
+    batch_size: int = _BULK_INSERT_BATCH_SIZE,
+) -> int:
+    """Insert many observations in a single transaction.
+
+    The schema is reconciled once against the union of columns up front and rows
+    are written with batched executemany. When the table is empty the UNIQUE ts
+    index is dropped for the load and rebuilt afterwards; otherwise it is kept so
+    rows whose timestamp already exists are skipped. A partitioned database
+    routes each batch to its monthly tables instead. Rows are stored as given,
+    so change-only columns are first materialized in the hours they land in,
+    and NULLs among them are then recorded as missing.
+    Hourly rollups covering the imported time range are recomputed, and the
+    stats table updated, before the transaction commits.
+
+    Args:
+        db_path: Path to SQLite database file
+        columns: Every observation key that may appear in observations
+        observations: Observations to insert, each carrying a ts value
+        batch_size: Number of rows per executemany call
+
+    Returns:
+        The number of rows inserted
+
+    """
+    table_name = _DEFAULT_TABLE_NAME
+    keys = (_TS_COL, *dict.fromkeys(c for c in columns if c != _TS_COL))
+    inserted_rows = 0
+    # Earliest and latest ts of every batch, to bound the rollup refresh
+    ts_bounds: list[str] = []
+    stored_ts_bounds: list[str | int | float | None] = []
+
     with closing(_connect_database(db_path, read_only=False)) as conn:
-        _ensure_columns(conn, set(prepared_observation.keys()))
-        _insert_dict_row(conn, _DEFAULT_TABLE_NAME, prepared_observation)
+        partitioned = _is_partitioned(conn)
+        partition_columns: dict[str, set[str]] = {}
+        if not partitioned:
+            _ensure_columns(conn, {_column_name(key) for key in keys}, table_name)
+        # The primary key of an epoch-ms table cannot be dropped, and partitions
+        # are indexed as they are created
+        epoch_ts = _uses_epoch_ts(conn, table_name)
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT 1 FROM {table_name} LIMIT 1")
+        defer_index = not (epoch_ts or partitioned) and cursor.fetchone() is None
+        cursor.close()
+        change_only = _change_only_columns(conn)
+
+        with conn:
+            conn.execute("BEGIN")
+            if defer_index:
+                index_name = _unique_ts_index_name(table_name)
+                conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+            for batch in batched(observations, batch_size, strict=False):
+                rows = [{key: row.get(key) for key in keys} for row in batch]
+                # An empty table is marked once the index is back instead
+                hours = (
+                    {_rollup_hour(str(row[_TS_COL])) for row in rows}
+                    if change_only and not defer_index
+                    else set()
+                )
+                _materialize_hours(conn, hours, change_only, epoch_ts=epoch_ts)
+                stored_rows = _with_epoch_ts(rows) if epoch_ts else rows
+                if partitioned:
+                    inserted_rows += _insert_partitioned_rows(
+                        conn,
+                        rows,
+                        partition_columns,
+                    )
+                else:
+                    inserted_rows += _insert_rows(conn, table_name, stored_rows)
+                _mark_missing_hours(conn, hours, change_only, epoch_ts=epoch_ts)
+                batch_ts = [str(row[_TS_COL]) for row in rows]
+                ts_bounds.extend((min(batch_ts), max(batch_ts)))
+                stored_ts = [
+                    row[_TS_COL] for row in stored_rows if row[_TS_COL] is not None
+                ]
+                if stored_ts:
+                    stored_ts_bounds.extend((min(stored_ts), max(stored_ts)))
+            if defer_index:
+                try:
+                    conn.execute(_unique_ts_index_sql(table_name))
+                except sqlite3.IntegrityError:
+                    inserted_rows -= _deduplicate_timestamps(conn, table_name)
+                    conn.execute(_unique_ts_index_sql(table_name))
+                _mark_missing_values(conn, table_name, change_only, epoch_ts=epoch_ts)
+            if inserted_rows and _has_table(conn, _ROLLUP_TABLE_NAME):
+                _refresh_rollups(
+                    conn,
+                    _existing_columns(conn, table_name),
+                    _rollup_hour(min(ts_bounds)),
+                    _next_rollup_hour(_rollup_hour(max(ts_bounds))),
+                    epoch_ts=epoch_ts,
+                )
+            if _has_table(conn, _STATS_TABLE_NAME):
+                _record_inserted_rows(
+                    conn,
+                    inserted_rows,
+                    stored_ts_bounds,
+                    len(_existing_columns(conn, table_name)),
+                    epoch_ts=epoch_ts,
+                )
 
+    return inserted_rows
 
-def query_db_metrics(db_path: str) -> DbMetrics:
-    """Query database for summary metrics."""
-    db_file = Path(db_path)
-    file_size = db_file.stat().st_size if db_file.exists() else 0
 
+def iter_observations(db_path: str) -> Iterator[dict[str, ObservationValue]]:
+    """Yield every stored observation as a dict with a text ts, oldest first.
+
+    Monthly partitions are read one at a time in order, each along its own ts
+    index, with the columns of the observations view. Change-only columns are
+    carried forward while the rows stream past, except where recorded missing.
+    """
     with closing(
         _connect_database(db_path, read_only=True, use_row_factory=True),
     ) as conn:
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT COUNT(*) as cnt FROM {_DEFAULT_TABLE_NAME}")
-        row_count = cursor.fetchone()["cnt"]
-
-        cursor.execute(
-            f"SELECT MIN({_TS_COL}) as earliest, MAX({_TS_COL}) as latest "
-            f"FROM {_DEFAULT_TABLE_NAME}",
+        epoch_ts = _uses_epoch_ts(conn)
+        change_only = _change_only_columns(conn)
+        missing = (
+            {
+                (name, ts)
+                for name, ts in conn.execute(
+                    f"SELECT name, {_TS_COL} FROM {_CHANGE_ONLY_NULLS_NAME}",
+                )
+            }
+            if change_only
+            else set()
+        )
+        if _is_partitioned(conn):
+            view_columns = [
+                column_name
+                for _, column_name, *_ in conn.execute(
+                    f"PRAGMA table_info({_DEFAULT_TABLE_NAME})",
+                )
+            ]
+            statements = [
+                f"SELECT {select_list} FROM {table_name} ORDER BY {_TS_COL}"
+                for table_name, select_list in _partition_select_lists(
+                    view_columns,
+                    _partition_columns(conn),
+                )
+            ]
+        else:
+            statements = [f"SELECT * FROM {_DEFAULT_TABLE_NAME} ORDER BY {_TS_COL}"]
+        cursor = itertools.chain.from_iterable(
+            conn.cursor().execute(statement) for statement in statements
         )
-        ts_row = cursor.fetchone()
+        hour: str | int | None = None
+        carried: dict[str, ObservationValue] = {}
+        for row in cursor:
+            observation = dict(row)
+            if change_only:
+                row_hour = _utc_hour(observation[_TS_COL], epoch_ts=epoch_ts)
+                if row_hour != hour:
+                    hour, carried = row_hour, {}
+                for column in change_only.intersection(observation):
+                    if observation[column] is None and (
+                        (column, observation[_TS_COL]) not in missing
+                    ):
+                        observation[column] = carried.get(column)
+                    else:
+                        carried[column] = observation[column]
+            if epoch_ts:
+                observation[_TS_COL] = _format_epoch_ms(observation[_TS_COL])
+            yield observation
+
 
-        cursor.execute(f"PRAGMA table_info({_DEFAULT_TABLE_NAME})")
-        column_count = len(cursor.fetchall())
+def query_db_metrics(db_path: str) -> DbMetrics:
+    """Query database for summary metrics.
+
+    They are read from the stats table, which writes keep current, so no
+    observations are scanned. Databases without it are counted instead.
+    """
+    db_file = Path(db_path)
+    file_size = db_file.stat().st_size if db_file.exists() else 0
+
+    with closing(_connect_database(db_path, read_only=True)) as conn:
+        stats = None
+        if _has_table(conn, _STATS_TABLE_NAME):
+            stats = conn.execute(
+                "SELECT row_count, earliest_ts, latest_ts, column_count "
+                f"FROM {_STATS_TABLE_NAME}",
+            ).fetchone()
+        row_count, earliest_ts, latest_ts, column_count = stats or _count_stats(conn)
 
     return {
         "row_count": row_count,
         "db_file_size_bytes": file_size,
-        "earliest_ts": ts_row["earliest"],
-        "latest_ts": ts_row["latest"],
+        "earliest_ts": earliest_ts,
+        "latest_ts": latest_ts,
         "column_count": column_count,
     }
 
 
-def query_latest_timestamp(db_path: str) -> str | None:
-    """Return the most recent observation timestamp, or None if empty."""
+def _latest_partitioned_timestamp(
+    conn: sqlite3.Connection,
+    before: str | None,
+) -> str | None:
+    """Return the latest ts before before from the newest partition holding one.
+
+    Without before the registry's bounds answer directly.
+    """
+    if before is None:
+        (latest,) = conn.execute(
+            f"SELECT MAX(latest_ts) FROM {_PARTITION_REGISTRY_NAME}",
+        ).fetchone()
+        return latest
+    for month in reversed(_partition_months(conn, end_ts=before)):
+        (latest,) = conn.execute(
+            f"SELECT MAX({_TS_COL}) FROM {_partition_table_name(month)} "
+            f"WHERE {_TS_COL} < ?",
+            (before,),
+        ).fetchone()
+        if latest is not None:
+            return latest
+    return None
+
+
+def query_latest_timestamp(db_path: str, before: str | None = None) -> str | None:
+    """Return the most recent observation timestamp, or None if empty.
+
+    With before, only timestamps earlier than it are considered, answered from
+    the end of the ts index without scanning the table; without it the stats
+    table answers. Epoch-ms timestamps are returned in the text view's format.
+    """
     with closing(
         _connect_database(db_path, read_only=True, use_row_factory=True),
     ) as conn:
+        if before is None and _has_table(conn, _STATS_TABLE_NAME):
+            row = conn.execute(f"SELECT latest_ts FROM {_STATS_TABLE_NAME}").fetchone()
+            if row is not None:
+                return row["latest_ts"]
+        if _is_partitioned(conn):
+            return _latest_partitioned_timestamp(conn, before)
+        epoch_ts = _uses_epoch_ts(conn)
+        where_clause, params = _half_open_range_clause(
+            _TS_COL,
+            None,
+            _epoch_ms(before) if epoch_ts and before is not None else before,
+        )
         cursor = conn.cursor()
         cursor.execute(
-            f"SELECT MAX({_TS_COL}) as latest FROM {_DEFAULT_TABLE_NAME}",
+            f"SELECT MAX({_TS_COL}) as latest FROM {_DEFAULT_TABLE_NAME} "
+            f"{where_clause}",
+            params,
         )
         row = cursor.fetchone()
-        return row["latest"] if row else None
+        latest = row["latest"] if row else None
+        if epoch_ts and latest is not None:
+            return _format_epoch_ms(latest)
+        return latest
+
+
+def query_data_version(
+    db_path: str,
+    start_ts: str,
+    end_ts: str,
+) -> tuple[int, float]:
+    """Return a value that changes when rows in [start_ts, end_ts) change.
+
+    With hourly rollups it is the observation count and the sum of every
+    column total for the UTC hours the range overlaps, read from the rollup
+    table's primary key. It changes with imports into a past range, including
+    ones that merge into existing rows, but not with writes outside it, and
+    survives compaction. Without rollups the row count of the whole table
+    stands in.
+    """
+    with closing(_connect_database(db_path, read_only=True)) as conn:
+        if not _has_table(conn, _ROLLUP_TABLE_NAME):
+            if _has_table(conn, _STATS_TABLE_NAME):
+                (row_count,) = conn.execute(
+                    f"SELECT row_count FROM {_STATS_TABLE_NAME}",
+                ).fetchone()
+                return row_count, 0.0
+            return _count_stats(conn)[0], 0.0
+        range_clause, params = _half_open_range_clause(
+            "hour",
+            _rollup_hour(start_ts),
+            end_ts,
+        )
+        row_count, total = conn.execute(
+            "SELECT COALESCE(SUM(count) FILTER (WHERE name = ?), 0), TOTAL(total) "
+            f"FROM {_ROLLUP_TABLE_NAME} {range_clause}",
+            [_ROLLUP_ROW_COUNT_NAME, *params],
+        ).fetchone()
+        return row_count, total
+
+
+def _query_raw_buckets(  # noqa: PLR0913
+    db_path: str,
+    parsed_fields: list[AggregationField],
+    timezone: str | ZoneInfo,
+    start_ts: str,
+    end_ts: str,
+    *,
+    by_hour: bool,
+) -> list[AggregatedRow]:
+    """Aggregate the raw observations in [start_ts, end_ts) by local day or hour.
+
+    In a partitioned database only the monthly tables overlapping the range
+    are read, and a range no partition overlaps returns no rows. A range
+    reaching into hours whose raw rows were compacted raises
+    CompactedRangeError rather than silently leaving those hours out.
+    """
+    with closing(
+        _connect_database(db_path, read_only=True, use_row_factory=True),
+    ) as conn:
+        compacted_before = _compacted_before(conn)
+        if compacted_before is not None and start_ts < compacted_before:
+            raise CompactedRangeError(compacted_before)
+        partitions = (
+            _partition_columns(conn, start_ts, end_ts)
+            if _is_partitioned(conn)
+            else None
+        )
+        if partitions == {}:
+            return []
+        query, params = _raw_aggregation_query(
+            parsed_fields=parsed_fields,
+            timezone=timezone,
+            start_ts=start_ts,
+            end_ts=end_ts,
+            by_hour=by_hour,
+            epoch_ts=_uses_epoch_ts(conn),
+            partitions=partitions,
+            change_only=_change_only_columns(conn),
+        )
+        cursor = conn.cursor().execute(query, params)
+        return [dict(row) for row in cursor]
 
 
 def query_daily_aggregated_data(
@@ -699,39 +3198,34 @@ def query_daily_aggregated_data(
 
     parsed_fields = _parse_aggregation_fields(aggregation_fields)
     timezone = _validate_timezone(tz)
-    if isinstance(timezone, ZoneInfo):
-        return _query_daily_aggregated_data_with_zoneinfo(
-            db_path=db_path,
-            parsed_fields=parsed_fields,
-            prior_days=prior_days,
-            timezone=timezone,
-        )
-
-    table_name: str = _DEFAULT_TABLE_NAME
-    date_column: str = _TS_COL
-
-    datetime_expression = f"DATE({date_column}, '{timezone}') as date"
-    date_filter_expr = f"DATE({date_column}, '{timezone}')"
-
-    select_parts = _select_parts_from_parsed_fields(
+    today = _current_date_for_timezone(timezone)
+    rollup_buckets = _query_rollup_buckets(
+        db_path=db_path,
         parsed_fields=parsed_fields,
-        datetime_expression=datetime_expression,
+        start_date=today - timedelta(days=prior_days),
+        end_date=today,
+        timezone=timezone,
+        by_hour=False,
+    )
+    if rollup_buckets is not None:
+        return [
+            {"date": date_key, **row_result}
+            for (date_key, _), row_result in sorted(rollup_buckets.items())
+        ]
+
+    start_ts, end_ts = _local_days_as_utc_range(
+        today - timedelta(days=prior_days),
+        today,
+        timezone,
+    )
+    return _query_raw_buckets(
+        db_path,
+        parsed_fields,
+        timezone,
+        start_ts,
+        end_ts,
+        by_hour=False,
     )
-
-    query = f"""
-    SELECT
-        {','.join(select_parts)}
-    FROM {table_name}
-    WHERE {date_filter_expr} >= DATE('now', '{timezone}', '-{prior_days} days')
-    GROUP BY {date_filter_expr}
-    ORDER BY date
-    """
-
-    with closing(
-        _connect_database(db_path, read_only=True, use_row_factory=True),
-    ) as conn:
-        cursor = conn.cursor().execute(query)
-        return [dict(row) for row in cursor]
 
 
 def query_hourly_aggregated_data(
@@ -756,9 +3250,6 @@ def query_hourly_aggregated_data(
         has no matching rows.
 
     """
-    table_name: str = _DEFAULT_TABLE_NAME
-    date_column: str = _TS_COL
-
     parsed_fields = _parse_aggregation_fields(aggregation_fields)
     timezone = _validate_timezone(tz)
     start_date_obj, end_date_obj = _normalize_hourly_date_range(
@@ -766,49 +3257,42 @@ def query_hourly_aggregated_data(
         end_date=end_date,
         timezone=timezone,
     )
-    if isinstance(timezone, ZoneInfo):
-        return _query_hourly_aggregated_data_with_zoneinfo(
-            db_path=db_path,
-            parsed_fields=parsed_fields,
-            start_date=start_date_obj,
-            end_date=end_date_obj,
-            timezone=timezone,
-        )
-
-    datetime_expression = f"DATE({date_column}, '{timezone}') as date"
-    hour_expression = f"strftime('%H', {date_column}, '{timezone}') as hour"
-    date_filter_expr = f"DATE({date_column}, '{timezone}')"
-    group_by_expr = f"strftime('%Y-%m-%d %H', {date_column}, '{timezone}')"
-
-    select_parts = _select_parts_from_parsed_fields(
+    rollup_buckets = _query_rollup_buckets(
+        db_path=db_path,
         parsed_fields=parsed_fields,
-        datetime_expression=datetime_expression + ", " + hour_expression,
+        start_date=start_date_obj,
+        end_date=end_date_obj,
+        timezone=timezone,
+        by_hour=True,
     )
-
-    where_clause = f"WHERE {date_filter_expr} >= ? AND {date_filter_expr} <= ?"
-    params = (start_date_obj.isoformat(), end_date_obj.isoformat())
-
-    query = f"""
-    SELECT
-        {','.join(select_parts)}
-    FROM {table_name}
-    {where_clause}
-    GROUP BY {group_by_expr}
-    ORDER BY date, hour
-    """
-
-    with closing(
-        _connect_database(db_path, read_only=True, use_row_factory=True),
-    ) as conn:
-        cursor = conn.cursor().execute(query, params)
-        result: HourlyAggregatedData = {
+    if rollup_buckets is not None:
+        rollup_result: HourlyAggregatedData = {
             date_key: _empty_hourly_slots()
             for date_key in _date_keys_in_range(start_date_obj, end_date_obj)
         }
-        for row in cursor:
-            row_dict: AggregatedRow = dict(row)
-            date_key = row_dict.get("date")
-            hour = row_dict.get("hour")
-            if isinstance(date_key, str) and isinstance(hour, str):
-                result[date_key][int(hour)] = row_dict
-        return result
+        for (date_key, hour), row_result in rollup_buckets.items():
+            rollup_result[date_key][hour] = {
+                "date": date_key,
+                "hour": f"{hour:02d}",
+                **row_result,
+            }
+        return rollup_result
+
+    start_ts, end_ts = _local_days_as_utc_range(start_date_obj, end_date_obj, timezone)
+    result: HourlyAggregatedData = {
+        date_key: _empty_hourly_slots()
+        for date_key in _date_keys_in_range(start_date_obj, end_date_obj)
+    }
+    for row_dict in _query_raw_buckets(
+        db_path,
+        parsed_fields,
+        timezone,
+        start_ts,
+        end_ts,
+        by_hour=True,
+    ):
+        date_key = row_dict.get("date")
+        hour = row_dict.get("hour")
+        if isinstance(date_key, str) and isinstance(hour, str):
+            result[date_key][int(hour)] = row_dict
+    return result
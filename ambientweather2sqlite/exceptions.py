@@ -49,3 +49,67 @@ class MissingAggregationFieldsError(Aw2SqliteError):
 class UnexpectedEmptyDictionaryError(Aw2SqliteError):
     def __init__(self):
         super().__init__("Dictionary is unexpectedly empty")
+
+
+class UnsupportedImportFormatError(Aw2SqliteError):
+    def __init__(self, source_format: str):
+        super().__init__(
+            f"Unsupported import format: {source_format}. "
+            "Expected one of: csv, jsonl, sqlite",
+        )
+
+
+class TimestampsAlreadyMigratedError(Aw2SqliteError):
+    def __init__(self, db_path: str):
+        super().__init__(
+            f"Timestamps in {db_path} are already stored as epoch milliseconds",
+        )
+
+
+class ObservationsAlreadyPartitionedError(Aw2SqliteError):
+    def __init__(self, db_path: str):
+        super().__init__(
+            f"Observations in {db_path} are already partitioned by month",
+        )
+
+
+class EpochTimestampsNotPartitionableError(Aw2SqliteError):
+    def __init__(self, db_path: str):
+        super().__init__(
+            f"Observations in {db_path} store epoch millisecond timestamps, "
+            "which cannot be partitioned by month",
+        )
+
+
+class RollupsRequiredError(Aw2SqliteError):
+    def __init__(self, db_path: str):
+        super().__init__(
+            f"{db_path} has no hourly rollup table to keep compacted hours in. "
+            "Run aw2sqlite backfill-rollups first",
+        )
+
+
+class CompactedRangeError(Aw2SqliteError):
+    def __init__(self, compacted_before: str):
+        super().__init__(
+            f"Raw observations before {compacted_before} UTC have been compacted "
+            "and only their hourly rollups remain. Query that range with a "
+            "timezone a whole number of hours from UTC",
+        )
+
+
+class InvalidImportTimestampError(Aw2SqliteError):
+    def __init__(self, value: object, row_number: int):
+        super().__init__(
+            f"Invalid timestamp {value!r} in source row {row_number}. "
+            "Expected an ISO-8601 string or Unix epoch seconds or milliseconds",
+        )
+
+
+class ImportColumnCollisionError(Aw2SqliteError):
+    def __init__(self, keys: list[str], column_name: str):
+        quoted_keys = ", ".join(repr(key) for key in keys)
+        super().__init__(
+            f"Source fields {quoted_keys} would all be stored in column "
+            f"{column_name}. Rename them so each maps to its own column",
+        )
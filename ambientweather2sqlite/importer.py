@@ -0,0 +1,243 @@
+"""Bulk import of historical observations from CSV, JSONL or SQLite files."""
+
+import csv
+import json
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+from .database import _column_name, bulk_insert_observations, iter_observations
+from .exceptions import (
+    ImportColumnCollisionError,
+    InvalidImportTimestampError,
+    UnsupportedImportFormatError,
+)
+from .models import ImportSummary
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+    from pathlib import Path
+
+    from .models import ObservationValue, SensorValue
+
+# Keys recognised as the observation timestamp, in order of preference.
+# "dateutc" is the AmbientWeather API field, "Date" the cloud CSV export column.
+_TIMESTAMP_KEYS = ("ts", "dateutc", "date", "Date")
+_EPOCH_MILLISECONDS_THRESHOLD = 100_000_000_000
+_FORMATS_BY_SUFFIX = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+}
+IMPORT_FORMATS = frozenset(_FORMATS_BY_SUFFIX.values())
+
+
+def _format_timestamp(value: datetime) -> str:
+    utc_value = value.astimezone(UTC).replace(tzinfo=None)
+    if utc_value.microsecond:
+        return utc_value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    return utc_value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _parse_epoch(value: float) -> str | None:
+    seconds = float(value)
+    if abs(seconds) >= _EPOCH_MILLISECONDS_THRESHOLD:
+        seconds /= 1000
+    try:
+        return _format_timestamp(datetime.fromtimestamp(seconds, UTC))
+    except OverflowError, OSError, ValueError:
+        return None
+
+
+def _parse_timestamp_text(text: str) -> str | None:
+    try:
+        return _parse_epoch(float(text))
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return _format_timestamp(parsed)
+
+
+def _parse_timestamp(value: object) -> str | None:
+    """Normalize a source timestamp to the stored UTC text format.
+
+    Numbers are treated as Unix epoch seconds, or milliseconds when large enough.
+    Naive ISO strings are assumed to already be UTC. Returns None when value
+    is not a timestamp.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int | float):
+        return _parse_epoch(value)
+    if isinstance(value, str) and (text := value.strip()):
+        return _parse_timestamp_text(text)
+    return None
+
+
+def _parse_value(value: object) -> SensorValue:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int | float):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _normalize_row(
+    raw_row: Mapping[str, object],
+    row_number: int,
+) -> dict[str, ObservationValue] | None:
+    """Return the row to store, or None when it has no timestamp.
+
+    Raises:
+        InvalidImportTimestampError: If the timestamp is present but unparseable
+
+    """
+    timestamp_key = next((key for key in _TIMESTAMP_KEYS if key in raw_row), None)
+    if timestamp_key is None:
+        return None
+    raw_ts = raw_row[timestamp_key]
+    ts = _parse_timestamp(raw_ts)
+    if ts is None:
+        if raw_ts is None or (isinstance(raw_ts, str) and not raw_ts.strip()):
+            return None
+        raise InvalidImportTimestampError(raw_ts, row_number)
+
+    row: dict[str, ObservationValue] = {"ts": ts}
+    for key, raw_value in raw_row.items():
+        if key in _TIMESTAMP_KEYS or not key:
+            continue
+        value = _parse_value(raw_value)
+        if value is not None:
+            row[key] = value
+    return row
+
+
+def _read_csv(source_path: Path) -> Iterator[Mapping[str, object]]:
+    with source_path.open(encoding="utf-8-sig", newline="") as source:
+        yield from csv.DictReader(source)
+
+
+def _read_jsonl(source_path: Path) -> Iterator[Mapping[str, object]]:
+    with source_path.open(encoding="utf-8") as source:
+        for line in source:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict):
+                yield record
+
+
+def _read_source(
+    source_path: Path,
+    source_format: str,
+) -> Iterator[Mapping[str, object]]:
+    match source_format:
+        case "csv":
+            return _read_csv(source_path)
+        case "jsonl":
+            return _read_jsonl(source_path)
+        case "sqlite":
+            return iter_observations(str(source_path))
+        case _:
+            raise UnsupportedImportFormatError(source_format)
+
+
+def _normalized_rows(
+    source_path: Path,
+    source_format: str,
+) -> Iterator[dict[str, ObservationValue]]:
+    for row_number, raw_row in enumerate(
+        _read_source(source_path, source_format),
+        start=1,
+    ):
+        if (row := _normalize_row(raw_row, row_number)) is not None:
+            yield row
+
+
+def _check_column_collisions(keys: Iterable[str]) -> None:
+    """Reject source fields that would share a column once sanitized.
+
+    SQLite column names are case-insensitive, so "outTemp" and "outtemp"
+    collide as well as "Temp F" and "Temp-F".
+    """
+    keys_by_column: dict[str, list[str]] = {}
+    for key in keys:
+        keys_by_column.setdefault(_column_name(key).lower(), []).append(key)
+    for column_keys in keys_by_column.values():
+        if len(column_keys) > 1:
+            raise ImportColumnCollisionError(column_keys, _column_name(column_keys[0]))
+
+
+def detect_import_format(source_path: Path) -> str:
+    """Infer the import format from a file extension."""
+    source_format = _FORMATS_BY_SUFFIX.get(source_path.suffix.lower())
+    if source_format is None:
+        raise UnsupportedImportFormatError(source_path.suffix or source_path.name)
+    return source_format
+
+
+def import_observations(
+    db_path: str,
+    source_path: Path,
+    source_format: str | None = None,
+) -> ImportSummary:
+    """Import historical observations into the observations table.
+
+    The source is read twice: once to collect the union of keys that carry
+    numeric data so the schema is altered in one pass, then again to stream rows
+    into a single batched transaction. Rows without a timestamp are skipped, as
+    are rows whose timestamp already exists in the database. Nothing is
+    imported when a timestamp cannot be parsed or two fields would be stored
+    in the same column.
+
+    Args:
+        db_path: Path to the destination SQLite database
+        source_path: CSV, JSONL or aw2sqlite SQLite file to import
+        source_format: One of IMPORT_FORMATS, inferred from the suffix if None
+
+    Returns:
+        Counts of rows read, imported, skipped as duplicates and skipped as
+        invalid
+
+    Raises:
+        InvalidImportTimestampError: If a row's timestamp cannot be parsed
+        ImportColumnCollisionError: If fields map to the same column name
+
+    """
+    resolved_format = source_format or detect_import_format(source_path)
+    if resolved_format not in IMPORT_FORMATS:
+        raise UnsupportedImportFormatError(resolved_format)
+
+    rows_read = 0
+    rows_with_ts = 0
+    columns: dict[str, None] = {}
+    for raw_row in _read_source(source_path, resolved_format):
+        rows_read += 1
+        if (row := _normalize_row(raw_row, rows_read)) is not None:
+            rows_with_ts += 1
+            columns.update(dict.fromkeys(row))
+    _check_column_collisions(columns)
+
+    rows_imported = bulk_insert_observations(
+        db_path,
+        columns,
+        _normalized_rows(source_path, resolved_format),
+    )
+    return ImportSummary(
+        rows_read=rows_read,
+        rows_imported=rows_imported,
+        rows_duplicate=rows_with_ts - rows_imported,
+        rows_invalid=rows_read - rows_with_ts,
+    )
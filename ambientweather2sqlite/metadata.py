@@ -15,15 +15,17 @@ if TYPE_CHECKING:
 def create_metadata(
     database_path: str,
     live_data_url: str,
+    pool: mureq.ConnectionPool | None = None,
 ) -> tuple[LabelMap, ColumnUnitMap]:
     _database_path = Path(database_path)
     path = _database_path.parent / f"{_database_path.stem}_metadata.json"
     try:
-        labels = extract_labels(mureq.get(live_data_url, auto_retry=True))
+        labels = extract_labels(mureq.get(live_data_url, auto_retry=True, pool=pool))
         units = extract_units(
             mureq.get(
                 urljoin(live_data_url, "station.htm"),
                 auto_retry=True,
+                pool=pool,
             ),
         )
         labels_with_units, column_to_unit = units_for_columns(labels, units)
@@ -50,6 +52,48 @@ def create_metadata(
                         "columns": labels,
                         "units": column_to_unit,
                     },
+                    "observations_text": {
+                        "description": (
+                            "Observations with ts as text, for databases storing "
+                            "it as epoch milliseconds."
+                        ),
+                        "columns": labels,
+                        "units": column_to_unit,
+                    },
+                    "observations_partitions": {
+                        "description": (
+                            "Row counts and ts bounds of the monthly "
+                            "observations_YYYY_MM tables, for databases "
+                            "partitioned by month."
+                        ),
+                    },
+                    "observations_stats": {
+                        "description": (
+                            "Row count, ts bounds and column count of "
+                            "observations, kept current by every write."
+                        ),
+                    },
+                    "observations_change_only": {
+                        "description": (
+                            "Columns stored as NULL while unchanged from the "
+                            "previous observation in the same UTC hour."
+                        ),
+                    },
+                    "observations_change_only_nulls": {
+                        "description": (
+                            "Timestamps where a change-only column's NULL is a "
+                            "missing reading rather than a repeated one."
+                        ),
+                    },
+                    "observations_downsampled": {
+                        "description": (
+                            "Averages of observations older than the retention "
+                            "policy keeps raw, one row per time bucket."
+                        ),
+                        "sort_desc": "ts",
+                        "columns": labels,
+                        "units": column_to_unit,
+                    },
                 },
             },
         },
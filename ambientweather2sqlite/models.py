@@ -1,6 +1,9 @@
 from collections.abc import Mapping
 from dataclasses import dataclass
-from typing import TypedDict
+from typing import TYPE_CHECKING, TypedDict
+
+if TYPE_CHECKING:
+    from datetime import datetime
 
 type SensorValue = int | float | None
 type LiveData = dict[str, SensorValue]
@@ -15,16 +18,92 @@ type HourlyAggregatedData = dict[str, list[AggregatedRow | None]]
 type QueryParams = dict[str, list[str]]
 
 
+@dataclass(frozen=True, slots=True)
+class RetentionPolicy:
+    raw_days: int
+    downsample_minutes: int = 5
+    downsampled_days: int | None = None  # None keeps downsampled rows forever
+
+
 @dataclass(frozen=True, slots=True)
 class AppConfig:
     live_data_url: str
     database_path: str
     port: int | None = None
     log_format: str = "text"
+    flush_every: int = 1
+    flush_interval_seconds: int | None = None
+    max_concurrent_requests: int = 8
+    runtime: str = "threaded"
+    timestamp_storage: str = "text"
+    partitioning: str = "none"
+    retention: RetentionPolicy | None = None
+    change_only_columns: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class LiveSnapshot:
+    data: LiveData
+    labels: LabelMap
+    fetched_at: float  # time.monotonic() when the station page was parsed
+
+
+@dataclass(frozen=True, slots=True)
+class ResponseFormat:
+    pretty: bool = False
+    content_encoding: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedBody:
+    content: bytes
+    content_encoding: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ResponseValidators:
+    etag: str
+    last_modified: datetime | None
+    cache_control: str
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    body: EncodedBody
+    validators: ResponseValidators | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ImportSummary:
+    rows_read: int
+    rows_imported: int
+    rows_duplicate: int
+    rows_invalid: int
+
+
+@dataclass(frozen=True, slots=True)
+class TimestampMigrationSummary:
+    rows_migrated: int
+    rows_dropped: int
+
+
+@dataclass(frozen=True, slots=True)
+class PartitionMigrationSummary:
+    partitions_created: int
+    rows_migrated: int
+    rows_dropped: int
+
+
+@dataclass(frozen=True, slots=True)
+class CompactionSummary:
+    rows_compacted: int
+    buckets_written: int
+    buckets_expired: int
 
 
 class LiveDataMetadata(TypedDict):
     labels: LabelMap
+    age_seconds: float
 
 
 class LiveDataPayload(TypedDict):
@@ -68,11 +147,16 @@ type JsonResponse = (
 )
 
 
-def build_live_data_payload(data: LiveData, labels: LabelMap) -> LiveDataPayload:
+def build_live_data_payload(
+    data: LiveData,
+    labels: LabelMap,
+    age_seconds: float = 0.0,
+) -> LiveDataPayload:
     return {
         "data": data,
         "metadata": {
             "labels": labels,
+            "age_seconds": age_seconds,
         },
     }
 
@@ -7,9 +7,11 @@ mureq is copyright 2021 by its contributors and is released under the
 
 import contextlib
 import io
+import select
 import socket
 import ssl
 import sys
+import threading
 import urllib.parse
 from collections.abc import Generator, MutableMapping
 from http import HTTPStatus
@@ -19,12 +21,15 @@ from http.client import (
     HTTPMessage,
     HTTPResponse,
     HTTPSConnection,
+    RemoteDisconnected,
 )
+from time import monotonic
 from typing import cast
 
 __version__ = "0.3.0"
 
 __all__ = [
+    "ConnectionPool",
     "HTTPException",
     "Response",
     "TooManyRedirects",
@@ -151,6 +156,7 @@ def yield_response(  # noqa: PLR0913
     source_address: str | tuple[str, int] | None = None,
     max_redirects: int | None = None,
     ssl_context: ssl.SSLContext | None = None,
+    pool: ConnectionPool | None = None,
 ) -> Generator[HTTPResponse]:
     """yield_response is a low-level API that exposes the actual
     http.client.HTTPResponse via a contextmanager.
@@ -180,6 +186,8 @@ def yield_response(  # noqa: PLR0913
     :type max_redirects: int or None
     :param ssl_context: TLS config to control certificate validation, or None for default behavior
     :type ssl_context: ssl.SSLContext or None
+    :param pool: keep-alive connections to reuse, or None to open and close a connection per request
+    :type pool: ConnectionPool or None
     :return: http.client.HTTPResponse, yielded as context manager
     :rtype: http.client.HTTPResponse
     :raises: HTTPException
@@ -201,12 +209,20 @@ def yield_response(  # noqa: PLR0913
             source_address=source_address,
             ssl_context=ssl_context,
         )
+        conn, reused = pool.checkout(conn) if pool is not None else (conn, False)
         enc_params = ""  # don't reappend enc_params if we get redirected
         visited_urls.append(url)
+        response: HTTPResponse | None = None
         try:
             try:
-                conn.request(method, path, headers=headers, body=prepared_body)
-                response = conn.getresponse()
+                response = _send_request(
+                    conn,
+                    method,
+                    path,
+                    headers,
+                    prepared_body,
+                    retry_dropped=reused and method in _RETRYABLE_METHODS,
+                )
             except TimeoutError:
                 raise
             except HTTPException:
@@ -226,11 +242,75 @@ def yield_response(  # noqa: PLR0913
                     # 303 See Other: https://developer.mozilla.org/en-US/docs/Web/HTTP/Status/303
                     method = "GET"
         finally:
-            conn.close()
+            if pool is not None and _is_reusable(conn, response):
+                pool.checkin(conn)
+            else:
+                conn.close()
 
     raise TooManyRedirects(visited_urls)
 
 
+class ConnectionPool:
+    """ConnectionPool keeps idle keep-alive connections for reuse, per host.
+
+    Pass it to yield_response (or get, request, ...) as pool=. A connection
+    goes back to the pool only when its response was read to the end and the
+    server did not ask to close it. Before reuse, connections idle longer
+    than idle_timeout or already closed by the server are discarded, and a
+    GET or HEAD that fails because the server dropped a reused connection
+    anyway is retried once on a new connection. The pool is thread-safe;
+    each connection is used by one request at a time.
+    """
+
+    def __init__(self, max_idle_per_host: int = 2, idle_timeout: float = 90) -> None:
+        """Initialize an empty ConnectionPool.
+
+        :param int max_idle_per_host: idle connections kept per host, extra ones are closed
+        :param float idle_timeout: seconds an idle connection may be reused for
+        """  # noqa: E501
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._idle: dict[tuple[object, ...], list[tuple[HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+
+    def checkout(self, conn: HTTPConnection) -> tuple[HTTPConnection, bool]:
+        """Return a live idle connection to conn's host and True, else conn and False.
+
+        A reused connection takes over conn's timeout.
+        """
+        key = _pool_key(conn)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return conn, False
+                candidate, idle_since = idle.pop()
+            if monotonic() - idle_since > self.idle_timeout or _is_stale(candidate):
+                candidate.close()
+                continue
+            candidate.timeout = conn.timeout
+            cast("socket.socket", candidate.sock).settimeout(conn.timeout)
+            return candidate, True
+
+    def checkin(self, conn: HTTPConnection) -> None:
+        """Keep conn for reuse, or close it if its host already has enough idle."""
+        key = _pool_key(conn)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, monotonic()))
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn, _ in conns]
+            self._idle.clear()
+        for conn in idle:
+            conn.close()
+
+
 class Response:
     """Response contains a completely consumed HTTP response."""
 
@@ -330,6 +410,69 @@ _JSON_CONTENTTYPE = "application/json"
 _FORM_CONTENTTYPE = "application/x-www-form-urlencoded"
 
 
+_RETRYABLE_METHODS = frozenset(("GET", "HEAD"))
+
+
+def _send_request(  # noqa: PLR0913
+    conn: HTTPConnection,
+    method: str,
+    path: str,
+    headers: MutableMapping[str, str],
+    body: bytes | str | None,
+    *,
+    retry_dropped: bool = False,
+) -> HTTPResponse:
+    """Send the request on conn and return the response.
+
+    With retry_dropped, a request the server cut off by closing the (reused)
+    connection is sent once more on a new connection.
+    """
+    try:
+        conn.request(method, path, headers=headers, body=body)
+        return conn.getresponse()
+    except RemoteDisconnected, ConnectionResetError, BrokenPipeError:
+        if not retry_dropped:
+            raise
+        conn.close()
+    conn.request(method, path, headers=headers, body=body)
+    return conn.getresponse()
+
+
+def _pool_key(conn: HTTPConnection) -> tuple[object, ...]:
+    return (
+        type(conn),
+        conn.host,
+        conn.port,
+        getattr(conn, "_unix_path", None),
+        conn.source_address,
+    )
+
+
+def _is_stale(conn: HTTPConnection) -> bool:
+    """Return whether an idle connection can no longer carry a request.
+
+    An idle keep-alive socket only becomes readable when the server closed it
+    (or sent something unsolicited), either way it must not be reused.
+    """
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except OSError, ValueError:
+        return True
+    return bool(readable)
+
+
+def _is_reusable(conn: HTTPConnection, response: HTTPResponse | None) -> bool:
+    # http.client drops conn.sock when the server answered Connection: close
+    return (
+        response is not None
+        and response.isclosed()
+        and not response.will_close
+        and conn.sock is not None
+    )
+
+
 class UnixHTTPConnection(HTTPConnection):
     """UnixHTTPConnection is a subclass of HTTPConnection that connects to a
     Unix domain stream socket instead of a TCP address.
@@ -0,0 +1,112 @@
+"""LRU cache of serialized /daily and /hourly responses and their validators."""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .models import CachedResponse
+
+type CacheKey = tuple[object, ...]
+type TimestampWindow = tuple[str, str]
+
+_DEFAULT_MAX_ENTRIES = 128
+_DEFAULT_TTL_SECONDS = 300.0
+
+
+@dataclass(frozen=True, slots=True)
+class _CacheEntry:
+    response: CachedResponse
+    window: TimestampWindow
+    expires_at: float
+
+
+class ResponseCache:
+    """Serialized aggregation responses keyed by normalized query parameters.
+
+    Each entry records the UTC [start, end) ts window its query read. Writers
+    report the ts range of every committed flush through invalidate, which
+    drops only the entries whose window overlaps it, so ranges that end in the
+    past stay cached until evicted. A lookup also misses when the window the
+    key resolves to now differs from the stored one, as happens to relative
+    ranges like days=7 when the local date rolls over. The TTL bounds how long
+    writes from other processes, such as an import, can go unnoticed.
+    Entries keep the validators sent with their body, so a hit answers
+    conditional requests without a database query.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = _DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = _DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[CacheKey, _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped by every invalidation, passed back to put."""
+        return self._generation
+
+    def __len__(self) -> int:
+        """Return the number of cached responses."""
+        return len(self._entries)
+
+    def get(self, key: CacheKey, window: TimestampWindow) -> CachedResponse | None:
+        """Return the cached response for key if it is current for window."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.window != window or entry.expires_at <= monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.response
+
+    def put(
+        self,
+        key: CacheKey,
+        window: TimestampWindow,
+        response: CachedResponse,
+        generation: int,
+    ) -> None:
+        """Store response unless an invalidation ran since generation was read.
+
+        A response computed while a flush committed may predate the new rows,
+        so it is dropped rather than cached.
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = _CacheEntry(
+                response=response,
+                window=window,
+                expires_at=monotonic() + self.ttl_seconds,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, start_ts: str, end_ts: str) -> int:
+        """Drop entries whose window overlaps the inclusive start_ts..end_ts range.
+
+        Returns:
+            The number of entries removed.
+
+        """
+        with self._lock:
+            self._generation += 1
+            stale_keys = [
+                key
+                for key, entry in self._entries.items()
+                if entry.window[0] <= end_ts and start_ts < entry.window[1]
+            ]
+            for key in stale_keys:
+                del self._entries[key]
+            return len(stale_keys)
@@ -0,0 +1,91 @@
+"""Background job applying the configured retention policy to the database."""
+
+import sqlite3
+import threading
+from typing import TYPE_CHECKING
+
+from .database import compact_observations
+from .exceptions import Aw2SqliteError
+
+if TYPE_CHECKING:
+    import logging
+
+    from .models import CompactionSummary, RetentionPolicy
+
+_DEFAULT_INTERVAL_SECONDS = 3600.0
+
+
+class CompactionJob:
+    """Run compact_observations on a daemon thread every interval_seconds.
+
+    The first pass starts as soon as the job does. Each pass opens its own
+    connection and commits in bounded transactions, so it interleaves with
+    the writer's flushes instead of blocking them. Failures are logged and
+    the next pass tries again.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        policy: RetentionPolicy,
+        logger: logging.Logger,
+        interval_seconds: float = _DEFAULT_INTERVAL_SECONDS,
+    ) -> None:
+        self.db_path = db_path
+        self.policy = policy
+        self.interval_seconds = interval_seconds
+        self._logger = logger
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="aw2sqlite-compaction",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        """Start the background thread, which runs a pass immediately."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop after the current transaction and wait for the thread to exit."""
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def run_once(self) -> CompactionSummary | None:
+        """Apply the policy once, returning None if the pass failed."""
+        try:
+            summary = compact_observations(
+                self.db_path,
+                self.policy,
+                should_stop=self._stopped.is_set,
+            )
+        except Aw2SqliteError, sqlite3.Error:
+            self._logger.exception("Compaction of %s failed", self.db_path)
+            return None
+        if summary.rows_compacted or summary.buckets_expired:
+            self._logger.info(
+                "Compacted %s raw rows into %s buckets and expired %s buckets",
+                summary.rows_compacted,
+                summary.buckets_written,
+                summary.buckets_expired,
+            )
+        return summary
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self.run_once()
+            self._stopped.wait(self.interval_seconds)
+
+
+def start_compaction_job(
+    db_path: str,
+    policy: RetentionPolicy | None,
+    logger: logging.Logger,
+) -> CompactionJob | None:
+    """Start a CompactionJob for policy, or return None when there is none."""
+    if policy is None:
+        return None
+    job = CompactionJob(db_path, policy, logger)
+    job.start()
+    return job
@@ -1,29 +1,80 @@
+import gzip
+import hashlib
 import json
 import logging
+import sqlite3
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import zlib
+from contextlib import AbstractContextManager, nullcontext
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, cast, override
+from time import monotonic
+from typing import TYPE_CHECKING, Any, cast, override
 from urllib.parse import parse_qs, unquote, urlparse
 
 from ambientweather2sqlite.exceptions import Aw2SqliteError, InvalidTimezoneError
 
 from . import mureq
-from .awparser import extract_labels, extract_values
+from .awparser import extract_live_data
 from .database import (
+    daily_query_window,
+    hourly_query_window,
     query_daily_aggregated_data,
+    query_data_version,
     query_db_metrics,
     query_hourly_aggregated_data,
     query_latest_timestamp,
 )
 from .models import (
+    CachedResponse,
+    EncodedBody,
+    JsonResponse,
     QueryParams,
+    ResponseFormat,
+    ResponseValidators,
     build_daily_aggregated_payload,
     build_error_payload,
     build_hourly_aggregated_payload,
     build_live_data_payload,
 )
 
+if TYPE_CHECKING:
+    import socket
+    from collections.abc import Callable
+
+    from .models import LiveSnapshot
+    from .response_cache import CacheKey, ResponseCache, TimestampWindow
+    from .snapshot import LiveSnapshotStore
+
+
+_DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+# Idle keep-alive connections do not hold a request slot, but each still has a
+# thread, so at most this many connections per request slot are kept open
+_CONNECTIONS_PER_REQUEST_SLOT = 4
+_TRUE_QUERY_VALUES = frozenset({"1", "true", "yes"})
+# Preferred first when a client accepts several with the same quality
+_SUPPORTED_CONTENT_ENCODINGS = ("gzip", "deflate")
+# Below this size compression overhead outweighs the savings
+_MIN_COMPRESSED_BODY_BYTES = 512
+_COMPRESSION_LEVEL = 6
+_DEFAULT_RESPONSE_FORMAT = ResponseFormat()
+# Idle persistent connections hold a connection slot, so keep the timeout short
+KEEP_ALIVE_TIMEOUT_SECONDS = 5
+KEEP_ALIVE_MAX_REQUESTS = 100
+# Ranges that ended before now only change through imports or backfills, which
+# the ETag reflects; like the response cache's TTL, this bounds how long an
+# import can go unseen by clients that do not revalidate
+_HISTORICAL_CACHE_CONTROL = "public, max-age=300"
+_CURRENT_CACHE_CONTROL = "no-cache"
+
+# printf-style logging callable, matching BaseHTTPRequestHandler.log_message
+type LogFunction = Callable[..., None]
+type RouteResponse = tuple[JsonResponse, int]
+type ResponseHeaders = list[tuple[str, str]]
+
 
 def _tz_from_query(query: QueryParams) -> str:
     if tz_query := query.get("tz", []):
@@ -31,9 +82,440 @@ def _tz_from_query(query: QueryParams) -> str:
     raise InvalidTimezoneError("tz is required")
 
 
+def _query_flag(path: str, name: str) -> bool:
+    values = parse_qs(urlparse(path).query).get(name, [])
+    return bool(values) and values[0].lower() in _TRUE_QUERY_VALUES
+
+
+def negotiate_content_encoding(accept_encoding: str | None) -> str | None:
+    """Pick gzip or deflate from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    wildcard = qualities.get("*", 0.0)
+    best_encoding, best_quality = None, 0.0
+    for encoding in _SUPPORTED_CONTENT_ENCODINGS:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
+
+
+def response_format(path: str, accept_encoding: str | None) -> ResponseFormat:
+    """Read ?pretty=1 and Accept-Encoding into the format for a response."""
+    return ResponseFormat(
+        pretty=_query_flag(path, "pretty"),
+        content_encoding=negotiate_content_encoding(accept_encoding),
+    )
+
+
+def encode_json(payload: object, *, pretty: bool = False) -> bytes:
+    """Serialize a payload compactly, or indented when pretty is requested."""
+    if pretty:
+        return json.dumps(payload, indent=2).encode("utf-8")
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def encode_body(
+    payload: object,
+    response_format: ResponseFormat = _DEFAULT_RESPONSE_FORMAT,
+) -> EncodedBody:
+    """Serialize a payload and compress it when the client accepts it."""
+    content = encode_json(payload, pretty=response_format.pretty)
+    encoding = response_format.content_encoding
+    if encoding is None or len(content) < _MIN_COMPRESSED_BODY_BYTES:
+        return EncodedBody(content)
+    if encoding == "gzip":
+        return EncodedBody(
+            gzip.compress(content, compresslevel=_COMPRESSION_LEVEL, mtime=0),
+            encoding,
+        )
+    return EncodedBody(zlib.compress(content, _COMPRESSION_LEVEL), encoding)
+
+
+def body_headers(body: EncodedBody, status: int) -> ResponseHeaders:
+    """Return the Content-Length, Content-Encoding and Vary headers for a body."""
+    headers = [("Vary", "Accept-Encoding")]
+    if body.content_encoding is not None:
+        headers.append(("Content-Encoding", body.content_encoding))
+    if status != HTTPStatus.NOT_MODIFIED:
+        headers.append(("Content-Length", str(len(body.content))))
+    return headers
+
+
+def keep_alive_headers(
+    requests_served: int,
+    *,
+    client_keep_alive: bool,
+    http_1_0: bool = False,
+) -> tuple[ResponseHeaders, bool]:
+    """Return the connection headers for a response and whether to close after it.
+
+    Persistent connections are closed after KEEP_ALIVE_MAX_REQUESTS responses.
+    HTTP/1.0 clients only stay connected when they sent Connection: keep-alive.
+    """
+    if not client_keep_alive or requests_served >= KEEP_ALIVE_MAX_REQUESTS:
+        return [("Connection", "close")], True
+    remaining = KEEP_ALIVE_MAX_REQUESTS - requests_served
+    headers = [
+        ("Keep-Alive", f"timeout={KEEP_ALIVE_TIMEOUT_SECONDS}, max={remaining}"),
+    ]
+    if http_1_0:
+        headers.append(("Connection", "keep-alive"))
+    return headers, False
+
+
+def error_response(
+    log: LogFunction,
+    error: Exception,
+    status: int,
+) -> RouteResponse:
+    """Log an exception and build its JSON error response."""
+    log("%s\n%s", type(error).__name__, str(error))
+    return build_error_payload(str(error)), status
+
+
+def live_data_response(
+    body: str,
+    snapshots: LiveSnapshotStore | None = None,
+) -> RouteResponse:
+    """Build the GET / response from a freshly fetched station live data page.
+
+    The parsed page is published to snapshots, when given, so later requests
+    can be answered without another station fetch.
+    """
+    data, labels = extract_live_data(body)
+    if snapshots is not None:
+        snapshots.publish(data, labels)
+    return build_live_data_payload(data, labels), 200
+
+
+def live_snapshot_response(snapshot: LiveSnapshot) -> RouteResponse:
+    """Build the GET / response from the poller's latest parsed page."""
+    age_seconds = round(monotonic() - snapshot.fetched_at, 3)
+    return build_live_data_payload(snapshot.data, snapshot.labels, age_seconds), 200
+
+
+def cached_live_snapshot(
+    snapshots: LiveSnapshotStore | None,
+    path: str,
+) -> LiveSnapshot | None:
+    """Return the snapshot to serve for GET /, or None to fetch from the station.
+
+    The station is only asked directly when there is no poller publishing
+    snapshots, nothing has been published yet, or the client sent ?fresh=1.
+    """
+    if snapshots is None or _query_flag(path, "fresh"):
+        return None
+    return snapshots.latest()
+
+
+def _daily_response(
+    db_path: str,
+    query: QueryParams,
+    log: LogFunction,
+) -> RouteResponse:
+    try:
+        aggregation_fields = query.get("q", [])
+
+        prior_days = 7
+        prior_days_query = query.get("days", [])
+        if len(prior_days_query) != 0:
+            try:
+                prior_days = int(prior_days_query[0])
+            except (ValueError, TypeError) as e:
+                message = f"days must be int, got {prior_days_query[0]}"
+                log("%s\n%s", type(e).__name__, message)
+                return build_error_payload(message), 400
+
+        data = query_daily_aggregated_data(
+            db_path=db_path,
+            aggregation_fields=aggregation_fields,
+            prior_days=prior_days,
+            tz=_tz_from_query(query),
+        )
+        return build_daily_aggregated_payload(data), 200
+    except Aw2SqliteError as e:
+        return error_response(log, e, 400)
+    except Exception as e:  # noqa: BLE001
+        return error_response(log, e, 500)
+
+
+def _hourly_response(
+    db_path: str,
+    query: QueryParams,
+    log: LogFunction,
+) -> RouteResponse:
+    try:
+        aggregation_fields = query.get("q", [])
+        start_date = query.get("start_date", []) or query.get("date", [])
+        end_date = query.get("end_date", [])
+
+        if not start_date:
+            return build_error_payload(
+                "start_date or date required e.g. /hourly?start_date=2025-06-22&tz=UTC",
+            ), 400
+
+        data = query_hourly_aggregated_data(
+            db_path=db_path,
+            aggregation_fields=aggregation_fields,
+            start_date=start_date[0],
+            end_date=end_date[0] if end_date else None,
+            tz=_tz_from_query(query),
+        )
+        return build_hourly_aggregated_payload(data), 200
+    except Aw2SqliteError as e:
+        return error_response(log, e, 400)
+    except Exception as e:  # noqa: BLE001
+        return error_response(log, e, 500)
+
+
+def _health_response(db_path: str, log: LogFunction) -> RouteResponse:
+    try:
+        metrics = query_db_metrics(db_path)
+    except Exception as e:  # noqa: BLE001
+        return error_response(log, e, 500)
+    return {
+        "status": "ok",
+        "last_observation_ts": metrics["latest_ts"],
+        "row_count": metrics["row_count"],
+    }, 200
+
+
+def _metrics_response(db_path: str, log: LogFunction) -> RouteResponse:
+    try:
+        return query_db_metrics(db_path), 200
+    except Exception as e:  # noqa: BLE001
+        return error_response(log, e, 500)
+
+
+def route_database_request(
+    db_path: str,
+    path: str,
+    log: LogFunction,
+) -> RouteResponse:
+    """Answer every GET route except the live data root from the database.
+
+    Shared by the threaded handler and the asyncio runtime so both expose the
+    same API. The call blocks on SQLite and is safe to run on any thread.
+    """
+    query: QueryParams = parse_qs(urlparse(path).query)
+    match path.partition("?")[0]:
+        case "/daily":
+            return _daily_response(db_path, query, log)
+        case "/hourly":
+            return _hourly_response(db_path, query, log)
+        case "/health":
+            return _health_response(db_path, log)
+        case "/metrics":
+            return _metrics_response(db_path, log)
+        case _:
+            return build_error_payload("Not found"), 404
+
+
+def _cache_entry(path: str) -> tuple[CacheKey, TimestampWindow] | None:
+    """Return the cache key and UTC ts window for a cacheable request.
+
+    Only well-formed /daily and /hourly requests are cacheable; anything the
+    route would reject returns None and is answered uncached.
+    """
+    query: QueryParams = parse_qs(urlparse(path).query)
+    route = path.partition("?")[0]
+    aggregation_fields = tuple(query.get("q", []))
+    try:
+        tz = _tz_from_query(query)
+        match route:
+            case "/daily":
+                days = query.get("days", [])
+                prior_days = int(days[0]) if days else 7
+                key = (route, aggregation_fields, prior_days, tz)
+                return key, daily_query_window(prior_days, tz)
+            case "/hourly":
+                start_date = query.get("start_date", []) or query.get("date", [])
+                if not start_date:
+                    return None
+                end_date = query.get("end_date", [None])[0]
+                key = (route, aggregation_fields, start_date[0], end_date, tz)
+                return key, hourly_query_window(start_date[0], end_date, tz)
+            case _:
+                return None
+    except Aw2SqliteError, ValueError:
+        return None
+
+
+def database_response(
+    db_path: str,
+    path: str,
+    log: LogFunction,
+    cache: ResponseCache | None = None,
+    response_format: ResponseFormat = _DEFAULT_RESPONSE_FORMAT,
+) -> tuple[EncodedBody, int]:
+    """Answer a database route with an encoded body, consulting the cache.
+
+    Successful /daily and /hourly bodies are cached per response format after
+    serialization and compression, so a repeated dashboard query skips the
+    aggregation, json.dumps and gzip.
+    """
+    entry = _cache_entry(path) if cache is not None else None
+    if cache is None or entry is None:
+        payload, status = route_database_request(db_path, path, log)
+        return encode_body(payload, response_format), status
+
+    key, window = entry
+    key = (*key, response_format)
+    if (cached := cache.get(key, window)) is not None:
+        return cached.body, HTTPStatus.OK
+    generation = cache.generation
+    payload, status = route_database_request(db_path, path, log)
+    body = encode_body(payload, response_format)
+    if status == HTTPStatus.OK:
+        cache.put(key, window, CachedResponse(body), generation)
+    return body, status
+
+
+def response_validators(
+    db_path: str,
+    path: str,
+    response_format: ResponseFormat = _DEFAULT_RESPONSE_FORMAT,
+) -> ResponseValidators | None:
+    """Return ETag, Last-Modified and Cache-Control for a /daily or /hourly request.
+
+    The ETag hashes the normalized query, the response format, its UTC ts
+    window, the latest ts before the window ends, found with one ts index
+    lookup, and the window's data version, which imports into it change. New
+    observations after a historical window leave its ETag unchanged.
+    Last-Modified is left out when the latest ts cannot be parsed.
+    """
+    if (entry := _cache_entry(path)) is None:
+        return None
+    key, (start_ts, end_ts) = entry
+    try:
+        latest_ts = query_latest_timestamp(db_path, before=end_ts)
+        data_version = query_data_version(db_path, start_ts, end_ts)
+    except sqlite3.Error:
+        return None
+    fingerprint = repr(
+        (key, response_format, start_ts, end_ts, latest_ts, data_version),
+    ).encode("utf-8")
+    last_modified = None
+    if latest_ts is not None:
+        try:
+            last_modified = datetime.fromisoformat(latest_ts).replace(
+                tzinfo=UTC,
+                microsecond=0,
+            )
+        except ValueError:
+            last_modified = None
+    historical = end_ts <= datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
+    return ResponseValidators(
+        etag=f'"{hashlib.sha256(fingerprint).hexdigest()[:32]}"',
+        last_modified=last_modified,
+        cache_control=(
+            _HISTORICAL_CACHE_CONTROL if historical else _CURRENT_CACHE_CONTROL
+        ),
+    )
+
+
+def _validator_headers(validators: ResponseValidators) -> ResponseHeaders:
+    headers = [
+        ("ETag", validators.etag),
+        ("Cache-Control", validators.cache_control),
+    ]
+    if validators.last_modified is not None:
+        headers.append(
+            ("Last-Modified", format_datetime(validators.last_modified, usegmt=True)),
+        )
+    return headers
+
+
+def is_not_modified(
+    validators: ResponseValidators,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+) -> bool:
+    """Evaluate conditional request headers; If-None-Match takes precedence."""
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or validators.etag in tags
+    if if_modified_since is None or validators.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except TypeError, ValueError:
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    return validators.last_modified <= since
+
+
+def conditional_database_response(  # noqa: PLR0913
+    db_path: str,
+    path: str,
+    log: LogFunction,
+    cache: ResponseCache | None = None,
+    response_format: ResponseFormat = _DEFAULT_RESPONSE_FORMAT,
+    *,
+    if_none_match: str | None = None,
+    if_modified_since: str | None = None,
+) -> tuple[EncodedBody, int, ResponseHeaders]:
+    """Answer a database route, short-circuiting to 304 when the client is current.
+
+    A cached response is sent with the validators cached alongside it, so a
+    cache hit reads nothing from the database. Otherwise the validators are
+    computed first, and the aggregation only runs when the client is stale.
+
+    Returns:
+        The encoded body (empty for 304), the status and the validator
+        headers to send with it.
+
+    """
+    entry = _cache_entry(path)
+    if entry is None:
+        return *database_response(db_path, path, log, cache, response_format), []
+    key, window = entry
+    key = (*key, response_format)
+    cached = cache.get(key, window) if cache is not None else None
+    validators = cached.validators if cached is not None else None
+    # Read before the validators so a flush committing meanwhile keeps them
+    # and the body below out of the cache
+    generation = cache.generation if cache is not None else 0
+    if validators is None:
+        validators = response_validators(db_path, path, response_format)
+    headers = [] if validators is None else _validator_headers(validators)
+    if validators is not None and is_not_modified(
+        validators,
+        if_none_match,
+        if_modified_since,
+    ):
+        return EncodedBody(b""), HTTPStatus.NOT_MODIFIED, headers
+    if cached is not None:
+        return cached.body, HTTPStatus.OK, headers
+
+    payload, status = route_database_request(db_path, path, log)
+    body = encode_body(payload, response_format)
+    if status != HTTPStatus.OK:
+        return body, status, []
+    if cache is not None:
+        cache.put(key, window, CachedResponse(body, validators), generation)
+    return body, status, headers
+
+
 def create_request_handler(  # noqa: C901
     live_data_url: str,
     db_path: str,
+    snapshots: LiveSnapshotStore | None = None,
+    response_cache: ResponseCache | None = None,
+    station_pool: mureq.ConnectionPool | None = None,
 ) -> type[BaseHTTPRequestHandler]:
     log_path = Path(db_path).parent / f"{Path(db_path).stem}_server.log"
 
@@ -41,6 +523,9 @@ def create_request_handler(  # noqa: C901
         LIVE_DATA_URL = live_data_url
         DB_PATH = db_path
         LOG_PATH = log_path
+        SNAPSHOTS = snapshots
+        STATION_POOL = station_pool
+        RESPONSE_CACHE = response_cache
         _logger: logging.Logger = logging.getLogger(
             f"{__name__}.JSONHandler.{LOG_PATH}",
         )
@@ -79,150 +564,180 @@ def create_request_handler(  # noqa: C901
                 f"{message}",
             )
 
-        def _set_headers(self, status: int = 200) -> None:
+        # Persistent connections: every response carries Content-Length, idle
+        # connections are dropped after timeout seconds and each connection
+        # serves at most KEEP_ALIVE_MAX_REQUESTS responses.
+        protocol_version = "HTTP/1.1"
+        timeout = KEEP_ALIVE_TIMEOUT_SECONDS
+        requests_served = 0
+        response_format: ResponseFormat = _DEFAULT_RESPONSE_FORMAT
+
+        @override
+        def handle_one_request(self) -> None:
+            # The idle timeout only bounds the wait for the next request; do_GET
+            # clears it so a slow client can still receive a large body
+            self.connection.settimeout(self.timeout)
+            super().handle_one_request()
+
+        def _request_slot(self) -> AbstractContextManager[object]:
+            if isinstance(self.server, BoundedThreadingHTTPServer):
+                return self.server.request_slots
+            return nullcontext()
+
+        def _set_headers(
+            self,
+            status: int = 200,
+            headers: ResponseHeaders | None = None,
+        ) -> None:
             """Set common headers for JSON responses."""
             self.send_response(status)
             self.send_header("Content-type", "application/json")
             self.send_header("Access-Control-Allow-Origin", "*")  # Enable CORS
+            self.requests_served += 1
+            connection_headers, self.close_connection = keep_alive_headers(
+                self.requests_served,
+                client_keep_alive=not self.close_connection,
+                http_1_0=self.request_version == "HTTP/1.0",
+            )
+            for name, value in [*connection_headers, *(headers or [])]:
+                self.send_header(name, value)
             self.end_headers()
 
-        def _send_json(self, data: object, status: int = 200) -> None:
-            """Helper method to send JSON response."""
+        def _send_body(
+            self,
+            body: EncodedBody,
+            status: int = 200,
+            headers: ResponseHeaders | None = None,
+        ) -> None:
+            """Send an already encoded JSON body."""
             try:
-                self._set_headers(status)
-                json_string = json.dumps(data, indent=2)
-                self.wfile.write(json_string.encode("utf-8"))
-            except BrokenPipeError:
-                self.log_message("%s", "BrokenPipeError")
-
-        def _send_live_data(self) -> None:
-            try:
-                body = mureq.get(self.LIVE_DATA_URL, auto_retry=True)
-            except Exception as e:  # noqa: BLE001
-                self.log_message("%s\n%s", type(e).__name__, str(e))
-                self._send_json(build_error_payload(str(e)), 500)
-                return
-            values = extract_values(body)
-            labels = extract_labels(body)
-            self._send_json(build_live_data_payload(values, labels))
-
-        def _send_daily_aggregated_data(self) -> None:
-            try:
-                query: QueryParams = parse_qs(urlparse(self.path).query)
-                aggregation_fields = query.get("q", [])
-
-                prior_days = 7
-                prior_days_query = query.get("days", [])
-                if len(prior_days_query) != 0:
-                    try:
-                        prior_days = int(prior_days_query[0])
-                    except (ValueError, TypeError) as e:
-                        self.log_message(
-                            "%s\n%s",
-                            type(e).__name__,
-                            f"days must be int, got {prior_days_query[0]}",
-                        )
-                        self._send_json(
-                            build_error_payload(
-                                f"days must be int, got {prior_days_query[0]}",
-                            ),
-                            400,
-                        )
-                        return
-
-                data = query_daily_aggregated_data(
-                    db_path=self.DB_PATH,
-                    aggregation_fields=aggregation_fields,
-                    prior_days=prior_days,
-                    tz=_tz_from_query(query),
-                )
-                self._send_json(build_daily_aggregated_payload(data))
-            except Aw2SqliteError as e:
-                self.log_message("%s\n%s", type(e).__name__, str(e))
-                self._send_json(build_error_payload(str(e)), 400)
-            except Exception as e:  # noqa: BLE001
-                self.log_message("%s\n%s", type(e).__name__, str(e))
-                self._send_json(build_error_payload(str(e)), 500)
-
-        def _send_hourly_aggregated_data(self) -> None:
-            try:
-                query: QueryParams = parse_qs(urlparse(self.path).query)
-                aggregation_fields = query.get("q", [])
-                start_date = query.get("start_date", []) or query.get("date", [])
-                end_date = query.get("end_date", [])
-
-                if not start_date:
-                    self._send_json(
-                        build_error_payload(
-                            "start_date or date required e.g. /hourly?start_date=2025-06-22&tz=UTC",  # noqa: E501
-                        ),
-                        400,
-                    )
-                    return
-
-                data = query_hourly_aggregated_data(
-                    db_path=self.DB_PATH,
-                    aggregation_fields=aggregation_fields,
-                    start_date=start_date[0],
-                    end_date=end_date[0] if end_date else None,
-                    tz=_tz_from_query(query),
+                self._set_headers(
+                    status,
+                    [*body_headers(body, status), *(headers or [])],
                 )
-                self._send_json(build_hourly_aggregated_payload(data))
-            except Aw2SqliteError as e:
-                self.log_message("%s\n%s", type(e).__name__, str(e))
-                self._send_json(build_error_payload(str(e)), 400)
-            except Exception as e:  # noqa: BLE001
-                self.log_message("%s\n%s", type(e).__name__, str(e))
-                self._send_json(build_error_payload(str(e)), 500)
+                if body.content:
+                    self.wfile.write(body.content)
+            except (BrokenPipeError, TimeoutError) as e:
+                self.log_message("%s", type(e).__name__)
 
-        def _send_health(self) -> None:
+        def _live_data_response(self) -> RouteResponse:
+            if (
+                snapshot := cached_live_snapshot(self.SNAPSHOTS, self.path)
+            ) is not None:
+                return live_snapshot_response(snapshot)
             try:
-                latest_ts = query_latest_timestamp(self.DB_PATH)
-                metrics = query_db_metrics(self.DB_PATH)
-                self._send_json(
-                    {
-                        "status": "ok",
-                        "last_observation_ts": latest_ts,
-                        "row_count": metrics["row_count"],
-                    },
+                body = mureq.get(
+                    self.LIVE_DATA_URL,
+                    auto_retry=True,
+                    pool=self.STATION_POOL,
                 )
             except Exception as e:  # noqa: BLE001
-                self.log_message("%s\n%s", type(e).__name__, str(e))
-                self._send_json(build_error_payload(str(e)), 500)
-
-        def _send_metrics(self) -> None:
-            try:
-                self._send_json(query_db_metrics(self.DB_PATH))
-            except Exception as e:  # noqa: BLE001
-                self.log_message("%s\n%s", type(e).__name__, str(e))
-                self._send_json(build_error_payload(str(e)), 500)
+                return error_response(self.log_message, e, 500)
+            return live_data_response(body, self.SNAPSHOTS)
 
         def do_GET(self) -> None:
-            match self.path.split("?")[0]:
-                case "/":
-                    self._send_live_data()
-                case "/daily":
-                    self._send_daily_aggregated_data()
-                case "/hourly":
-                    self._send_hourly_aggregated_data()
-                case "/health":
-                    self._send_health()
-                case "/metrics":
-                    self._send_metrics()
-                case _:
-                    self._send_json(build_error_payload("Not found"), 404)
+            self.connection.settimeout(None)
+            self.response_format = response_format(
+                self.path,
+                self.headers.get("Accept-Encoding"),
+            )
+            # Only building the response takes a request slot; sending it to a
+            # slow client does not hold up other requests
+            with self._request_slot():
+                if self.path.partition("?")[0] == "/":
+                    data, status = self._live_data_response()
+                    response = encode_body(data, self.response_format), status, []
+                else:
+                    response = conditional_database_response(
+                        self.DB_PATH,
+                        self.path,
+                        self.log_message,
+                        self.RESPONSE_CACHE,
+                        self.response_format,
+                        if_none_match=self.headers.get("If-None-Match"),
+                        if_modified_since=self.headers.get("If-Modified-Since"),
+                    )
+            self._send_body(*response)
 
     JSONHandler.setup_logger()
     return JSONHandler
 
 
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    """Handle each request on its own thread, at most max_concurrent_requests at once.
+
+    Handlers take one of the request_slots while they build a response, so a
+    burst of slow aggregations waits for a free slot rather than running all at
+    once. Idle keep-alive connections hold no request slot. Each connection has
+    its own thread, and the accept loop waits once
+    max_concurrent_requests * _CONNECTIONS_PER_REQUEST_SLOT are open, so
+    connections queue in the listen backlog rather than spawning unbounded
+    threads. Handlers share no database state: every query opens its own
+    read-only connection.
+    """
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        handler_class: type[BaseHTTPRequestHandler],
+        max_concurrent_requests: int = _DEFAULT_MAX_CONCURRENT_REQUESTS,
+    ) -> None:
+        self.request_slots = threading.BoundedSemaphore(max_concurrent_requests)
+        self._connection_slots = threading.BoundedSemaphore(
+            max_concurrent_requests * _CONNECTIONS_PER_REQUEST_SLOT,
+        )
+        super().__init__(server_address, handler_class)
+
+    @override
+    def process_request(
+        self,
+        request: socket.socket | tuple[bytes, socket.socket],
+        client_address: tuple[str, int],
+    ) -> None:
+        self._connection_slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self._connection_slots.release()
+            raise
+
+    @override
+    def process_request_thread(
+        self,
+        request: socket.socket | tuple[bytes, socket.socket],
+        client_address: tuple[str, int],
+    ) -> None:
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._connection_slots.release()
+
+
 class Server:
-    def __init__(self, live_data_url: str, db_path: str, port: int, host: str):
-        handler_class = create_request_handler(live_data_url, db_path)
+    def __init__(  # noqa: PLR0913
+        self,
+        live_data_url: str,
+        db_path: str,
+        port: int,
+        host: str,
+        *,
+        max_concurrent_requests: int = _DEFAULT_MAX_CONCURRENT_REQUESTS,
+        snapshots: LiveSnapshotStore | None = None,
+        response_cache: ResponseCache | None = None,
+        station_pool: mureq.ConnectionPool | None = None,
+    ):
+        handler_class = create_request_handler(
+            live_data_url,
+            db_path,
+            snapshots,
+            response_cache,
+            station_pool,
+        )
         self._teardown_logger = cast("Any", handler_class).teardown_logger
-        self.httpd = HTTPServer(
+        self.httpd = BoundedThreadingHTTPServer(
             (host, port),
             handler_class,
+            max_concurrent_requests,
         )
         self.server_thread = threading.Thread(
             target=self.httpd.serve_forever,
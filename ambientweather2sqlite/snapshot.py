@@ -0,0 +1,32 @@
+"""In-process copy of the latest station page, shared by the poller and the API."""
+
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from .models import LiveSnapshot
+
+if TYPE_CHECKING:
+    from .models import LabelMap, LiveData
+
+
+class LiveSnapshotStore:
+    """Hold the most recently parsed live data and labels.
+
+    The poller publishes after every successful fetch and API handlers read
+    the latest snapshot instead of asking the station again. Snapshots are
+    immutable and replaced with a single reference assignment, so readers on
+    other threads never see a partially updated value and no lock is needed.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: LiveSnapshot | None = None
+
+    def publish(self, data: LiveData, labels: LabelMap) -> LiveSnapshot:
+        """Replace the latest snapshot with a newly parsed station page."""
+        snapshot = LiveSnapshot(data=data, labels=labels, fetched_at=monotonic())
+        self._snapshot = snapshot
+        return snapshot
+
+    def latest(self) -> LiveSnapshot | None:
+        """Return the most recent snapshot, or None before the first fetch."""
+        return self._snapshot
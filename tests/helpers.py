@@ -0,0 +1,88 @@
+"""Helpers shared by the database tests."""
+
+import sqlite3
+import tempfile
+from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+ROLLUP_TABLE = "observations_hourly"
+STATS_TABLE = "observations_stats"
+
+# SQLite virtual machine instructions between progress handler callbacks
+PROGRESS_STEP = 100
+
+
+@dataclass
+class QueryTrace:
+    """Statements run and VM steps taken by connections opened while tracing."""
+
+    statements: list[str] = field(default_factory=list)
+    steps: int = 0
+
+    def count_step(self) -> int:
+        """Progress handler counting VM steps; returning 0 continues the query."""
+        self.steps += 1
+        return 0
+
+
+@contextmanager
+def database_copy(db_path: str, *drop_tables: str) -> Iterator[str]:
+    """Yield the path of a temporary copy of db_path without drop_tables."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        copy_path = str(Path(temp_dir) / Path(db_path).name)
+        with (
+            closing(sqlite3.connect(db_path)) as source,
+            closing(sqlite3.connect(copy_path)) as target,
+        ):
+            source.backup(target)
+            for table_name in drop_tables:
+                target.execute(f"DROP TABLE IF EXISTS {table_name}")
+            target.commit()
+        yield copy_path
+
+
+def query_raw[T](
+    query: Callable[..., T],
+    db_path: str,
+    *args,
+    **kwargs: object,
+) -> T:
+    """Run query against a copy of db_path whose hourly rollups were dropped.
+
+    Without rollups every query aggregates the raw observation rows.
+    """
+    with database_copy(db_path, ROLLUP_TABLE) as raw_path:
+        return query(raw_path, *args, **kwargs)
+
+
+@contextmanager
+def trace_queries() -> Iterator[QueryTrace]:
+    """Trace every connection the package opens until the block exits.
+
+    Connections keep reporting to the trace after the block, so one opened
+    inside it, like an ObservationWriter's, can be traced for its lifetime.
+    """
+    trace = QueryTrace()
+    connect = sqlite3.connect
+
+    def traced_connect(*args, **kwargs: object) -> sqlite3.Connection:
+        conn = connect(*args, **kwargs)
+        conn.set_progress_handler(trace.count_step, PROGRESS_STEP)
+        conn.set_trace_callback(trace.statements.append)
+        return conn
+
+    with patch("ambientweather2sqlite.database.sqlite3.connect", traced_connect):
+        yield trace
+
+
+def query_plan(db_path: str, statement: str) -> list[str]:
+    """Return the EXPLAIN QUERY PLAN details of an expanded statement."""
+    with closing(sqlite3.connect(db_path)) as conn:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+    return [row[-1] for row in rows]
@@ -0,0 +1,215 @@
+import asyncio
+import io
+import json
+import logging
+import socket
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing, redirect_stdout
+from functools import partial
+from http.client import HTTPException
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from ambientweather2sqlite import async_runtime
+from ambientweather2sqlite.async_runtime import (
+    _ApiContext,
+    _handle_connection,
+    fetch_live_page,
+    run_event_loop,
+)
+from ambientweather2sqlite.database import create_database_if_not_exists
+
+_LIVE_PAGE = "<html><input name='outTemp' value='70.0'></html>"
+
+
+class _LivePageHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = _LIVE_PAGE.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class TestFetchLivePage(IsolatedAsyncioTestCase):
+    async def test_fetch_returns_body(self):
+        httpd = HTTPServer(("127.0.0.1", 0), _LivePageHandler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            port = httpd.server_address[1]
+            body = await fetch_live_page(f"http://127.0.0.1:{port}/livedata.htm")
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+        self.assertEqual(body, _LIVE_PAGE)
+
+    async def test_refused_connection_raises_http_exception(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        with self.assertRaises(HTTPException):
+            await fetch_live_page(f"http://127.0.0.1:{port}/livedata.htm")
+
+    async def test_silent_station_times_out(self):
+        async def never_respond(
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter,
+        ) -> None:
+            # Holding the writer keeps the connection open until the client
+            # gives up and closes it
+            await reader.read()
+            writer.close()
+
+        server = await asyncio.start_server(never_respond, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            with self.assertRaises(TimeoutError):
+                await fetch_live_page(
+                    f"http://127.0.0.1:{port}/livedata.htm",
+                    timeout=0.1,
+                )
+        finally:
+            server.close()
+            await server.wait_closed()
+
+
+class TestAsyncRuntime(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.temp_dir.name) / "weather.db")
+        create_database_if_not_exists(self.db_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    async def _request(self, port: int, request_line: str) -> tuple[int, dict]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            f"{request_line}\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode(
+                "ascii",
+            ),
+        )
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        await writer.wait_closed()
+        head, _, body = response.partition(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        return status, json.loads(body)
+
+    async def test_connection_handler_serves_database_routes(self):
+        with async_runtime.ThreadPoolExecutor(max_workers=2) as query_executor:
+            context = _ApiContext(
+                live_data_url="http://127.0.0.1:9",
+                db_path=self.db_path,
+                query_executor=query_executor,
+                log=logging.getLogger(__name__).debug,
+            )
+            server = await asyncio.start_server(
+                partial(_handle_connection, context=context),
+                "127.0.0.1",
+                0,
+            )
+            port = server.sockets[0].getsockname()[1]
+            try:
+                health_status, health = await self._request(
+                    port,
+                    "GET /health HTTP/1.1",
+                )
+                missing_status, missing = await self._request(
+                    port,
+                    "GET /nope HTTP/1.1",
+                )
+                post_status, _ = await self._request(port, "POST /health HTTP/1.1")
+            finally:
+                server.close()
+
+        self.assertEqual(health_status, 200)
+        self.assertEqual(health["status"], "ok")
+        self.assertEqual(missing_status, 404)
+        self.assertEqual(missing["error"], "Not found")
+        self.assertEqual(post_status, 501)
+
+    async def test_connection_handler_keeps_connections_alive(self):
+        with async_runtime.ThreadPoolExecutor(max_workers=1) as query_executor:
+            context = _ApiContext(
+                live_data_url="http://127.0.0.1:9",
+                db_path=self.db_path,
+                query_executor=query_executor,
+                log=logging.getLogger(__name__).debug,
+            )
+            server = await asyncio.start_server(
+                partial(_handle_connection, context=context),
+                "127.0.0.1",
+                0,
+            )
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            try:
+                heads = []
+                for connection in ("keep-alive", "close"):
+                    writer.write(
+                        "GET /health HTTP/1.1\r\nHost: localhost\r\n"
+                        f"Connection: {connection}\r\n\r\n".encode("ascii"),
+                    )
+                    await writer.drain()
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                    await reader.readexactly(length)
+                    heads.append(head)
+                trailing = await reader.read()
+            finally:
+                writer.close()
+                await writer.wait_closed()
+                server.close()
+
+        self.assertIn(b"Keep-Alive: timeout=5, max=99\r\n", heads[0])
+        self.assertIn(b"Connection: close\r\n", heads[1])
+        self.assertEqual(trailing, b"")
+
+    async def test_event_loop_polls_and_stores_observations(self):
+        fetch = AsyncMock(return_value=_LIVE_PAGE)
+        loop = asyncio.get_running_loop()
+        stored = asyncio.Event()
+        with (
+            patch.object(async_runtime, "fetch_live_page", fetch),
+            patch.object(
+                async_runtime.ResponseCache,
+                "invalidate",
+                side_effect=lambda *_: loop.call_soon_threadsafe(stored.set),
+            ),
+            patch.object(
+                async_runtime.LiveDataExtractor,
+                "extract",
+                return_value=({"outTemp": 70}, {}),
+            ),
+            redirect_stdout(io.StringIO()),
+        ):
+            task = asyncio.create_task(
+                run_event_loop(
+                    "http://127.0.0.1:9",
+                    self.db_path,
+                    labels={},
+                    logger=logging.getLogger(__name__),
+                    period_seconds=60,
+                ),
+            )
+            await stored.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            rows = conn.execute("SELECT outTemp FROM observations").fetchall()
+        self.assertEqual(rows, [(70.0,)])
+        fetch.assert_awaited_once_with("http://127.0.0.1:9")
@@ -1,8 +1,62 @@
-from unittest import TestCase
+import os
+import timeit
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
 
-from ambientweather2sqlite.awparser import extract_labels, extract_units, extract_values
+from ambientweather2sqlite import awparser
+from ambientweather2sqlite.awparser import (
+    DisabledInputParser,
+    LiveDataExtractor,
+    extract_labels,
+    extract_live_data,
+    extract_units,
+    extract_values,
+    scan_disabled_inputs,
+    scan_live_data,
+)
 from ambientweather2sqlite.units_mapping import Units
 
+# Wall-clock comparisons depend on machine load, so they only run on request
+timing_test = skipUnless(
+    os.environ.get("AW2SQLITE_TIMING_TESTS") == "1",
+    "set AW2SQLITE_TIMING_TESTS=1 to run wall-clock comparisons",
+)
+
+_LIVEDATA_ROW = (
+    '<tr><td class="item_1">{label}</td><td class="item_2">'
+    '<input name="{name}" disabled="disabled" type="text" class="item_2" '
+    'style="WIDTH: 80px" value="{value}" maxlength="25" /></td></tr>\n'
+)
+
+
+def livedata_page(sensor_count: int = 40) -> str:
+    """Build a page shaped like a station's livedata.htm."""
+    rows = [
+        _LIVEDATA_ROW.format(label="Receiver Time", name="CurrTime", value="12:00"),
+        _LIVEDATA_ROW.format(label="Indoor Sensor ID", name="inBattSta", value="1"),
+    ]
+    rows += [
+        _LIVEDATA_ROW.format(label=f"Sensor {i}", name=f"sensor{i}", value=i * 1.5)
+        for i in range(sensor_count)
+    ]
+    return (
+        "<!DOCTYPE html>\n<html><head><title>Live Data</title>"
+        '<link rel="stylesheet" href="css/c.css">'
+        "<style>td { width: 50%; }</style>"
+        '<script type="text/javascript">if (a<b) { refresh(); }</script>'
+        "</head><body><!-- form generated by the station -->"
+        '<form name="live"><table border="0">\n'
+        f"{''.join(rows)}"
+        '<tr><td><input type="submit" value="Refresh"></td></tr>'
+        "</table></form></body></html>"
+    )
+
+
+def _parse_with_html_parser(html: str) -> dict:
+    parser = DisabledInputParser()
+    parser.feed(html)
+    return parser.filtered_values
+
 
 class TestAwparser(TestCase):
     def test_extract_values_filters_disabled_inputs_and_casts_numbers(self):
@@ -24,6 +78,143 @@ class TestAwparser(TestCase):
             },
         )
 
+    def test_scanner_matches_html_parser_on_livedata_page(self):
+        page = livedata_page()
+        values = scan_disabled_inputs(page)
+
+        self.assertIsNotNone(values)
+        self.assertEqual(values, _parse_with_html_parser(page))
+        self.assertEqual(len(values), 40)
+        self.assertEqual(values["sensor3"], 4.5)
+
+    def test_inputs_hidden_in_comments_and_scripts_are_ignored(self):
+        html = """
+        <!-- <input name="commented" value="1" disabled> -->
+        <script>document.write('<input name="scripted" value="2" disabled>')</script>
+        <INPUT NAME="upper" VALUE="&#51;" DISABLED>
+        """
+
+        self.assertEqual(scan_disabled_inputs(html), {"upper": 3.0})
+
+    def test_unsupported_markup_falls_back_to_html_parser(self):
+        html = """
+        <![CDATA[ ignored ]]>
+        <input name="tempf" value="72.5" disabled>
+        <input name="unterminated" value="1" disabled
+        """
+
+        self.assertIsNone(scan_disabled_inputs(html))
+        self.assertEqual(extract_values(html), {"tempf": 72.5})
+
+    @timing_test
+    def test_scanner_is_faster_than_html_parser(self):
+        page = livedata_page()
+        scan_seconds = min(
+            timeit.repeat(lambda: scan_disabled_inputs(page), number=20, repeat=5),
+        )
+        parse_seconds = min(
+            timeit.repeat(lambda: _parse_with_html_parser(page), number=20, repeat=5),
+        )
+
+        self.assertLess(scan_seconds, parse_seconds)
+
+    def test_extract_live_data_returns_values_and_labels(self):
+        page = livedata_page()
+        values, labels = extract_live_data(page)
+
+        self.assertEqual(values, extract_values(page))
+        self.assertEqual(labels, extract_labels(page))
+        self.assertEqual(labels["sensor3"], "Sensor 3")
+        self.assertEqual(labels["inBattSta"], "Indoor Sensor ID")
+
+    def test_extract_live_data_falls_back_to_html_parser(self):
+        html = """
+        <?xml version="1.0"?>
+        <table><tr><td>Outdoor Temperature</td>
+        <td><input name="tempf" value="72.5" disabled></td></tr></table>
+        """
+
+        self.assertIsNone(scan_live_data(html))
+        self.assertEqual(
+            extract_live_data(html),
+            ({"tempf": 72.5}, {"tempf": "Outdoor Temperature"}),
+        )
+
+    @timing_test
+    def test_single_pass_is_faster_than_parsing_twice(self):
+        page = livedata_page()
+        single_seconds = min(
+            timeit.repeat(lambda: extract_live_data(page), number=20, repeat=5),
+        )
+        twice_seconds = min(
+            timeit.repeat(
+                lambda: (_parse_with_html_parser(page), extract_labels(page)),
+                number=20,
+                repeat=5,
+            ),
+        )
+
+        self.assertLess(single_seconds, twice_seconds)
+
+    def test_extractor_reads_later_polls_from_learned_template(self):
+        first = livedata_page()
+        second = (
+            first.replace('value="12:00"', 'value="12:01"')
+            .replace('value="4.5"', 'value="&#52;.6"')
+            .replace('value="6.0"', 'value=""')
+            .replace('value="7.5"', 'value="N/A"')
+        )
+        extractor = LiveDataExtractor()
+
+        with patch.object(
+            awparser,
+            "extract_live_data",
+            wraps=extract_live_data,
+        ) as mock_extract:
+            extractor.extract(first)
+            values, labels = extractor.extract(second)
+
+        mock_extract.assert_called_once_with(first)
+        self.assertEqual((values, labels), extract_live_data(second))
+        self.assertEqual(values["sensor3"], 4.6)
+        self.assertNotIn("sensor4", values)
+        self.assertIsNone(values["sensor5"])
+
+    def test_extractor_relearns_when_the_layout_changes(self):
+        extractor = LiveDataExtractor()
+        extractor.extract(livedata_page())
+
+        with patch.object(
+            awparser,
+            "extract_live_data",
+            wraps=extract_live_data,
+        ) as mock_extract:
+            base = livedata_page(sensor_count=41)
+            for page in (
+                base,
+                base.replace('value="3.0"', 'value="3"'),
+                base.replace('value="3.0"', 'value="3.0" '),
+                base.replace('value="3.0"', 'value="<"'),
+                base,
+            ):
+                self.assertEqual(extractor.extract(page), extract_live_data(page))
+
+        self.assertEqual(mock_extract.call_count, 4)
+
+    @timing_test
+    def test_template_extraction_is_faster_than_parsing(self):
+        page = livedata_page()
+        extractor = LiveDataExtractor()
+        extractor.extract(page)
+        template_seconds = min(
+            timeit.repeat(lambda: extractor.extract(page), number=20, repeat=5),
+        )
+        parse_seconds = min(
+            timeit.repeat(lambda: extract_live_data(page), number=20, repeat=5),
+        )
+
+        self.assertLess(template_seconds, parse_seconds)
+
     def test_extract_labels_maps_all_inputs_in_a_row(self):
         html = """
         <table>
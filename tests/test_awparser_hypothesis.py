@@ -1,12 +1,22 @@
 """Property-based tests for awparser.py using Hypothesis."""
 
+import re
 from html import escape
 from unittest import TestCase
 
 from hypothesis import given, settings
 from hypothesis import strategies as st
 
-from ambientweather2sqlite.awparser import extract_labels, extract_values
+from ambientweather2sqlite.awparser import (
+    DisabledInputParser,
+    LabeledInputParser,
+    LiveDataExtractor,
+    extract_labels,
+    extract_live_data,
+    extract_values,
+    scan_disabled_inputs,
+    scan_live_data,
+)
 
 
 def _make_disabled_input(name: str, value: str) -> str:
@@ -35,6 +45,171 @@ _sensor_values = st.one_of(
 )
 
 
+_attribute_values = st.one_of(
+    _sensor_values.map(str),
+    st.sampled_from(["", "N/A", "&#49;2", "1&amp;2", "12:00 5/6/2024", "1/"]),
+)
+
+
+@st.composite
+def _input_tags(draw) -> str:
+    attributes: list[tuple[str, str | None]] = [
+        ("name", draw(st.sampled_from(["outTemp", "tempinf", "inBatt", "CurrTime"]))),
+        ("value", draw(_attribute_values)),
+    ]
+    if draw(st.booleans()):
+        attributes.append(("disabled", draw(st.sampled_from([None, "disabled"]))))
+    if draw(st.booleans()):
+        attributes.append(("type", "text"))
+    parts = []
+    for attribute, value in draw(st.permutations(attributes)):
+        spelled = draw(st.sampled_from([attribute, attribute.upper()]))
+        if value is None:
+            parts.append(spelled)
+            continue
+        quote = draw(st.sampled_from(['"', "'", ""]))
+        if not value or (not quote and "/" in value):
+            quote = '"'
+        parts.append(f"{spelled}={quote}{value}{quote}")
+    tag = draw(st.sampled_from(["input", "INPUT", "Input"]))
+    end = draw(st.sampled_from([">", "/>", " />"]))
+    return f"<{tag} {' '.join(parts)}{end}"
+
+
+_text = st.text(alphabet=st.characters(exclude_characters="<"), max_size=8)
+_page_fragments = st.one_of(
+    _text,
+    _input_tags(),
+    _input_tags().map(lambda tag: f"<!-- {tag} -->"),
+    _input_tags().map(lambda tag: f"<script>if (a< b) {{ w('{tag}') }}</script>"),
+    st.text(alphabet=st.characters(exclude_characters="<&"), max_size=8).map(
+        lambda text: f"<title>{text}</title>",
+    ),
+    st.sampled_from(
+        [
+            "<!DOCTYPE html>",
+            "<tr>",
+            "<TR/>",
+            "<td>",
+            '<td class="item_2">',
+            "<td/>",
+            "</td>",
+            "</tr>",
+            "</TR >",
+            "<b>Outdoor</b>",
+            "Wind &amp; Gust",
+            "<br/>",
+            "a < b",
+            "<style>td { width: 50%; }</style>",
+        ],
+    ),
+)
+
+
+_QUOTED_VALUE = re.compile(r"""(value=)(["'])[^"']*\2""", re.IGNORECASE)
+
+
+def _replace_values(page: str, values: list[str]) -> str:
+    replacements = iter(values)
+    return _QUOTED_VALUE.sub(
+        lambda match: f"{match[1]}{match[2]}{next(replacements, '1')}{match[2]}",
+        page,
+    )
+
+
+def _parse_with_html_parser(html: str) -> dict:
+    parser = DisabledInputParser()
+    parser.feed(html)
+    return parser.filtered_values
+
+
+def _parse_labels_with_html_parser(html: str) -> dict:
+    parser = LabeledInputParser()
+    parser.feed(html)
+    return parser.data_dict
+
+
+class TestScanDisabledInputsProperty(TestCase):
+    @given(page=st.lists(_page_fragments, max_size=12).map("".join))
+    @settings(max_examples=300)
+    def test_scanner_matches_html_parser_on_well_formed_pages(self, page):
+        values = scan_disabled_inputs(page)
+
+        self.assertIsNotNone(values)
+        self.assertEqual(values, _parse_with_html_parser(page))
+
+    @given(
+        page=st.lists(
+            st.one_of(
+                _page_fragments,
+                st.sampled_from(
+                    ["<", ">", "/", "!", "-", "=", '"', "'", "?", " ", "\xa0"],
+                ),
+                st.text(alphabet="<>/!-=\"' aiInpPutTsScrltdv", max_size=10),
+            ),
+            max_size=12,
+        ).map("".join),
+    )
+    @settings(max_examples=500)
+    def test_scanner_matches_html_parser_or_defers_to_it(self, page):
+        values = scan_disabled_inputs(page)
+
+        if values is not None:
+            self.assertEqual(values, _parse_with_html_parser(page))
+        self.assertEqual(extract_values(page), _parse_with_html_parser(page))
+
+    @given(page=st.lists(_page_fragments, max_size=12).map("".join))
+    @settings(max_examples=300)
+    def test_live_data_scan_matches_both_html_parsers(self, page):
+        live_data = scan_live_data(page)
+
+        self.assertIsNotNone(live_data)
+        self.assertEqual(
+            live_data,
+            (_parse_with_html_parser(page), _parse_labels_with_html_parser(page)),
+        )
+
+    @given(
+        page=st.lists(
+            st.one_of(
+                _page_fragments,
+                st.text(alphabet="<>/!-=\"'& aiInpPutTsScrltdv", max_size=10),
+            ),
+            max_size=12,
+        ).map("".join),
+    )
+    @settings(max_examples=300)
+    def test_extract_live_data_matches_both_html_parsers(self, page):
+        self.assertEqual(
+            extract_live_data(page),
+            (_parse_with_html_parser(page), _parse_labels_with_html_parser(page)),
+        )
+
+    @given(
+        page=st.lists(_page_fragments, max_size=12).map("".join),
+        values=st.lists(
+            st.one_of(
+                _attribute_values,
+                st.sampled_from(['"', "'", "<", "a>b", "1' x='2", '1" x="2']),
+            ),
+            max_size=12,
+        ),
+    )
+    @settings(max_examples=300)
+    def test_extractor_matches_both_html_parsers_on_later_polls(self, page, values):
+        extractor = LiveDataExtractor()
+        extractor.extract(page)
+        later_page = _replace_values(page, values)
+
+        self.assertEqual(
+            extractor.extract(later_page),
+            (
+                _parse_with_html_parser(later_page),
+                _parse_labels_with_html_parser(later_page),
+            ),
+        )
+
+
 class TestExtractValuesProperty(TestCase):
     @given(name=_sensor_names, value=_sensor_values)
     @settings(max_examples=100)
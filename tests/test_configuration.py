@@ -5,6 +5,7 @@ from unittest.mock import patch
 
 from ambientweather2sqlite import configuration
 from ambientweather2sqlite.configuration import load_config
+from ambientweather2sqlite.models import RetentionPolicy
 
 
 class TestConfiguration(TestCase):
@@ -48,6 +49,245 @@ class TestConfiguration(TestCase):
             with self.assertRaisesRegex(TypeError, "live_data_url must be a string"):
                 load_config(config_path)
 
+    def test_load_config_parses_flush_settings(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                "flush_every = 30\n"
+                "flush_interval_seconds = 120\n",
+                encoding="utf-8",
+            )
+
+            config = load_config(config_path)
+
+        self.assertEqual(config.flush_every, 30)
+        self.assertEqual(config.flush_interval_seconds, 120)
+
+    def test_load_config_defaults_to_unbuffered_writes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n',
+                encoding="utf-8",
+            )
+
+            config = load_config(config_path)
+
+        self.assertEqual(config.flush_every, 1)
+        self.assertIsNone(config.flush_interval_seconds)
+
+    def test_load_config_rejects_non_positive_flush_every(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                "flush_every = 0\n",
+                encoding="utf-8",
+            )
+
+            with self.assertRaisesRegex(ValueError, "flush_every must be at least 1"):
+                load_config(config_path)
+
+    def test_load_config_rejects_non_positive_flush_interval_seconds(self):
+        for value in (0, -60):
+            with self.subTest(value=value), tempfile.TemporaryDirectory() as temp_dir:
+                config_path = Path(temp_dir) / "aw2sqlite.toml"
+                config_path.write_text(
+                    'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                    'database_path = "/tmp/aw2sqlite.db"\n'
+                    f"flush_interval_seconds = {value}\n",
+                    encoding="utf-8",
+                )
+
+                with self.assertRaisesRegex(
+                    ValueError,
+                    "flush_interval_seconds must be at least 1",
+                ):
+                    load_config(config_path)
+
+    def test_load_config_parses_max_concurrent_requests(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                "max_concurrent_requests = 2\n",
+                encoding="utf-8",
+            )
+
+            config = load_config(config_path)
+
+        self.assertEqual(config.max_concurrent_requests, 2)
+
+    def test_load_config_rejects_non_positive_max_concurrent_requests(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                "max_concurrent_requests = 0\n",
+                encoding="utf-8",
+            )
+
+            with self.assertRaisesRegex(
+                ValueError,
+                "max_concurrent_requests must be at least 1",
+            ):
+                load_config(config_path)
+
+    def test_load_config_parses_runtime(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                'runtime = "asyncio"\n',
+                encoding="utf-8",
+            )
+
+            config = load_config(config_path)
+
+        self.assertEqual(config.runtime, "asyncio")
+
+    def test_load_config_rejects_unknown_runtime(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                'runtime = "trio"\n',
+                encoding="utf-8",
+            )
+
+            with self.assertRaisesRegex(
+                ValueError,
+                "runtime must be one of: asyncio, threaded",
+            ):
+                load_config(config_path)
+
+    def test_load_config_parses_timestamp_storage(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                'timestamp_storage = "epoch_ms"\n',
+                encoding="utf-8",
+            )
+
+            config = load_config(config_path)
+
+        self.assertEqual(config.timestamp_storage, "epoch_ms")
+
+    def test_load_config_rejects_unknown_timestamp_storage(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                'timestamp_storage = "epoch_s"\n',
+                encoding="utf-8",
+            )
+
+            with self.assertRaisesRegex(
+                ValueError,
+                "timestamp_storage must be one of: epoch_ms, text",
+            ):
+                load_config(config_path)
+
+    def test_load_config_parses_monthly_partitioning(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                'partitioning = "monthly"\n',
+                encoding="utf-8",
+            )
+
+            config = load_config(config_path)
+
+        self.assertEqual(config.partitioning, "monthly")
+
+    def test_load_config_rejects_partitioned_epoch_timestamps(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                'timestamp_storage = "epoch_ms"\n'
+                'partitioning = "monthly"\n',
+                encoding="utf-8",
+            )
+
+            with self.assertRaisesRegex(ValueError, "partitioning requires"):
+                load_config(config_path)
+
+    def test_load_config_parses_retention_policy(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                "[retention]\n"
+                "raw_days = 30\n"
+                "downsampled_days = 730\n",
+                encoding="utf-8",
+            )
+
+            config = load_config(config_path)
+
+        self.assertEqual(
+            config.retention,
+            RetentionPolicy(raw_days=30, downsample_minutes=5, downsampled_days=730),
+        )
+
+    def test_load_config_rejects_uneven_downsample_minutes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                "[retention]\n"
+                "raw_days = 30\n"
+                "downsample_minutes = 7\n",
+                encoding="utf-8",
+            )
+
+            with self.assertRaisesRegex(ValueError, "divide an hour"):
+                load_config(config_path)
+
+    def test_load_config_parses_change_only_columns(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                'change_only_columns = ["dailyrain", "battout"]\n',
+                encoding="utf-8",
+            )
+
+            config = load_config(config_path)
+
+        self.assertEqual(config.change_only_columns, ("dailyrain", "battout"))
+
+    def test_load_config_rejects_change_only_column_string(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "aw2sqlite.toml"
+            config_path.write_text(
+                'live_data_url = "http://127.0.0.1/livedata.htm"\n'
+                'database_path = "/tmp/aw2sqlite.db"\n'
+                'change_only_columns = "dailyrain"\n',
+                encoding="utf-8",
+            )
+
+            with self.assertRaisesRegex(TypeError, "list of strings"):
+                load_config(config_path)
+
     def test_load_config_rejects_boolean_port(self):
         with tempfile.TemporaryDirectory() as temp_dir:
             config_path = Path(temp_dir) / "aw2sqlite.toml"
@@ -1,7 +1,9 @@
 import json
+import os
+import signal
 from http.client import HTTPException
 from unittest import TestCase
-from unittest.mock import Mock, call, patch
+from unittest.mock import ANY, Mock, call, patch
 
 from ambientweather2sqlite.daemon import clear_lines, start_daemon, wait_for_next_update
 
@@ -44,7 +46,7 @@ class TestStartDaemon(TestCase):
             patch("builtins.print") as mock_print,
             patch("ambientweather2sqlite.daemon.clear_lines") as mock_clear_lines,
             patch(
-                "ambientweather2sqlite.daemon._configure_logging",
+                "ambientweather2sqlite.daemon.configure_logging",
                 return_value=logger,
             ),
             patch(
@@ -55,12 +57,15 @@ class TestStartDaemon(TestCase):
                 "ambientweather2sqlite.daemon.Server",
                 return_value=server,
             ) as mock_server,
-            patch("ambientweather2sqlite.daemon.mureq.get", return_value="<html />"),
             patch(
-                "ambientweather2sqlite.daemon.extract_values",
-                return_value={"tempf": 72.5},
+                "ambientweather2sqlite.daemon.mureq.get",
+                return_value="<html />",
+            ) as mock_get,
+            patch(
+                "ambientweather2sqlite.daemon.LiveDataExtractor.extract",
+                return_value=({"tempf": 72.5}, {}),
             ),
-            patch("ambientweather2sqlite.daemon.insert_observation") as mock_insert,
+            patch("ambientweather2sqlite.daemon.ObservationWriter") as mock_writer,
             patch(
                 "ambientweather2sqlite.daemon.wait_for_next_update",
                 side_effect=KeyboardInterrupt,
@@ -75,19 +80,38 @@ class TestStartDaemon(TestCase):
             )
 
         self.assertEqual(exc.exception.code, 0)
+        station_pool = mock_server.call_args.kwargs["station_pool"]
         mock_create_metadata.assert_called_once_with(
             database_path,
             "http://127.0.0.1/livedata.htm",
+            station_pool,
         )
         mock_server.assert_called_once_with(
             "http://127.0.0.1/livedata.htm",
             database_path,
             8080,
             "localhost",
+            max_concurrent_requests=8,
+            snapshots=ANY,
+            response_cache=ANY,
+            station_pool=station_pool,
+        )
+        mock_get.assert_called_once_with(
+            "http://127.0.0.1/livedata.htm",
+            pool=station_pool,
         )
+        snapshot = mock_server.call_args.kwargs["snapshots"].latest()
+        self.assertEqual(snapshot.data, {"tempf": 72.5})
         server.start.assert_called_once_with()
         server.shutdown.assert_called_once_with()
-        mock_insert.assert_called_once_with(database_path, {"tempf": 72.5})
+        mock_writer.assert_called_once_with(
+            database_path,
+            flush_every=1,
+            flush_interval_seconds=None,
+            on_flush=mock_server.call_args.kwargs["response_cache"].invalidate,
+        )
+        mock_writer.return_value.insert.assert_called_once_with({"tempf": 72.5})
+        mock_writer.return_value.close.assert_called_once_with()
         mock_clear_lines.assert_called_once_with(0)
         self.assertIn(
             call("Starting JSON server on http://localhost:8080"),
@@ -111,7 +135,7 @@ class TestStartDaemon(TestCase):
             patch("builtins.print") as mock_print,
             patch("ambientweather2sqlite.daemon.clear_lines"),
             patch(
-                "ambientweather2sqlite.daemon._configure_logging",
+                "ambientweather2sqlite.daemon.configure_logging",
                 return_value=logger,
             ),
             patch(
@@ -127,7 +151,7 @@ class TestStartDaemon(TestCase):
                 "ambientweather2sqlite.daemon.wait_for_next_update",
                 side_effect=KeyboardInterrupt,
             ),
-            patch("ambientweather2sqlite.daemon.insert_observation") as mock_insert,
+            patch("ambientweather2sqlite.daemon.ObservationWriter") as mock_writer,
         ):
             with self.assertRaises(SystemExit) as exc:
                 start_daemon(
@@ -141,7 +165,7 @@ class TestStartDaemon(TestCase):
         self.assertEqual(logger.info.call_count, 2)
         server.start.assert_called_once_with()
         server.shutdown.assert_called_once_with()
-        mock_insert.assert_not_called()
+        mock_writer.return_value.insert.assert_not_called()
         self.assertIn(
             call("Error fetching metadata: metadata down"),
             mock_print.call_args_list,
@@ -162,7 +186,7 @@ class TestStartDaemon(TestCase):
                 side_effect=[None, KeyboardInterrupt],
             ) as mock_clear_lines,
             patch(
-                "ambientweather2sqlite.daemon._configure_logging",
+                "ambientweather2sqlite.daemon.configure_logging",
                 return_value=logger,
             ),
             patch(
@@ -171,7 +195,7 @@ class TestStartDaemon(TestCase):
             ),
             patch("ambientweather2sqlite.daemon.mureq.get", side_effect=TimeoutError),
             patch("ambientweather2sqlite.daemon.wait_for_next_update") as mock_wait,
-            patch("ambientweather2sqlite.daemon.insert_observation") as mock_insert,
+            patch("ambientweather2sqlite.daemon.ObservationWriter") as mock_writer,
         ):
             with self.assertRaises(SystemExit) as exc:
                 start_daemon(
@@ -184,7 +208,9 @@ class TestStartDaemon(TestCase):
         self.assertEqual(logger.info.call_args_list, [call("TimeoutError")])
         self.assertEqual(mock_clear_lines.call_args_list, [call(0), call(1)])
         mock_wait.assert_not_called()
-        mock_insert.assert_not_called()
+        mock_writer.return_value.insert.assert_not_called()
+        # Buffered rows are still written on time while the station is silent
+        mock_writer.return_value.flush_if_due.assert_called_once_with()
         self.assertIn(
             call("Warming up weather station's server..."),
             mock_print.call_args_list,
@@ -201,7 +227,7 @@ class TestStartDaemon(TestCase):
                 side_effect=[None, KeyboardInterrupt],
             ) as mock_clear_lines,
             patch(
-                "ambientweather2sqlite.daemon._configure_logging",
+                "ambientweather2sqlite.daemon.configure_logging",
                 return_value=logger,
             ),
             patch(
@@ -213,7 +239,7 @@ class TestStartDaemon(TestCase):
                 side_effect=HTTPException("live data down"),
             ),
             patch("ambientweather2sqlite.daemon.wait_for_next_update") as mock_wait,
-            patch("ambientweather2sqlite.daemon.insert_observation") as mock_insert,
+            patch("ambientweather2sqlite.daemon.ObservationWriter") as mock_writer,
         ):
             with self.assertRaises(SystemExit) as exc:
                 start_daemon(
@@ -226,8 +252,46 @@ class TestStartDaemon(TestCase):
         self.assertEqual(logger.info.call_count, 1)
         self.assertEqual(mock_clear_lines.call_args_list, [call(0), call(1)])
         mock_wait.assert_called_once_with(5)
-        mock_insert.assert_not_called()
+        mock_writer.return_value.insert.assert_not_called()
         self.assertIn(
             call("Error fetching live data: live data down"),
             mock_print.call_args_list,
         )
+
+    def test_start_daemon_stops_cleanly_on_sigterm(self):
+        database_path = "/tmp/weather.db"
+        original_handler = signal.getsignal(signal.SIGTERM)
+
+        with (
+            patch("builtins.print") as mock_print,
+            patch("ambientweather2sqlite.daemon.clear_lines"),
+            patch("ambientweather2sqlite.daemon.configure_logging"),
+            patch(
+                "ambientweather2sqlite.daemon.create_metadata",
+                return_value=({}, {}),
+            ),
+            patch(
+                "ambientweather2sqlite.daemon.mureq.get",
+                return_value="<html />",
+            ),
+            patch(
+                "ambientweather2sqlite.daemon.LiveDataExtractor.extract",
+                return_value=({"tempf": 72.5}, {}),
+            ),
+            patch(
+                "ambientweather2sqlite.daemon.wait_for_next_update",
+                side_effect=lambda _: os.kill(os.getpid(), signal.SIGTERM),
+            ),
+            patch("ambientweather2sqlite.daemon.ObservationWriter") as mock_writer,
+            self.assertRaises(SystemExit) as exc,
+        ):
+            start_daemon("http://127.0.0.1/livedata.htm", database_path)
+
+        self.assertEqual(exc.exception.code, 0)
+        mock_writer.return_value.insert.assert_called_once_with({"tempf": 72.5})
+        mock_writer.return_value.close.assert_called_once_with()
+        self.assertIn(
+            call(f"\nStopping... results saved to {database_path}"),
+            mock_print.call_args_list,
+        )
+        self.assertIs(signal.getsignal(signal.SIGTERM), original_handler)
@@ -0,0 +1,304 @@
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest import TestCase
+
+from ambientweather2sqlite.database import (
+    ObservationWriter,
+    bulk_insert_observations,
+    compact_observations,
+    create_database_if_not_exists,
+    iter_observations,
+    query_daily_aggregated_data,
+    query_hourly_aggregated_data,
+)
+from ambientweather2sqlite.models import RetentionPolicy
+from tests.helpers import query_raw
+
+_CHANGE_ONLY = ["dailyrain", "battout", "pm25_24h"]
+_FIELDS = [
+    "avg_outTemp",
+    "sum_dailyrain",
+    "max_dailyrain",
+    "min_battout",
+    "avg_pm25_24h",
+    "max_pm25_24h",
+]
+_TIMEZONES = [None, "UTC", "America/New_York", "+05:30"]
+_LAYOUTS = {
+    "text": {},
+    "epoch_ms": {"epoch_ts": True},
+    "monthly": {"monthly_partitions": True},
+}
+
+
+def _observations() -> list[dict]:
+    """Readings every 5 minutes over a month end and the last two days.
+
+    dailyrain and pm25_24h change every few readings and battout never does.
+    pm25_24h is missing from some readings, and dailyrain goes offline for a
+    while each day.
+    """
+    now = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+    starts = [datetime(2024, 2, 28, 22, tzinfo=UTC), now - timedelta(days=2)]
+    observations = []
+    for start in starts:
+        for step in range(2 * 24 * 12):
+            ts = start + timedelta(minutes=5 * step)
+            observation = {
+                "ts": ts.strftime("%Y-%m-%d %H:%M:%S"),
+                "outTemp": 50.0 + step % 13,
+                "dailyrain": float(step // 7 % 24 // 5),
+                "battout": 1.0,
+            }
+            if step % 12 not in {0, 7}:
+                observation["pm25_24h"] = 10.0 + step // 30
+            if 100 <= step % 288 < 110:  # noqa: PLR2004
+                observation["dailyrain"] = None
+            observations.append(observation)
+    return observations
+
+
+class TestChangeOnlyColumns(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.observations = _observations()
+        self.full_db = self._database("full.db")
+        self._write(self.full_db, self.observations)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _database(self, name: str, **options: object) -> str:
+        db_path = str(Path(self.temp_dir.name) / name)
+        create_database_if_not_exists(db_path, **options)
+        return db_path
+
+    def _write(self, db_path: str, observations: list[dict]) -> None:
+        with ObservationWriter(db_path, flush_every=50) as writer:
+            for observation in observations:
+                writer.insert(observation)
+
+    def _fetch(self, db_path: str, statement: str) -> list[tuple]:
+        with closing(sqlite3.connect(db_path)) as conn:
+            return conn.execute(statement).fetchall()
+
+    def _assert_reads_like_full_storage(self, db_path: str) -> None:
+        for tz in _TIMEZONES:
+            with self.subTest(tz=tz):
+                self.assertEqual(
+                    query_raw(
+                        query_daily_aggregated_data,
+                        db_path,
+                        _FIELDS,
+                        prior_days=3,
+                        tz=tz,
+                    ),
+                    query_raw(
+                        query_daily_aggregated_data,
+                        self.full_db,
+                        _FIELDS,
+                        prior_days=3,
+                        tz=tz,
+                    ),
+                )
+                self.assertEqual(
+                    query_raw(
+                        query_hourly_aggregated_data,
+                        db_path,
+                        _FIELDS,
+                        "2024-02-28",
+                        "2024-03-02",
+                        tz=tz,
+                    ),
+                    query_raw(
+                        query_hourly_aggregated_data,
+                        self.full_db,
+                        _FIELDS,
+                        "2024-02-28",
+                        "2024-03-02",
+                        tz=tz,
+                    ),
+                )
+        statement = "SELECT * FROM observations_hourly ORDER BY hour, name"
+        self.assertEqual(
+            self._fetch(db_path, statement),
+            self._fetch(self.full_db, statement),
+        )
+        self.assertEqual(
+            [
+                (row["ts"][:19], *(row[column] for column in _CHANGE_ONLY))
+                for row in iter_observations(db_path)
+            ],
+            [
+                (row["ts"], *(row[column] for column in _CHANGE_ONLY))
+                for row in iter_observations(self.full_db)
+            ],
+        )
+
+    def test_unchanged_values_are_stored_as_null(self):
+        db_path = self._database("change_only.db", change_only_columns=_CHANGE_ONLY)
+
+        self._write(db_path, self.observations)
+
+        stored = self._fetch(
+            db_path,
+            "SELECT COUNT(*), COUNT(dailyrain), COUNT(battout), COUNT(outTemp) "
+            "FROM observations",
+        )
+        hours = len({observation["ts"][:13] for observation in self.observations})
+        self.assertEqual(stored[0][0], len(self.observations))
+        self.assertEqual(stored[0][2], hours)
+        self.assertLess(stored[0][1], len(self.observations) / 4)
+        self.assertEqual(stored[0][3], len(self.observations))
+        self.assertEqual(
+            self._fetch(db_path, "SELECT name FROM observations_change_only"),
+            [(column,) for column in sorted(_CHANGE_ONLY)],
+        )
+
+    def test_missing_readings_are_not_carried_forward(self):
+        db_path = self._database("change_only.db", change_only_columns=_CHANGE_ONLY)
+        readings = [1.0, None, None, 1.0, 1.0, None, 1.0]
+        observations = [
+            {"ts": f"2024-03-01 10:0{minute}:00", "outTemp": 50.0, "battout": value}
+            for minute, value in enumerate(readings)
+        ]
+        del observations[5]["battout"]
+
+        # A new writer does not know the values the first one stored
+        self._write(db_path, observations[:3])
+        self._write(db_path, observations[3:])
+
+        self.assertEqual(
+            [row["battout"] for row in iter_observations(db_path)],
+            readings,
+        )
+        self.assertEqual(
+            query_raw(
+                query_hourly_aggregated_data,
+                db_path,
+                ["sum_battout", "min_battout"],
+                "2024-03-01",
+                "2024-03-01",
+                tz="UTC",
+            )["2024-03-01"][10],
+            {
+                "date": "2024-03-01",
+                "hour": "10",
+                "sum_battout": 4.0,
+                "min_battout": 1.0,
+                "count": 7,
+            },
+        )
+        self.assertLess(
+            self._fetch(db_path, "SELECT COUNT(battout) FROM observations")[0][0],
+            4,
+        )
+
+    def test_every_layout_reads_like_full_storage(self):
+        for layout, options in _LAYOUTS.items():
+            with self.subTest(layout=layout):
+                db_path = self._database(
+                    f"{layout}.db",
+                    change_only_columns=_CHANGE_ONLY,
+                    **options,
+                )
+
+                self._write(db_path, self.observations)
+
+                self._assert_reads_like_full_storage(db_path)
+
+    def test_out_of_order_writes_keep_later_rows_intact(self):
+        for layout, options in _LAYOUTS.items():
+            with self.subTest(layout=layout):
+                db_path = self._database(
+                    f"{layout}.db",
+                    change_only_columns=_CHANGE_ONLY,
+                    **options,
+                )
+                late = self.observations[5::9]
+                early = [row for row in self.observations if row not in late]
+
+                self._write(db_path, early)
+                self._write(db_path, late[: len(late) // 2])
+                bulk_insert_observations(
+                    db_path,
+                    ["outTemp", *_CHANGE_ONLY],
+                    late[len(late) // 2 :],
+                )
+
+                self._assert_reads_like_full_storage(db_path)
+
+    def test_dropped_columns_are_materialized(self):
+        db_path = self._database("change_only.db", change_only_columns=_CHANGE_ONLY)
+        self._write(db_path, self.observations)
+        statement = (
+            "SELECT COUNT(*), COUNT(dailyrain), COUNT(battout) FROM observations"
+        )
+
+        create_database_if_not_exists(db_path, change_only_columns=["pm25_24h"])
+
+        self.assertEqual(
+            self._fetch(db_path, statement),
+            self._fetch(self.full_db, statement),
+        )
+        self._assert_reads_like_full_storage(db_path)
+
+    def test_added_columns_keep_stored_nulls_missing(self):
+        db_path = self._database("change_only.db")
+        self._write(db_path, self.observations)
+
+        create_database_if_not_exists(db_path, change_only_columns=_CHANGE_ONLY)
+        self._write(db_path, self.observations[-12:])
+
+        self._assert_reads_like_full_storage(db_path)
+
+    def test_compaction_averages_carried_values(self):
+        policy = RetentionPolicy(raw_days=7, downsample_minutes=15)
+        now = datetime(2024, 3, 10, tzinfo=UTC)
+        db_path = self._database("change_only.db", change_only_columns=_CHANGE_ONLY)
+        self._write(db_path, self.observations)
+
+        for db in (db_path, self.full_db):
+            compact_observations(db, policy, now=now)
+
+        statement = (
+            "SELECT ts, sample_count, dailyrain, battout, pm25_24h "
+            "FROM observations_downsampled ORDER BY ts"
+        )
+        self.assertEqual(
+            self._fetch(db_path, statement),
+            self._fetch(self.full_db, statement),
+        )
+
+    def test_change_only_storage_shrinks_the_database(self):
+        """Compare file sizes for a day of minute readings of slow fields."""
+        slow_columns = [f"slow{index}" for index in range(12)]
+        start = datetime(2024, 3, 1, tzinfo=UTC)
+        observations = [
+            {
+                "ts": (start + timedelta(minutes=step)).strftime("%Y-%m-%d %H:%M:%S"),
+                "outTemp": 40.0 + step % 29 / 10,
+                "windspeed": step % 11 / 3,
+                **{
+                    column: 29.92 + step // (60 * (index + 1)) / 100
+                    for index, column in enumerate(slow_columns)
+                },
+            }
+            for step in range(24 * 60)
+        ]
+        sizes = {}
+        for name, change_only in (("full", []), ("change_only", slow_columns)):
+            db_path = self._database(
+                f"benchmark_{name}.db",
+                change_only_columns=change_only,
+            )
+            self._write(db_path, observations)
+            with closing(sqlite3.connect(db_path)) as conn:
+                conn.execute("VACUUM")
+                (page_count,) = conn.execute("PRAGMA page_count").fetchone()
+            sizes[name] = page_count
+
+        self.assertLess(sizes["change_only"], sizes["full"] * 0.65)
@@ -0,0 +1,238 @@
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest import TestCase
+
+from ambientweather2sqlite.database import (
+    ObservationWriter,
+    bulk_insert_observations,
+    create_database_if_not_exists,
+    iter_observations,
+    migrate_to_epoch_timestamps,
+    query_daily_aggregated_data,
+    query_db_metrics,
+    query_hourly_aggregated_data,
+    query_latest_timestamp,
+)
+from ambientweather2sqlite.exceptions import TimestampsAlreadyMigratedError
+from tests.helpers import (
+    ROLLUP_TABLE,
+    database_copy,
+    query_plan,
+    query_raw,
+    trace_queries,
+)
+
+_FIELDS = ["avg_outTemp", "max_outTemp", "min_outTemp", "sum_rain"]
+_TIMEZONES = [None, "UTC", "America/New_York", "Europe/Berlin", "-7", "+05:30"]
+
+
+def _observations() -> list[dict]:
+    """Readings every 20 minutes across a DST change and the last three days."""
+    now = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+    starts = [datetime(2024, 3, 8, tzinfo=UTC), now - timedelta(days=3)]
+    observations = []
+    for start in starts:
+        for step in range(3 * 24 * 3):
+            ts = start + timedelta(minutes=20 * step, milliseconds=step % 3 * 250)
+            observation = {
+                "ts": ts.strftime("%Y-%m-%d %H:%M:%S.%f"),
+                "outTemp": 50.0 + step % 17,
+            }
+            if step % 4:
+                observation["rain"] = step % 5 / 10
+            observations.append(observation)
+    return observations
+
+
+class TestEpochTimestampStorage(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.text_db = str(Path(self.temp_dir.name) / "text.db")
+        self.epoch_db = str(Path(self.temp_dir.name) / "epoch.db")
+        self.observations = _observations()
+        for db_path, epoch_ts in ((self.text_db, False), (self.epoch_db, True)):
+            create_database_if_not_exists(db_path, epoch_ts=epoch_ts)
+            with ObservationWriter(db_path, flush_every=50) as writer:
+                for observation in self.observations:
+                    writer.insert(observation)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _fetch(self, db_path: str, statement: str) -> list[tuple]:
+        with closing(sqlite3.connect(db_path)) as conn:
+            return conn.execute(statement).fetchall()
+
+    def _assert_same_results(self, migrated_db: str) -> None:
+        for tz in _TIMEZONES:
+            with self.subTest(tz=tz):
+                self.assertEqual(
+                    query_raw(
+                        query_daily_aggregated_data,
+                        migrated_db,
+                        _FIELDS,
+                        prior_days=4,
+                        tz=tz,
+                    ),
+                    query_raw(
+                        query_daily_aggregated_data,
+                        self.text_db,
+                        _FIELDS,
+                        prior_days=4,
+                        tz=tz,
+                    ),
+                )
+                self.assertEqual(
+                    query_raw(
+                        query_hourly_aggregated_data,
+                        migrated_db,
+                        _FIELDS,
+                        "2024-03-08",
+                        "2024-03-11",
+                        tz=tz,
+                    ),
+                    query_raw(
+                        query_hourly_aggregated_data,
+                        self.text_db,
+                        _FIELDS,
+                        "2024-03-08",
+                        "2024-03-11",
+                        tz=tz,
+                    ),
+                )
+
+    def test_new_database_keys_rows_by_integer_ts(self):
+        ((table_sql,),) = self._fetch(
+            self.epoch_db,
+            "SELECT sql FROM sqlite_master WHERE name = 'observations'",
+        )
+        ts_types = self._fetch(
+            self.epoch_db,
+            "SELECT DISTINCT typeof(ts) FROM observations",
+        )
+
+        self.assertIn("WITHOUT ROWID", table_sql)
+        self.assertEqual(ts_types, [("integer",)])
+
+    def test_text_view_exposes_every_column_with_text_ts(self):
+        with ObservationWriter(self.epoch_db) as writer:
+            writer.insert({"ts": "2024-03-20 12:00:00.5", "humidity": 40.0})
+
+        rows = self._fetch(
+            self.epoch_db,
+            "SELECT ts, outTemp, humidity FROM observations_text "
+            "WHERE humidity IS NOT NULL",
+        )
+        first_rows = self._fetch(
+            self.epoch_db,
+            "SELECT ts, outTemp FROM observations_text ORDER BY ts LIMIT 2",
+        )
+
+        self.assertEqual(rows, [("2024-03-20 12:00:00.500", None, 40.0)])
+        self.assertEqual(
+            first_rows,
+            [("2024-03-08 00:00:00.000", 50.0), ("2024-03-08 00:20:00.250", 51.0)],
+        )
+
+    def test_raw_queries_match_text_storage(self):
+        self._assert_same_results(self.epoch_db)
+
+    def test_rollups_match_text_storage(self):
+        statement = "SELECT * FROM observations_hourly ORDER BY hour, name"
+
+        self.assertEqual(
+            self._fetch(self.epoch_db, statement),
+            self._fetch(self.text_db, statement),
+        )
+
+    def test_raw_query_searches_the_primary_key(self):
+        with database_copy(self.epoch_db, ROLLUP_TABLE) as raw_db:
+            with trace_queries() as trace:
+                query_hourly_aggregated_data(
+                    raw_db,
+                    _FIELDS,
+                    "2024-03-08",
+                    "2024-03-11",
+                    tz="America/New_York",
+                )
+            select = next(s for s in trace.statements if "FROM observations\n" in s)
+            plan = " ".join(query_plan(raw_db, select))
+
+        self.assertIn("USING PRIMARY KEY (ts>? AND ts<?)", plan)
+
+    def test_metrics_and_latest_timestamp_are_text(self):
+        metrics = query_db_metrics(self.epoch_db)
+        latest = query_latest_timestamp(self.epoch_db, before="2024-03-09")
+
+        self.assertEqual(metrics["row_count"], len(self.observations))
+        self.assertEqual(metrics["earliest_ts"], "2024-03-08 00:00:00.000")
+        self.assertEqual(
+            metrics["latest_ts"],
+            query_latest_timestamp(self.text_db)[:-3],
+        )
+        self.assertEqual(latest, "2024-03-08 23:40:00.500")
+
+    def test_bulk_import_and_export_use_text_timestamps(self):
+        imported_db = str(Path(self.temp_dir.name) / "imported.db")
+        create_database_if_not_exists(imported_db, epoch_ts=True)
+
+        inserted = bulk_insert_observations(
+            imported_db,
+            ["outTemp", "rain"],
+            iter_observations(self.epoch_db),
+        )
+        duplicates = bulk_insert_observations(
+            imported_db,
+            ["outTemp"],
+            [{"ts": "2024-03-08 00:20:00.250", "outTemp": 0.0}],
+        )
+
+        self.assertEqual(inserted, len(self.observations))
+        self.assertEqual(duplicates, 0)
+        self.assertEqual(
+            list(iter_observations(imported_db)),
+            list(iter_observations(self.epoch_db)),
+        )
+        self.assertEqual(
+            next(iter_observations(imported_db))["ts"],
+            "2024-03-08 00:00:00.000",
+        )
+
+    def test_migration_converts_text_database(self):
+        summary = migrate_to_epoch_timestamps(self.text_db)
+
+        self.assertEqual(summary.rows_migrated, len(self.observations))
+        self.assertEqual(summary.rows_dropped, 0)
+        self.assertEqual(
+            self._fetch(self.text_db, "SELECT * FROM observations_text ORDER BY ts"),
+            self._fetch(self.epoch_db, "SELECT * FROM observations_text ORDER BY ts"),
+        )
+        self.assertEqual(
+            self._fetch(self.text_db, "SELECT * FROM observations_hourly"),
+            self._fetch(self.epoch_db, "SELECT * FROM observations_hourly"),
+        )
+        with self.assertRaises(TimestampsAlreadyMigratedError):
+            migrate_to_epoch_timestamps(self.text_db)
+
+    def test_migration_drops_unparseable_and_colliding_timestamps(self):
+        with closing(sqlite3.connect(self.text_db)) as conn:
+            conn.executemany(
+                "INSERT INTO observations (ts, outTemp) VALUES (?, ?)",
+                [("not a timestamp", 1.0), ("2024-03-08 00:00:00.0001", 2.0)],
+            )
+            conn.commit()
+
+        summary = migrate_to_epoch_timestamps(self.text_db)
+
+        self.assertEqual(summary.rows_migrated, len(self.observations))
+        self.assertEqual(summary.rows_dropped, 2)
+        self.assertEqual(
+            self._fetch(
+                self.text_db,
+                "SELECT SUM(count) FROM observations_hourly WHERE name = '*'",
+            ),
+            [(len(self.observations),)],
+        )
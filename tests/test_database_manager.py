@@ -6,11 +6,14 @@ from pathlib import Path
 from unittest.mock import patch
 
 from ambientweather2sqlite.database import (
+    ObservationWriter,
     _column_name,
     _insert_dict_row,
+    _insert_statement,
     create_database_if_not_exists,
     insert_observation,
 )
+from tests.helpers import trace_queries
 
 
 class TestDatabaseUtilityFunctions(unittest.TestCase):
@@ -240,6 +243,22 @@ class TestDatabaseUtilityFunctions(unittest.TestCase):
         self.assertIsNotNone(first_rowid)
         self.assertIsNone(second_rowid)
 
+    def test_insert_statement_is_cached_per_key_shape(self):
+        _insert_statement.cache_clear()
+
+        first = _insert_statement("observations", ("ts", "out temp"))
+        second = _insert_statement("observations", ("ts", "out temp"))
+        _insert_statement("observations", ("ts", "outHumi"))
+
+        self.assertIs(first, second)
+        self.assertEqual(
+            first,
+            "INSERT OR IGNORE INTO observations (ts, out_temp) VALUES (?, ?)",
+        )
+        cache_info = _insert_statement.cache_info()
+        self.assertEqual(cache_info.hits, 1)
+        self.assertEqual(cache_info.misses, 2)
+
     def test_insert_observation_with_special_column_names(self):
         """Test insertion with column names requiring sanitization."""
         create_database_if_not_exists(self.db_path)
@@ -264,5 +283,197 @@ class TestDatabaseUtilityFunctions(unittest.TestCase):
             self.assertIn("column_with_dots", column_names)
 
 
+class TestObservationWriter(unittest.TestCase):
+    def setUp(self):
+        self.temp_db = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        self.db_path = self.temp_db.name
+        self.temp_db.close()
+        Path(self.db_path).unlink(missing_ok=True)
+        create_database_if_not_exists(self.db_path)
+
+    def tearDown(self):
+        Path(self.db_path).unlink(missing_ok=True)
+
+    def _count(self) -> int:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM observations")
+            return cursor.fetchone()[0]
+
+    def _rows(self) -> list[tuple]:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT ts, outTemp FROM observations ORDER BY ts")
+            return cursor.fetchall()
+
+    def test_writer_reuses_a_single_connection(self):
+        with patch(
+            "ambientweather2sqlite.database.sqlite3.connect",
+            wraps=sqlite3.connect,
+        ) as mock_connect:
+            with ObservationWriter(self.db_path) as writer:
+                writer.insert({"ts": "2026-01-01 12:00:00", "outTemp": 70.0})
+                writer.insert({"ts": "2026-01-01 12:01:00", "outTemp": 71.0})
+                writer.insert({"ts": "2026-01-01 12:02:00", "outTemp": 72.0})
+
+        self.assertEqual(mock_connect.call_count, 1)
+        self.assertEqual(
+            self._rows(),
+            [
+                ("2026-01-01 12:00:00", 70.0),
+                ("2026-01-01 12:01:00", 71.0),
+                ("2026-01-01 12:02:00", 72.0),
+            ],
+        )
+
+    def test_writer_only_alters_schema_for_new_keys(self):
+        with trace_queries() as trace:
+            writer = ObservationWriter(self.db_path)
+        with writer:
+            trace.statements.clear()
+            writer.insert({"ts": "2026-01-01 12:00:00", "outTemp": 70.0})
+            writer.insert({"ts": "2026-01-01 12:01:00", "outTemp": 71.0})
+            writer.insert(
+                {"ts": "2026-01-01 12:02:00", "outTemp": 72.0, "outHumi": 50.0},
+            )
+            statements = list(trace.statements)
+
+        alter_statements = [s for s in statements if s.startswith("ALTER TABLE")]
+        self.assertEqual(len(alter_statements), 2)
+        self.assertFalse(any("table_info" in s for s in statements))
+
+    def test_writer_handles_repeated_sanitized_column_names(self):
+        with ObservationWriter(self.db_path) as writer:
+            writer.insert({"ts": "2026-01-01 12:00:00", "wind speed": 1.0})
+            writer.insert({"ts": "2026-01-01 12:01:00", "wind speed": 2.0})
+
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT wind_speed FROM observations ORDER BY ts")
+            values = [row[0] for row in cursor.fetchall()]
+
+        self.assertEqual(values, [1.0, 2.0])
+
+    def test_buffered_writer_flushes_every_n_observations(self):
+        with ObservationWriter(self.db_path, flush_every=3) as writer:
+            writer.insert({"ts": "2026-01-01 12:00:00", "outTemp": 70.0})
+            writer.insert({"ts": "2026-01-01 12:01:00", "outTemp": 71.0})
+            self.assertEqual(writer.pending_count, 2)
+            self.assertEqual(self._count(), 0)
+
+            writer.insert({"ts": "2026-01-01 12:02:00", "outTemp": 72.0})
+            self.assertEqual(writer.pending_count, 0)
+            self.assertEqual(self._count(), 3)
+
+    def test_buffered_writer_flushes_after_interval(self):
+        with patch(
+            "ambientweather2sqlite.database.monotonic",
+            side_effect=[100.0, 105.0, 110.0, 131.0],
+        ):
+            writer = ObservationWriter(
+                self.db_path,
+                flush_every=100,
+                flush_interval_seconds=30,
+            )
+            writer.insert({"ts": "2026-01-01 12:00:00", "outTemp": 70.0})
+            writer.insert({"ts": "2026-01-01 12:01:00", "outTemp": 71.0})
+            self.assertEqual(writer.pending_count, 2)
+            writer.insert({"ts": "2026-01-01 12:02:00", "outTemp": 72.0})
+            self.assertEqual(writer.pending_count, 0)
+        writer.close()
+
+        self.assertEqual(self._count(), 3)
+
+    def test_flush_if_due_flushes_without_new_observations(self):
+        with patch(
+            "ambientweather2sqlite.database.monotonic",
+            side_effect=[100.0, 105.0, 110.0, 131.0],
+        ):
+            writer = ObservationWriter(
+                self.db_path,
+                flush_every=100,
+                flush_interval_seconds=30,
+            )
+            writer.insert({"ts": "2026-01-01 12:00:00", "outTemp": 70.0})
+            self.assertEqual(writer.flush_if_due(), 0)
+            self.assertEqual(writer.pending_count, 1)
+            self.assertEqual(writer.flush_if_due(), 1)
+        self.assertEqual(writer.flush_if_due(), 0)
+        writer.close()
+
+        self.assertEqual(self._count(), 1)
+
+    def test_failed_flush_keeps_observations_buffered(self):
+        writer = ObservationWriter(self.db_path, flush_every=100)
+        writer.insert({"ts": "2026-01-01 12:00:00", "outTemp": 70.0})
+        writer.insert({"ts": "2026-01-01 12:01:00", "outTemp": 71.0})
+
+        with (
+            patch(
+                "ambientweather2sqlite.database._record_inserted_rows",
+                side_effect=sqlite3.OperationalError("disk I/O error"),
+            ),
+            self.assertRaises(sqlite3.OperationalError),
+        ):
+            writer.flush()
+        self.assertEqual(writer.pending_count, 2)
+        self.assertEqual(self._count(), 0)
+
+        writer.insert({"ts": "2026-01-01 12:02:00", "outTemp": 72.0})
+        writer.close()
+
+        self.assertEqual(
+            self._rows(),
+            [
+                ("2026-01-01 12:00:00", 70.0),
+                ("2026-01-01 12:01:00", 71.0),
+                ("2026-01-01 12:02:00", 72.0),
+            ],
+        )
+
+    def test_buffered_writer_commits_once_per_flush(self):
+        with trace_queries() as trace:
+            writer = ObservationWriter(self.db_path, flush_every=10)
+        trace.statements.clear()
+        for minute in range(5):
+            writer.insert(
+                {"ts": f"2026-01-01 12:0{minute}:00", "outTemp": 70.0 + minute},
+            )
+        writer.insert({"ts": "2026-01-01 12:05:00", "outHumi": 50.0})
+        writer.close()
+
+        self.assertEqual(trace.statements.count("COMMIT"), 1)
+        self.assertEqual(self._count(), 6)
+
+    def test_close_flushes_pending_observations(self):
+        writer = ObservationWriter(self.db_path, flush_every=100)
+        writer.insert({"ts": "2026-01-01 12:00:00", "outTemp": 70.0})
+        self.assertEqual(self._count(), 0)
+
+        writer.close()
+
+        self.assertEqual(self._rows(), [("2026-01-01 12:00:00", 70.0)])
+
+    def test_writer_ignores_duplicate_timestamps(self):
+        with ObservationWriter(self.db_path) as writer:
+            writer.insert({"ts": "2026-01-01 12:00:00", "outTemp": 70.0})
+            writer.insert({"ts": "2026-01-01 12:00:00", "outTemp": 72.0})
+
+        self.assertEqual(self._rows(), [("2026-01-01 12:00:00", 70.0)])
+
+    def test_on_flush_reports_the_written_ts_range(self):
+        flushed: list[tuple[str, str]] = []
+        with ObservationWriter(
+            self.db_path,
+            flush_every=2,
+            on_flush=lambda start, end: flushed.append((start, end)),
+        ) as writer:
+            writer.insert({"ts": "2026-01-01 12:05:00", "outTemp": 70.0})
+            writer.insert({"ts": "2026-01-01 11:55:00", "outTemp": 71.0})
+            writer.insert({"ts": "2026-01-01 11:55:00", "outTemp": 72.0})
+
+        self.assertEqual(flushed, [("2026-01-01 11:55:00", "2026-01-01 12:05:00")])
+
+
 if __name__ == "__main__":
     unittest.main()
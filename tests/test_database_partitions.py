@@ -0,0 +1,358 @@
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from ambientweather2sqlite.database import (
+    ObservationWriter,
+    bulk_insert_observations,
+    create_database_if_not_exists,
+    iter_observations,
+    migrate_to_epoch_timestamps,
+    partition_observations_by_month,
+    query_daily_aggregated_data,
+    query_db_metrics,
+    query_hourly_aggregated_data,
+    query_latest_timestamp,
+)
+from ambientweather2sqlite.exceptions import (
+    EpochTimestampsNotPartitionableError,
+    ObservationsAlreadyPartitionedError,
+)
+from tests.helpers import (
+    ROLLUP_TABLE,
+    database_copy,
+    query_plan,
+    query_raw,
+    trace_queries,
+)
+
+_FIELDS = ["avg_outTemp", "max_outTemp", "min_outTemp", "sum_rain"]
+_TIMEZONES = [None, "UTC", "America/New_York", "Europe/Berlin", "-7", "+05:30"]
+
+
+def _observations() -> list[dict]:
+    """Readings every 20 minutes across two month ends and the last three days."""
+    now = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+    starts = [
+        datetime(2024, 2, 28, tzinfo=UTC),
+        datetime(2024, 3, 30, tzinfo=UTC),
+        now - timedelta(days=3),
+    ]
+    observations = []
+    for start in starts:
+        for step in range(3 * 24 * 3):
+            ts = start + timedelta(minutes=20 * step)
+            observation = {
+                "ts": ts.strftime("%Y-%m-%d %H:%M:%S.%f"),
+                "outTemp": 50.0 + step % 17,
+            }
+            if step % 4:
+                observation["rain"] = step % 5 / 10
+            observations.append(observation)
+    return observations
+
+
+class TestMonthlyPartitions(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.text_db = str(Path(self.temp_dir.name) / "text.db")
+        self.partitioned_db = str(Path(self.temp_dir.name) / "partitioned.db")
+        self.observations = _observations()
+        for db_path, monthly_partitions in (
+            (self.text_db, False),
+            (self.partitioned_db, True),
+        ):
+            create_database_if_not_exists(
+                db_path,
+                monthly_partitions=monthly_partitions,
+            )
+            with ObservationWriter(db_path, flush_every=50) as writer:
+                for observation in self.observations:
+                    writer.insert(observation)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _fetch(self, db_path: str, statement: str) -> list[tuple]:
+        with closing(sqlite3.connect(db_path)) as conn:
+            return conn.execute(statement).fetchall()
+
+    def _assert_same_results(self, partitioned_db: str) -> None:
+        for tz in _TIMEZONES:
+            with self.subTest(tz=tz):
+                self.assertEqual(
+                    query_raw(
+                        query_daily_aggregated_data,
+                        partitioned_db,
+                        _FIELDS,
+                        prior_days=4,
+                        tz=tz,
+                    ),
+                    query_raw(
+                        query_daily_aggregated_data,
+                        self.text_db,
+                        _FIELDS,
+                        prior_days=4,
+                        tz=tz,
+                    ),
+                )
+                self.assertEqual(
+                    query_raw(
+                        query_hourly_aggregated_data,
+                        partitioned_db,
+                        _FIELDS,
+                        "2024-02-27",
+                        "2024-04-03",
+                        tz=tz,
+                    ),
+                    query_raw(
+                        query_hourly_aggregated_data,
+                        self.text_db,
+                        _FIELDS,
+                        "2024-02-27",
+                        "2024-04-03",
+                        tz=tz,
+                    ),
+                )
+
+    def test_rows_are_stored_in_monthly_tables_behind_a_view(self):
+        registry = self._fetch(
+            self.partitioned_db,
+            "SELECT month, row_count, earliest_ts, latest_ts "
+            "FROM observations_partitions WHERE month < '2024-05'",
+        )
+        view_rows = self._fetch(
+            self.partitioned_db,
+            "SELECT * FROM observations ORDER BY ts",
+        )
+
+        self.assertEqual(
+            registry,
+            [
+                (
+                    "2024-02",
+                    144,
+                    "2024-02-28 00:00:00.000000",
+                    "2024-02-29 23:40:00.000000",
+                ),
+                (
+                    "2024-03",
+                    216,
+                    "2024-03-01 00:00:00.000000",
+                    "2024-03-31 23:40:00.000000",
+                ),
+                (
+                    "2024-04",
+                    72,
+                    "2024-04-01 00:00:00.000000",
+                    "2024-04-01 23:40:00.000000",
+                ),
+            ],
+        )
+        self.assertEqual(
+            self._fetch(
+                self.partitioned_db,
+                "SELECT COUNT(*) FROM observations_2024_03",
+            ),
+            [(216,)],
+        )
+        self.assertEqual(
+            view_rows,
+            self._fetch(self.text_db, "SELECT * FROM observations ORDER BY ts"),
+        )
+
+    def test_new_columns_read_as_null_from_older_partitions(self):
+        with ObservationWriter(self.partitioned_db) as writer:
+            writer.insert({"ts": "2024-03-15 12:00:00", "humidity": 40.0})
+
+        self.assertEqual(
+            self._fetch(
+                self.partitioned_db,
+                "SELECT ts, outTemp, humidity FROM observations "
+                "WHERE humidity IS NOT NULL",
+            ),
+            [("2024-03-15 12:00:00", None, 40.0)],
+        )
+        self.assertEqual(
+            query_raw(
+                query_hourly_aggregated_data,
+                self.partitioned_db,
+                ["max_humidity"],
+                "2024-02-28",
+                "2024-03-15",
+                tz="UTC",
+            )["2024-03-15"][12],
+            {"date": "2024-03-15", "hour": "12", "max_humidity": 40.0, "count": 1},
+        )
+
+    def test_failed_flush_into_a_new_month_is_retried_into_the_view(self):
+        writer = ObservationWriter(self.partitioned_db, flush_every=100)
+        writer.insert({"ts": "2023-01-15 12:00:00", "outTemp": 30.0})
+        with (
+            patch(
+                "ambientweather2sqlite.database._record_inserted_rows",
+                side_effect=sqlite3.OperationalError("disk I/O error"),
+            ),
+            self.assertRaises(sqlite3.OperationalError),
+        ):
+            writer.flush()
+
+        self.assertNotIn(
+            ("observations_2023_01",),
+            self._fetch(
+                self.partitioned_db,
+                "SELECT name FROM sqlite_master WHERE type = 'table'",
+            ),
+        )
+        writer.close()
+
+        self.assertIn(
+            ("2023-01",),
+            self._fetch(
+                self.partitioned_db,
+                "SELECT month FROM observations_partitions",
+            ),
+        )
+        self.assertEqual(
+            self._fetch(
+                self.partitioned_db,
+                "SELECT ts, outTemp FROM observations WHERE ts < '2024-01-01'",
+            ),
+            [("2023-01-15 12:00:00", 30.0)],
+        )
+
+    def test_raw_queries_match_unpartitioned_storage(self):
+        self._assert_same_results(self.partitioned_db)
+
+    def test_rollups_match_unpartitioned_storage(self):
+        statement = "SELECT * FROM observations_hourly ORDER BY hour, name"
+
+        self.assertEqual(
+            self._fetch(self.partitioned_db, statement),
+            self._fetch(self.text_db, statement),
+        )
+
+    def test_raw_query_reads_only_overlapping_partitions(self):
+        with database_copy(self.partitioned_db, ROLLUP_TABLE) as raw_db:
+            with trace_queries() as trace:
+                query_hourly_aggregated_data(
+                    raw_db,
+                    _FIELDS,
+                    "2024-02-29",
+                    "2024-03-01",
+                    tz="America/New_York",
+                )
+            select = next(
+                s
+                for s in trace.statements
+                if s.lstrip().startswith("SELECT") and "observations_2024" in s
+            )
+            plan = query_plan(raw_db, select)
+
+        searches = [detail for detail in plan if detail.startswith("SEARCH")]
+        self.assertEqual(len(searches), 2)
+        self.assertIn("observations_2024_02 USING INDEX", searches[0])
+        self.assertIn("observations_2024_03 USING INDEX", searches[1])
+        self.assertFalse(
+            any(detail.startswith("SCAN observations_") for detail in plan),
+        )
+
+    def test_range_without_partitions_returns_no_rows(self):
+        result = query_raw(
+            query_hourly_aggregated_data,
+            self.partitioned_db,
+            _FIELDS,
+            "2023-01-01",
+            "2023-01-02",
+            tz="UTC",
+        )
+
+        self.assertEqual(result, {"2023-01-01": [None] * 24, "2023-01-02": [None] * 24})
+
+    def test_metrics_and_latest_timestamp_match_unpartitioned_storage(self):
+        metrics = query_db_metrics(self.partitioned_db)
+        text_metrics = query_db_metrics(self.text_db)
+
+        for key in ("row_count", "earliest_ts", "latest_ts", "column_count"):
+            self.assertEqual(metrics[key], text_metrics[key])
+        self.assertEqual(
+            query_latest_timestamp(self.partitioned_db),
+            query_latest_timestamp(self.text_db),
+        )
+        for before in ("2024-03-01", "2024-03-31 00:00:00", "2024-02-01", "2099-01"):
+            with self.subTest(before=before):
+                self.assertEqual(
+                    query_latest_timestamp(self.partitioned_db, before=before),
+                    query_latest_timestamp(self.text_db, before=before),
+                )
+
+    def test_bulk_import_and_export_route_rows_by_month(self):
+        imported_db = str(Path(self.temp_dir.name) / "imported.db")
+        create_database_if_not_exists(imported_db, monthly_partitions=True)
+
+        inserted = bulk_insert_observations(
+            imported_db,
+            ["outTemp", "rain"],
+            iter_observations(self.partitioned_db),
+        )
+        duplicates = bulk_insert_observations(
+            imported_db,
+            ["outTemp"],
+            [{"ts": "2024-03-01 00:20:00.000000", "outTemp": 0.0}],
+        )
+
+        self.assertEqual(inserted, len(self.observations))
+        self.assertEqual(duplicates, 0)
+        self.assertEqual(
+            list(iter_observations(imported_db)),
+            list(iter_observations(self.text_db)),
+        )
+        self.assertEqual(
+            query_db_metrics(imported_db)["row_count"],
+            len(self.observations),
+        )
+
+    def test_migration_partitions_text_database(self):
+        with closing(sqlite3.connect(self.text_db)) as conn:
+            conn.execute(
+                "INSERT INTO observations (ts, outTemp) VALUES ('not a timestamp', 1)",
+            )
+            conn.commit()
+
+        summary = partition_observations_by_month(self.text_db)
+
+        self.assertEqual(summary.rows_migrated, len(self.observations))
+        self.assertEqual(summary.rows_dropped, 1)
+        self.assertEqual(
+            summary.partitions_created,
+            self._fetch(
+                self.partitioned_db,
+                "SELECT COUNT(*) FROM observations_partitions",
+            )[0][0],
+        )
+        self.assertEqual(
+            self._fetch(self.text_db, "SELECT * FROM observations_partitions"),
+            self._fetch(self.partitioned_db, "SELECT * FROM observations_partitions"),
+        )
+        self._assert_same_results(self.text_db)
+        with self.assertRaises(ObservationsAlreadyPartitionedError):
+            partition_observations_by_month(self.text_db)
+        with self.assertRaises(ObservationsAlreadyPartitionedError):
+            migrate_to_epoch_timestamps(self.text_db)
+
+    def test_epoch_timestamps_cannot_be_partitioned(self):
+        epoch_db = str(Path(self.temp_dir.name) / "epoch.db")
+        create_database_if_not_exists(epoch_db, epoch_ts=True)
+
+        with self.assertRaises(EpochTimestampsNotPartitionableError):
+            partition_observations_by_month(epoch_db)
+        with self.assertRaises(ValueError):
+            create_database_if_not_exists(
+                str(Path(self.temp_dir.name) / "both.db"),
+                epoch_ts=True,
+                monthly_partitions=True,
+            )
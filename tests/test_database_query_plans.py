@@ -0,0 +1,101 @@
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest import TestCase
+
+from ambientweather2sqlite.database import (
+    bulk_insert_observations,
+    create_database_if_not_exists,
+    query_daily_aggregated_data,
+    query_hourly_aggregated_data,
+)
+from tests.helpers import QueryTrace, query_plan, trace_queries
+
+
+class TestRawQueryRangePredicates(TestCase):
+    """The raw query paths bound ts so the UNIQUE ts index limits the scan.
+
+    Cost is measured in SQLite VM instructions via a progress handler rather
+    than wall-clock time, so the comparison is deterministic.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.now = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _create_database(self, name: str, days: int) -> str:
+        db_path = str(Path(self.temp_dir.name) / name)
+        create_database_if_not_exists(db_path)
+        with closing(sqlite3.connect(db_path)) as conn:
+            # Rollups would answer whole-hour offsets without touching raw rows
+            conn.execute("DROP TABLE observations_hourly")
+            conn.commit()
+        start = self.now - timedelta(days=days)
+        bulk_insert_observations(
+            db_path,
+            ["outTemp"],
+            (
+                {
+                    "ts": (start + timedelta(minutes=5 * step)).strftime(
+                        "%Y-%m-%d %H:%M:%S",
+                    ),
+                    "outTemp": 60.0 + step % 7,
+                }
+                for step in range(days * 24 * 12)
+            ),
+        )
+        return db_path
+
+    def _run(self, query, db_path: str, **kwargs: object) -> QueryTrace:
+        with trace_queries() as trace:
+            query(db_path, ["avg_outTemp"], **kwargs)
+        return trace
+
+    def test_raw_queries_search_the_ts_index(self):
+        db_path = self._create_database("plan.db", days=2)
+        yesterday = (self.now - timedelta(days=1)).date().isoformat()
+        cases = [
+            (query_daily_aggregated_data, {"prior_days": 1, "tz": "+05:30"}),
+            (query_daily_aggregated_data, {"prior_days": 1, "tz": "localtime"}),
+            (query_hourly_aggregated_data, {"start_date": yesterday, "tz": "-3.5"}),
+            (query_hourly_aggregated_data, {"start_date": yesterday}),
+            (
+                query_hourly_aggregated_data,
+                {"start_date": yesterday, "tz": "America/New_York"},
+            ),
+        ]
+        for query, kwargs in cases:
+            with self.subTest(query=query.__name__, **kwargs):
+                trace = self._run(query, db_path, **kwargs)
+                select = next(s for s in trace.statements if "FROM observations\n" in s)
+                plan = " ".join(query_plan(db_path, select))
+                self.assertIn(
+                    "SEARCH observations USING INDEX idx_observations_ts",
+                    plan,
+                )
+
+    def test_raw_query_cost_tracks_window_not_table_size(self):
+        small_db = self._create_database("small.db", days=3)
+        large_db = self._create_database("large.db", days=90)
+
+        for tz in ["+05:30", "localtime"]:
+            with self.subTest(tz=tz):
+                small_trace = self._run(
+                    query_daily_aggregated_data,
+                    small_db,
+                    prior_days=1,
+                    tz=tz,
+                )
+                large_trace = self._run(
+                    query_daily_aggregated_data,
+                    large_db,
+                    prior_days=1,
+                    tz=tz,
+                )
+                # A full scan of the 30x larger table would cost ~30x as much
+                self.assertLess(large_trace.steps, small_trace.steps * 1.5)
@@ -0,0 +1,283 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from ambientweather2sqlite.database import (
+    ObservationWriter,
+    _RunningAggregate,
+    backfill_rollups,
+    bulk_insert_observations,
+    create_database_if_not_exists,
+    query_daily_aggregated_data,
+    query_hourly_aggregated_data,
+)
+from tests.helpers import ROLLUP_TABLE, query_raw, trace_queries
+
+_FIELDS = ["avg_outTemp", "max_outTemp", "min_outTemp", "sum_rain", "avg_rain"]
+
+
+class TestDatabaseRollups(TestCase):
+    def setUp(self):
+        self.temp_db = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        self.db_path = self.temp_db.name
+        self.temp_db.close()
+        Path(self.db_path).unlink(missing_ok=True)
+        create_database_if_not_exists(self.db_path)
+
+        # One observation every 20 minutes across the last three UTC days
+        now = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+        start = now - timedelta(days=3)
+        self.observations = []
+        for step in range(3 * 24 * 3):
+            ts = start + timedelta(minutes=20 * step)
+            observation = {
+                "ts": ts.strftime("%Y-%m-%d %H:%M:%S"),
+                "outTemp": 50.0 + step % 17,
+            }
+            if step % 4:
+                observation["rain"] = step % 5 / 10
+            self.observations.append(observation)
+        self.start_date = start.date().isoformat()
+
+        with ObservationWriter(self.db_path, flush_every=50) as writer:
+            for observation in self.observations:
+                writer.insert(observation)
+
+    def tearDown(self):
+        Path(self.db_path).unlink(missing_ok=True)
+
+    def _rollup_rows(self) -> list[tuple]:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            return conn.execute(
+                "SELECT * FROM observations_hourly ORDER BY hour, name",
+            ).fetchall()
+
+    def _assert_rows_equal(
+        self,
+        rollup_row: dict[str, object],
+        raw_row: dict[str, object],
+    ) -> None:
+        self.assertEqual(rollup_row.keys(), raw_row.keys())
+        for key, raw_value in raw_row.items():
+            if isinstance(raw_value, float):
+                self.assertAlmostEqual(rollup_row[key], raw_value)
+            else:
+                self.assertEqual(rollup_row[key], raw_value)
+
+    def test_new_database_includes_rollup_table(self):
+        rows = self._rollup_rows()
+        hours = {row[0] for row in rows}
+        self.assertEqual(len(hours), 3 * 24)
+        first_hour = [row for row in rows if row[0] == min(hours)]
+        self.assertEqual(
+            [(name, count) for _, name, count, *_ in first_hour],
+            [("*", 3), ("outTemp", 3), ("rain", 2)],
+        )
+
+    def test_writer_rollups_match_backfill(self):
+        maintained = self._rollup_rows()
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute("DROP TABLE observations_hourly")
+            conn.commit()
+
+        self.assertEqual(backfill_rollups(self.db_path), 3 * 24)
+        self.assertEqual(self._rollup_rows(), maintained)
+
+    def test_bulk_insert_refreshes_rollups(self):
+        maintained = self._rollup_rows()
+        Path(self.db_path).unlink()
+        create_database_if_not_exists(self.db_path)
+
+        bulk_insert_observations(
+            self.db_path,
+            ["outTemp", "rain"],
+            self.observations,
+        )
+
+        self.assertEqual(self._rollup_rows(), maintained)
+
+    def test_daily_query_matches_raw_rows(self):
+        for tz in ["UTC", "America/New_York", "Europe/Berlin", "-7", "+03:00"]:
+            with self.subTest(tz=tz):
+                rollup_result = query_daily_aggregated_data(
+                    self.db_path,
+                    _FIELDS,
+                    prior_days=5,
+                    tz=tz,
+                )
+                raw_result = query_raw(
+                    query_daily_aggregated_data,
+                    self.db_path,
+                    _FIELDS,
+                    prior_days=5,
+                    tz=tz,
+                )
+                self.assertEqual(len(rollup_result), len(raw_result))
+                for rollup_row, raw_row in zip(rollup_result, raw_result, strict=True):
+                    self._assert_rows_equal(rollup_row, raw_row)
+
+    def test_hourly_query_matches_raw_rows(self):
+        for tz in ["UTC", "America/Chicago", "Asia/Tokyo", "5", "-0300"]:
+            with self.subTest(tz=tz):
+                rollup_result = query_hourly_aggregated_data(
+                    self.db_path,
+                    _FIELDS,
+                    start_date=self.start_date,
+                    tz=tz,
+                )
+                raw_result = query_raw(
+                    query_hourly_aggregated_data,
+                    self.db_path,
+                    _FIELDS,
+                    start_date=self.start_date,
+                    tz=tz,
+                )
+                self.assertEqual(list(rollup_result), list(raw_result))
+                for date_key, raw_hours in raw_result.items():
+                    for rollup_row, raw_row in zip(
+                        rollup_result[date_key],
+                        raw_hours,
+                        strict=True,
+                    ):
+                        if raw_row is None:
+                            self.assertIsNone(rollup_row)
+                        else:
+                            self._assert_rows_equal(rollup_row, raw_row)
+
+    def test_misaligned_timezones_fall_back_to_raw_rows(self):
+        for tz in ["+05:30", "Asia/Kolkata"]:
+            with self.subTest(tz=tz):
+                with trace_queries() as trace:
+                    result = query_daily_aggregated_data(
+                        self.db_path,
+                        _FIELDS,
+                        prior_days=5,
+                        tz=tz,
+                    )
+
+                self.assertFalse(
+                    any(ROLLUP_TABLE in statement for statement in trace.statements),
+                )
+                self.assertEqual(
+                    sum(row["count"] for row in result),
+                    len(self.observations),
+                )
+
+    def test_localtime_uses_rollups_when_the_system_zone_is_aligned(self):
+        def daily_counts(db_path: str, tz: str) -> list[tuple[str, int]]:
+            result = query_daily_aggregated_data(
+                db_path,
+                _FIELDS,
+                prior_days=5,
+                tz=tz,
+            )
+            return [(row["date"], row["count"]) for row in result]
+
+        rollups_only_path = f"{self.db_path}.rollups"
+        self.addCleanup(Path(rollups_only_path).unlink, missing_ok=True)
+        shutil.copyfile(self.db_path, rollups_only_path)
+        with closing(sqlite3.connect(rollups_only_path)) as conn:
+            conn.execute("DELETE FROM observations")
+            conn.commit()
+
+        self.addCleanup(time.tzset)
+        for system_zone, answered_by_rollups in [
+            ("America/New_York", True),
+            ("Asia/Kolkata", False),
+        ]:
+            with (
+                self.subTest(system_zone=system_zone),
+                patch.dict(os.environ, {"TZ": system_zone}),
+            ):
+                time.tzset()
+                expected = daily_counts(self.db_path, system_zone)
+                self.assertEqual(daily_counts(self.db_path, "localtime"), expected)
+                # Without raw rows only the rollups can answer
+                self.assertEqual(
+                    daily_counts(rollups_only_path, "localtime") == expected,
+                    answered_by_rollups,
+                )
+
+    def test_flush_with_duplicate_timestamps_recomputes_rollups(self):
+        last_ts = datetime.strptime(
+            self.observations[-1]["ts"],
+            "%Y-%m-%d %H:%M:%S",
+        ).replace(tzinfo=UTC)
+        with ObservationWriter(self.db_path) as writer:
+            writer.insert({"ts": self.observations[-1]["ts"], "outTemp": 0.0})
+            writer.insert(
+                {
+                    "ts": (last_ts + timedelta(minutes=5)).strftime(
+                        "%Y-%m-%d %H:%M:%S",
+                    ),
+                    "outTemp": 10.0,
+                },
+            )
+        maintained = self._rollup_rows()
+
+        self.assertEqual(backfill_rollups(self.db_path), 3 * 24)
+        self.assertEqual(self._rollup_rows(), maintained)
+
+    def test_unknown_column_falls_back_to_raw_rows(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            query_daily_aggregated_data(
+                self.db_path,
+                ["avg_outTemp", "max_missing"],
+                prior_days=5,
+                tz="UTC",
+            )
+
+    def test_database_without_rollup_table_queries_raw_rows(self):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute("DROP TABLE observations_hourly")
+            conn.commit()
+
+        with ObservationWriter(self.db_path) as writer:
+            writer.insert({"outTemp": 70.0})
+
+        result = query_daily_aggregated_data(
+            self.db_path,
+            ["avg_outTemp"],
+            prior_days=5,
+            tz="UTC",
+        )
+        self.assertEqual(
+            sum(row["count"] for row in result),
+            len(self.observations) + 1,
+        )
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            tables = conn.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'observations_hourly'",
+            ).fetchall()
+        self.assertEqual(tables, [])
+
+
+class TestRunningAggregate(TestCase):
+    def test_merged_partials_match_aggregates_over_all_values(self):
+        partials = [[3.0, 1.0], [7.5], [-2.0, 4.0, 4.0]]
+        values = [value for partial in partials for value in partial]
+
+        aggregate = _RunningAggregate()
+        for partial in partials:
+            aggregate.merge(len(partial), sum(partial), min(partial), max(partial))
+
+        self.assertEqual(aggregate.count, len(values))
+        self.assertAlmostEqual(aggregate.result("AVG"), sum(values) / len(values))
+        self.assertEqual(aggregate.result("SUM"), sum(values))
+        self.assertEqual(aggregate.result("MIN"), -2.0)
+        self.assertEqual(aggregate.result("MAX"), 7.5)
+
+    def test_empty_aggregate_and_count_only_partials_have_no_values(self):
+        aggregate = _RunningAggregate()
+        self.assertIsNone(aggregate.result("AVG"))
+
+        aggregate.merge(4, None, None, None)
+        self.assertEqual(aggregate.count, 4)
+        self.assertIsNone(aggregate.result("MAX"))
@@ -0,0 +1,136 @@
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import UTC, datetime
+from pathlib import Path
+from unittest import TestCase
+
+from ambientweather2sqlite.database import (
+    ObservationWriter,
+    backfill_rollups,
+    bulk_insert_observations,
+    compact_observations,
+    create_database_if_not_exists,
+    migrate_to_epoch_timestamps,
+    partition_observations_by_month,
+    query_db_metrics,
+    query_latest_timestamp,
+)
+from ambientweather2sqlite.models import RetentionPolicy
+from tests.helpers import STATS_TABLE, database_copy
+
+_LAYOUTS = [{}, {"epoch_ts": True}, {"monthly_partitions": True}]
+
+
+def _observations() -> list[dict]:
+    """Hourly readings from late January into February, out of order."""
+    return [
+        {"ts": f"2024-0{month}-{day:02d} {hour:02d}:00:00", "outTemp": float(hour)}
+        for month, day in ((2, 2), (1, 30), (2, 1))
+        for hour in range(24)
+    ]
+
+
+class TestObservationStats(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _database(self, name: str, **layout: bool) -> str:
+        db_path = str(Path(self.temp_dir.name) / name)
+        create_database_if_not_exists(db_path, **layout)
+        return db_path
+
+    def _assert_stats_match_count(self, db_path: str) -> None:
+        metrics = query_db_metrics(db_path)
+        # Without the stats table the metrics are counted from the observations
+        with database_copy(db_path, STATS_TABLE) as counted_path:
+            counted = query_db_metrics(counted_path)
+
+        for key in ("row_count", "earliest_ts", "latest_ts", "column_count"):
+            self.assertEqual(metrics[key], counted[key], key)
+
+    def test_writes_keep_stats_in_step_with_the_table(self):
+        for layout in _LAYOUTS:
+            with self.subTest(layout=layout):
+                db_path = self._database(f"{'_'.join(layout) or 'text'}.db", **layout)
+
+                with ObservationWriter(db_path, flush_every=10) as writer:
+                    for observation in _observations():
+                        writer.insert(observation)
+                    writer.insert({"ts": "2024-02-01 05:00:00", "outTemp": 0.0})
+                    writer.insert({"ts": "2024-02-03 00:00:00", "humidity": 40.0})
+                self._assert_stats_match_count(db_path)
+
+                bulk_insert_observations(
+                    db_path,
+                    ["outTemp", "rain"],
+                    [
+                        {"ts": "2024-01-29 23:00:00", "rain": 0.1},
+                        {"ts": "2024-02-02 00:00:00", "outTemp": 1.0},
+                    ],
+                )
+                self._assert_stats_match_count(db_path)
+                self.assertEqual(query_db_metrics(db_path)["row_count"], 74)
+
+    def test_compaction_and_migrations_keep_stats_in_step(self):
+        for migrate in (migrate_to_epoch_timestamps, partition_observations_by_month):
+            with self.subTest(migrate=migrate.__name__):
+                db_path = self._database(f"{migrate.__name__}.db")
+                with ObservationWriter(db_path, flush_every=100) as writer:
+                    for observation in _observations():
+                        writer.insert(observation)
+
+                compact_observations(
+                    db_path,
+                    RetentionPolicy(raw_days=1),
+                    now=datetime(2024, 2, 2, 6, tzinfo=UTC),
+                )
+                self._assert_stats_match_count(db_path)
+                self.assertEqual(query_db_metrics(db_path)["row_count"], 42)
+
+                migrate(db_path)
+                self._assert_stats_match_count(db_path)
+
+    def test_metrics_and_latest_timestamp_read_the_stats_table(self):
+        db_path = self._database("weather.db")
+        with ObservationWriter(db_path) as writer:
+            writer.insert({"ts": "2024-02-01 00:00:00", "outTemp": 1.0})
+        with closing(sqlite3.connect(db_path)) as conn:
+            conn.execute(
+                "UPDATE observations_stats SET row_count = 99, "
+                "latest_ts = '2099-01-01 00:00:00'",
+            )
+            conn.commit()
+
+        self.assertEqual(query_db_metrics(db_path)["row_count"], 99)
+        self.assertEqual(query_latest_timestamp(db_path), "2099-01-01 00:00:00")
+        self.assertEqual(
+            query_latest_timestamp(db_path, before="2099-01-01"),
+            "2024-02-01 00:00:00",
+        )
+
+        backfill_rollups(db_path)
+
+        self._assert_stats_match_count(db_path)
+
+    def test_existing_database_without_stats_is_counted_once(self):
+        db_path = self._database("weather.db")
+        with ObservationWriter(db_path) as writer:
+            for observation in _observations():
+                writer.insert(observation)
+        with closing(sqlite3.connect(db_path)) as conn:
+            conn.execute("DROP TABLE observations_stats")
+            conn.commit()
+        self._assert_stats_match_count(db_path)
+
+        create_database_if_not_exists(db_path)
+
+        with closing(sqlite3.connect(db_path)) as conn:
+            stats = conn.execute("SELECT * FROM observations_stats").fetchall()
+        self.assertEqual(
+            stats,
+            [(0, 72, "2024-01-30 00:00:00", "2024-02-02 23:00:00", 2)],
+        )
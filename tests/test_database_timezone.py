@@ -1,13 +1,16 @@
 import sqlite3
 import tempfile
+from bisect import bisect_right
 from contextlib import closing
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from unittest import TestCase
 from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
 from ambientweather2sqlite.database import (
+    _local_bucket_boundaries,
+    _utc_offset_segments,
     _validate_timezone,
     create_database_if_not_exists,
     insert_observation,
@@ -314,6 +317,121 @@ class TestDatabaseTimezone(TestCase):
         self.assertEqual(repeated_hour["count"], 2)
         self.assertEqual(repeated_hour["avg_outTemp"], 51.0)
 
+    def test_raw_hourly_query_handles_dst_transitions_in_sql(self):
+        """Test the raw ZoneInfo path buckets rows on both sides of DST changes."""
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute("DROP TABLE observations_hourly")
+            conn.commit()
+        for ts, temp in [
+            ("2025-11-02 04:30:00", 48.0),  # 00:30 EDT
+            ("2025-11-02 05:30:00", 50.0),  # 01:30 EDT
+            ("2025-11-02 06:30:00", 52.0),  # 01:30 EST
+            ("2025-11-02 07:30:00", 54.0),  # 02:30 EST
+            ("2025-11-03 04:30:00", 56.0),  # 23:30 EST on 11-02
+        ]:
+            insert_observation(self.db_path, {"ts": ts, "outTemp": temp})
+
+        result = query_hourly_aggregated_data(
+            db_path=self.db_path,
+            aggregation_fields=["avg_outTemp"],
+            start_date="2025-11-02",
+            end_date="2025-11-02",
+            tz="America/New_York",
+        )
+
+        hours = {
+            index: (row["count"], row["avg_outTemp"])
+            for index, row in enumerate(result["2025-11-02"])
+            if row is not None
+        }
+        self.assertEqual(
+            hours,
+            {0: (1, 48.0), 1: (2, 51.0), 2: (1, 54.0), 23: (1, 56.0)},
+        )
+
+    def test_utc_offset_segments_split_on_dst_transitions(self):
+        """Test offset segments start exactly at each UTC transition instant."""
+        timezone = ZoneInfo("America/New_York")
+        start = datetime(2025, 3, 1, 5, tzinfo=ZoneInfo("UTC"))
+        end = datetime(2025, 12, 1, 5, tzinfo=ZoneInfo("UTC"))
+
+        segments = _utc_offset_segments(timezone, start, end)
+
+        self.assertEqual(
+            [(str(moment), offset) for moment, offset in segments],
+            [
+                ("2025-03-01 05:00:00+00:00", timedelta(hours=-5)),
+                ("2025-03-09 07:00:00+00:00", timedelta(hours=-4)),
+                ("2025-11-02 06:00:00+00:00", timedelta(hours=-5)),
+            ],
+        )
+
+    def test_local_bucket_boundaries_cover_dst_day_by_hour(self):
+        """Test hourly boundaries merge the fall-back hour and bisect stored ts."""
+        _local_bucket_boundaries.cache_clear()
+        boundaries, bucket_keys = _local_bucket_boundaries(
+            ZoneInfo("America/New_York"),
+            date(2025, 11, 2),
+            date(2025, 11, 2),
+            by_hour=True,
+        )
+
+        # The repeated 01:00 hour is one bucket spanning two UTC hours
+        self.assertEqual(len(boundaries), 24)
+        self.assertEqual(
+            boundaries[:3],
+            (
+                "2025-11-02 04:00:00",
+                "2025-11-02 05:00:00",
+                "2025-11-02 07:00:00",
+            ),
+        )
+        for ts, expected in [
+            ("2025-11-02 05:59:59.999999", ("2025-11-02", 1)),
+            ("2025-11-02 06:30:00", ("2025-11-02", 1)),
+            ("2025-11-02 07:00:00", ("2025-11-02", 2)),
+            ("2025-11-03 04:59:59", ("2025-11-02", 23)),
+        ]:
+            with self.subTest(ts=ts):
+                index = bisect_right(boundaries, ts) - 1
+                self.assertEqual(bucket_keys[index], expected)
+
+        _local_bucket_boundaries(
+            ZoneInfo("America/New_York"),
+            date(2025, 11, 2),
+            date(2025, 11, 2),
+            by_hour=True,
+        )
+        self.assertEqual(_local_bucket_boundaries.cache_info().hits, 1)
+
+    def test_local_bucket_boundaries_by_day_and_misaligned_offsets(self):
+        """Test daily boundaries for fixed offsets and None for half-hour ones."""
+        boundaries, bucket_keys = _local_bucket_boundaries(
+            "-8.0 hours",
+            date(2025, 1, 1),
+            date(2025, 1, 3),
+            by_hour=False,
+        )
+        self.assertEqual(
+            boundaries,
+            ("2025-01-01 08:00:00", "2025-01-02 08:00:00", "2025-01-03 08:00:00"),
+        )
+        self.assertEqual(
+            bucket_keys,
+            (("2025-01-01", 0), ("2025-01-02", 0), ("2025-01-03", 0)),
+        )
+
+        for timezone in ["5.5 hours", ZoneInfo("Asia/Kathmandu")]:
+            with self.subTest(timezone=timezone):
+                self.assertIsNone(
+                    _local_bucket_boundaries(
+                        timezone,
+                        date(2025, 1, 1),
+                        date(2025, 1, 3),
+                        by_hour=False,
+                    ),
+                )
+
     def test_timezone_affects_aggregation_results(self):
         """Test that different timezones can produce different results"""
         # Insert data at timezone boundary
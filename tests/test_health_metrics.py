@@ -87,6 +87,18 @@ class TestQueryLatestTimestamp(TestCase):
         result = query_latest_timestamp(self.db_path)
         self.assertIn("2026-01-01 11:00:00", result)
 
+    def test_returns_latest_ts_before_bound(self):
+        for ts in ["2026-01-01 10:00:00", "2026-01-01 11:00:00"]:
+            insert_observation(self.db_path, {"ts": ts, "outTemp": 70.0})
+
+        self.assertEqual(
+            query_latest_timestamp(self.db_path, before="2026-01-01 11:00:00"),
+            "2026-01-01 10:00:00",
+        )
+        self.assertIsNone(
+            query_latest_timestamp(self.db_path, before="2026-01-01 10:00:00"),
+        )
+
 
 class TestDeduplication(TestCase):
     def setUp(self):
@@ -0,0 +1,190 @@
+import json
+import sqlite3
+import tempfile
+from contextlib import closing
+from pathlib import Path
+from unittest import TestCase
+
+from ambientweather2sqlite.database import (
+    create_database_if_not_exists,
+    insert_observation,
+)
+from ambientweather2sqlite.exceptions import (
+    ImportColumnCollisionError,
+    InvalidImportTimestampError,
+    UnsupportedImportFormatError,
+)
+from ambientweather2sqlite.importer import (
+    _parse_timestamp,
+    detect_import_format,
+    import_observations,
+)
+
+
+class TestParseTimestamp(TestCase):
+    def test_parses_supported_timestamp_formats(self):
+        test_cases = [
+            ("2026-01-01T07:00:00-05:00", "2026-01-01 12:00:00"),
+            ("2026-01-01T12:00:00.000Z", "2026-01-01 12:00:00"),
+            ("2026-01-01 12:00:00.123456", "2026-01-01 12:00:00.123456"),
+            ("2026-01-01T12:00:00", "2026-01-01 12:00:00"),
+            ("20260101T120000", "2026-01-01 12:00:00"),
+            ("2026-01-01T12:00", "2026-01-01 12:00:00"),
+            (1767268800000, "2026-01-01 12:00:00"),
+            (1767268800, "2026-01-01 12:00:00"),
+            ("1767268800000", "2026-01-01 12:00:00"),
+            ("", None),
+            ("yesterday", None),
+            (None, None),
+            (True, None),
+        ]
+
+        for value, expected in test_cases:
+            with self.subTest(value=value):
+                self.assertEqual(_parse_timestamp(value), expected)
+
+
+class TestImportObservations(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.db_path = str(self.root / "weather.db")
+        create_database_if_not_exists(self.db_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _rows(self) -> list[tuple]:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT ts, outTemp FROM observations ORDER BY ts")
+            return cursor.fetchall()
+
+    def _row_count(self) -> int:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            return conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+
+    def _has_unique_ts_index(self) -> bool:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA index_list(observations)")
+            return any(row[2] for row in cursor.fetchall())
+
+    def test_imports_cloud_csv_export(self):
+        source = self.root / "export.csv"
+        source.write_text(
+            "Date,Simple Date,outTemp,outHumi\n"
+            "2026-01-01T07:00:00-05:00,1/1/2026 7:00 AM,70.5,40\n"
+            "2026-01-01T07:05:00-05:00,1/1/2026 7:05 AM,71.0,\n"
+            ",,72.0,42\n",
+            encoding="utf-8",
+        )
+
+        summary = import_observations(self.db_path, source)
+
+        self.assertEqual(summary.rows_read, 3)
+        self.assertEqual(summary.rows_imported, 2)
+        self.assertEqual(summary.rows_duplicate, 0)
+        self.assertEqual(summary.rows_invalid, 1)
+        self.assertEqual(
+            self._rows(),
+            [("2026-01-01 12:00:00", 70.5), ("2026-01-01 12:05:00", 71.0)],
+        )
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            cursor = conn.cursor()
+            cursor.execute("PRAGMA table_info(observations)")
+            column_names = {row[1] for row in cursor.fetchall()}
+        self.assertNotIn("Simple_Date", column_names)
+        self.assertTrue(self._has_unique_ts_index())
+
+    def test_imports_jsonl_and_skips_existing_timestamps(self):
+        insert_observation(
+            self.db_path,
+            {"ts": "2026-01-01 12:00:00", "outTemp": 60.0},
+        )
+        source = self.root / "dump.jsonl"
+        source.write_text(
+            "\n".join(
+                json.dumps(record)
+                for record in [
+                    {"dateutc": 1767268800000, "outTemp": 70.0},
+                    {"dateutc": 1767268860000, "outTemp": 71.0},
+                    {"dateutc": 1767268920000, "outTemp": 72.0},
+                ]
+            ),
+            encoding="utf-8",
+        )
+
+        summary = import_observations(self.db_path, source)
+
+        self.assertEqual(summary.rows_imported, 2)
+        self.assertEqual(summary.rows_duplicate, 1)
+        self.assertEqual(
+            self._rows(),
+            [
+                ("2026-01-01 12:00:00", 60.0),
+                ("2026-01-01 12:01:00", 71.0),
+                ("2026-01-01 12:02:00", 72.0),
+            ],
+        )
+
+    def test_imports_another_database_and_merges_duplicate_source_rows(self):
+        source_db = self.root / "other.db"
+        with closing(sqlite3.connect(source_db)) as conn:
+            conn.execute("CREATE TABLE observations (ts TIMESTAMP, outTemp REAL)")
+            conn.executemany(
+                "INSERT INTO observations (ts, outTemp) VALUES (?, ?)",
+                [
+                    ("2026-01-01 12:00:00.000001", 70.0),
+                    ("2026-01-01 12:01:00.000001", 71.0),
+                    ("2026-01-01 12:01:00.000001", 71.5),
+                ],
+            )
+            conn.commit()
+
+        summary = import_observations(self.db_path, source_db)
+
+        self.assertEqual(summary.rows_read, 3)
+        self.assertEqual(summary.rows_imported, 2)
+        self.assertEqual(summary.rows_duplicate, 1)
+        self.assertEqual(
+            self._rows(),
+            [
+                ("2026-01-01 12:00:00.000001", 70.0),
+                ("2026-01-01 12:01:00.000001", 71.5),
+            ],
+        )
+        self.assertTrue(self._has_unique_ts_index())
+
+    def test_rejects_unparseable_timestamps_before_importing(self):
+        source = self.root / "export.csv"
+        source.write_text(
+            "Date,outTemp\n2026-01-01T12:00:00Z,70.5\n1/1/2026 12:05 PM,71.0\n",
+            encoding="utf-8",
+        )
+
+        with self.assertRaisesRegex(
+            InvalidImportTimestampError,
+            "'1/1/2026 12:05 PM' in source row 2",
+        ):
+            import_observations(self.db_path, source)
+        self.assertEqual(self._row_count(), 0)
+
+    def test_rejects_fields_that_share_a_column(self):
+        for header in ("Temp F,Temp-F", "outTemp,OUTTEMP"):
+            with self.subTest(header=header):
+                source = self.root / "export.csv"
+                source.write_text(
+                    f"Date,{header}\n2026-01-01T12:00:00Z,70.5,21.4\n",
+                    encoding="utf-8",
+                )
+
+                with self.assertRaises(ImportColumnCollisionError):
+                    import_observations(self.db_path, source)
+        self.assertEqual(self._row_count(), 0)
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(UnsupportedImportFormatError):
+            detect_import_format(Path("observations.xlsx"))
+        with self.assertRaises(UnsupportedImportFormatError):
+            import_observations(self.db_path, self.root / "dump.txt", "xml")
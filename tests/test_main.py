@@ -25,6 +25,12 @@ class TestParseArgs(TestCase):
 
         self.assertEqual(args.command, "serve")
         self.assertIsNone(args.log_format)
+        self.assertIsNone(args.runtime)
+
+    def test_parse_serve_runtime(self):
+        args = parse_args(["serve", "--runtime", "asyncio"])
+
+        self.assertEqual(args.runtime, "asyncio")
 
     def test_bare_flags_default_to_serve(self):
         args = parse_args(["--port", "8080", "--config", "1234"])
@@ -55,6 +61,37 @@ class TestParseArgs(TestCase):
         self.assertEqual(args.command, "status")
         self.assertEqual(args.config_path, Path("myconfig.toml"))
 
+    def test_parse_import_subcommand(self):
+        args = parse_args(["import", "export.csv", "--format", "csv"])
+
+        self.assertEqual(args.command, "import")
+        self.assertEqual(args.source, Path("export.csv"))
+        self.assertEqual(args.source_format, "csv")
+
+    def test_parse_backfill_rollups_subcommand(self):
+        args = parse_args(["backfill-rollups", "--config", "myconfig.toml"])
+
+        self.assertEqual(args.command, "backfill-rollups")
+        self.assertEqual(args.config_path, Path("myconfig.toml"))
+
+    def test_parse_migrate_timestamps_subcommand(self):
+        args = parse_args(["migrate-timestamps", "--config", "myconfig.toml"])
+
+        self.assertEqual(args.command, "migrate-timestamps")
+        self.assertEqual(args.config_path, Path("myconfig.toml"))
+
+    def test_parse_partition_observations_subcommand(self):
+        args = parse_args(["partition-observations", "--config", "myconfig.toml"])
+
+        self.assertEqual(args.command, "partition-observations")
+        self.assertEqual(args.config_path, Path("myconfig.toml"))
+
+    def test_parse_compact_subcommand(self):
+        args = parse_args(["compact", "--config", "myconfig.toml"])
+
+        self.assertEqual(args.command, "compact")
+        self.assertEqual(args.config_path, Path("myconfig.toml"))
+
     def test_parse_install_launchd_subcommand(self):
         args = parse_args(["install-launchd"])
 
@@ -113,12 +150,21 @@ class TestMainServe(TestCase):
 
         mock_create_config_file.assert_called_once_with(config_override)
         mock_load_config.assert_called_once_with(resolved_config_path)
-        mock_create_database.assert_called_once_with("weather.db")
+        mock_create_database.assert_called_once_with(
+            "weather.db",
+            epoch_ts=False,
+            monthly_partitions=False,
+            change_only_columns=(),
+        )
         mock_start_daemon.assert_called_once_with(
             live_data_url="http://127.0.0.1/livedata.htm",
             database_path="weather.db",
             port=8080,
             log_format="json",
+            flush_every=1,
+            flush_interval_seconds=None,
+            max_concurrent_requests=8,
+            retention=None,
         )
 
     @patch("ambientweather2sqlite.__main__.start_daemon")
@@ -151,6 +197,44 @@ class TestMainServe(TestCase):
             database_path="weather.db",
             port=8080,
             log_format="text",
+            flush_every=1,
+            flush_interval_seconds=None,
+            max_concurrent_requests=8,
+            retention=None,
+        )
+
+    @patch("ambientweather2sqlite.async_runtime.start_async_daemon")
+    @patch("ambientweather2sqlite.__main__.start_daemon")
+    @patch("ambientweather2sqlite.__main__.create_database_if_not_exists")
+    @patch("ambientweather2sqlite.__main__.load_config")
+    @patch("ambientweather2sqlite.__main__.create_config_file")
+    def test_main_serve_uses_asyncio_runtime_from_config(
+        self,
+        mock_create_config_file: Mock,
+        mock_load_config: Mock,
+        mock_create_database: Mock,
+        mock_start_daemon: Mock,
+        mock_start_async_daemon: Mock,
+    ):
+        mock_create_config_file.return_value = Path("resolved-config.toml")
+        mock_load_config.return_value = AppConfig(
+            live_data_url="http://127.0.0.1/livedata.htm",
+            database_path="weather.db",
+            runtime="asyncio",
+        )
+
+        main(["serve", "--config", "1234"])
+
+        mock_start_daemon.assert_not_called()
+        mock_start_async_daemon.assert_called_once_with(
+            live_data_url="http://127.0.0.1/livedata.htm",
+            database_path="weather.db",
+            port=None,
+            log_format="text",
+            flush_every=1,
+            flush_interval_seconds=None,
+            max_concurrent_requests=8,
+            retention=None,
         )
 
 
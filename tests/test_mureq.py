@@ -0,0 +1,82 @@
+import threading
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ClassVar
+from unittest import TestCase
+
+from ambientweather2sqlite import mureq
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections: ClassVar[list[tuple[str, int]]] = []
+
+    def setup(self) -> None:
+        super().setup()
+        self.connections.append(self.client_address)
+
+    def do_GET(self) -> None:
+        body = b"<html>ok</html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/close":
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class TestConnectionPool(TestCase):
+    def setUp(self):
+        _KeepAliveHandler.connections = []
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        self.httpd.daemon_threads = True
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.httpd.server_close)
+        self.addCleanup(self.httpd.shutdown)
+        self.port = self.httpd.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.pool = mureq.ConnectionPool()
+        self.addCleanup(self.pool.close)
+
+    def test_requests_reuse_one_connection(self):
+        bodies = [mureq.get(f"{self.url}/live", pool=self.pool) for _ in range(3)]
+
+        self.assertEqual(bodies, ["<html>ok</html>"] * 3)
+        self.assertEqual(len(_KeepAliveHandler.connections), 1)
+
+    def test_requests_without_pool_open_a_connection_each(self):
+        for _ in range(2):
+            mureq.get(f"{self.url}/live")
+
+        self.assertEqual(len(_KeepAliveHandler.connections), 2)
+
+    def test_connection_close_response_is_not_pooled(self):
+        mureq.get(f"{self.url}/close", pool=self.pool)
+        mureq.get(f"{self.url}/live", pool=self.pool)
+
+        self.assertEqual(len(_KeepAliveHandler.connections), 2)
+
+    def test_connection_closed_by_server_is_replaced(self):
+        mureq.get(f"{self.url}/live", pool=self.pool)
+        conn, reused = self.pool.checkout(
+            HTTPConnection("127.0.0.1", self.port, timeout=1),
+        )
+        self.assertTrue(reused)
+        conn.sock.close()
+        self.pool.checkin(conn)
+        body = mureq.get(f"{self.url}/live", pool=self.pool)
+
+        self.assertEqual(body, "<html>ok</html>")
+        self.assertEqual(len(_KeepAliveHandler.connections), 2)
+
+    def test_idle_connections_expire(self):
+        self.pool.idle_timeout = 0
+        mureq.get(f"{self.url}/live", pool=self.pool)
+        mureq.get(f"{self.url}/live", pool=self.pool)
+
+        self.assertEqual(len(_KeepAliveHandler.connections), 2)
@@ -0,0 +1,64 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from ambientweather2sqlite.response_cache import ResponseCache
+
+_PAST_WINDOW = ("2026-01-01 05:00:00", "2026-01-08 05:00:00")
+_CURRENT_WINDOW = ("2026-01-08 05:00:00", "2026-01-09 05:00:00")
+
+
+class TestResponseCache(TestCase):
+    def test_get_returns_body_for_matching_window(self):
+        cache = ResponseCache()
+        cache.put(("/daily",), _PAST_WINDOW, b"{}", cache.generation)
+
+        self.assertEqual(cache.get(("/daily",), _PAST_WINDOW), b"{}")
+        self.assertIsNone(cache.get(("/daily",), _CURRENT_WINDOW))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_drops_only_overlapping_windows(self):
+        cache = ResponseCache()
+        cache.put(("past",), _PAST_WINDOW, b"past", cache.generation)
+        cache.put(("current",), _CURRENT_WINDOW, b"current", cache.generation)
+
+        removed = cache.invalidate("2026-01-08 12:00:00", "2026-01-08 12:00:00")
+
+        self.assertEqual(removed, 1)
+        self.assertEqual(cache.get(("past",), _PAST_WINDOW), b"past")
+        self.assertIsNone(cache.get(("current",), _CURRENT_WINDOW))
+
+    def test_window_end_is_exclusive(self):
+        cache = ResponseCache()
+        cache.put(("past",), _PAST_WINDOW, b"past", cache.generation)
+
+        self.assertEqual(cache.invalidate(_PAST_WINDOW[1], _PAST_WINDOW[1]), 0)
+        self.assertEqual(cache.invalidate("2026-01-01 00:00:00", _PAST_WINDOW[0]), 1)
+
+    def test_put_is_ignored_after_a_concurrent_invalidation(self):
+        cache = ResponseCache()
+        generation = cache.generation
+        cache.invalidate("2026-01-08 12:00:00", "2026-01-08 12:00:00")
+
+        cache.put(("current",), _CURRENT_WINDOW, b"stale", generation)
+
+        self.assertIsNone(cache.get(("current",), _CURRENT_WINDOW))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put(("a",), _PAST_WINDOW, b"a", cache.generation)
+        cache.put(("b",), _PAST_WINDOW, b"b", cache.generation)
+        cache.get(("a",), _PAST_WINDOW)
+        cache.put(("c",), _PAST_WINDOW, b"c", cache.generation)
+
+        self.assertEqual(cache.get(("a",), _PAST_WINDOW), b"a")
+        self.assertIsNone(cache.get(("b",), _PAST_WINDOW))
+        self.assertEqual(cache.get(("c",), _PAST_WINDOW), b"c")
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResponseCache(ttl_seconds=60)
+        with patch("ambientweather2sqlite.response_cache.monotonic", return_value=0):
+            cache.put(("a",), _PAST_WINDOW, b"a", cache.generation)
+        with patch("ambientweather2sqlite.response_cache.monotonic", return_value=59):
+            self.assertEqual(cache.get(("a",), _PAST_WINDOW), b"a")
+        with patch("ambientweather2sqlite.response_cache.monotonic", return_value=60):
+            self.assertIsNone(cache.get(("a",), _PAST_WINDOW))
@@ -0,0 +1,248 @@
+import logging
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest import TestCase
+
+from ambientweather2sqlite.database import (
+    ObservationWriter,
+    backfill_rollups,
+    compact_observations,
+    create_database_if_not_exists,
+    query_db_metrics,
+    query_hourly_aggregated_data,
+)
+from ambientweather2sqlite.exceptions import CompactedRangeError, RollupsRequiredError
+from ambientweather2sqlite.models import RetentionPolicy
+from ambientweather2sqlite.retention import CompactionJob
+
+_NOW = datetime(2024, 3, 10, 12, 30, tzinfo=UTC)
+_POLICY = RetentionPolicy(raw_days=7, downsample_minutes=5)
+# Raw rows before this hour are compacted under _POLICY at _NOW
+_HORIZON = "2024-03-03 12:00:00"
+
+
+def _observations() -> list[dict]:
+    """One reading a minute from 2024-02-28 until 2024-03-05."""
+    start = datetime(2024, 2, 28, tzinfo=UTC)
+    observations = []
+    for step in range(6 * 24 * 60):
+        observation = {
+            "ts": (start + timedelta(minutes=step)).strftime("%Y-%m-%d %H:%M:%S"),
+            "outTemp": float(step % 10),
+        }
+        if step % 2:
+            observation["rain"] = 0.5
+        observations.append(observation)
+    return observations
+
+
+class TestCompactObservations(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.observations = _observations()
+        self.db_path = self._create_database("text.db")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _create_database(self, name: str, **layout: bool) -> str:
+        db_path = str(Path(self.temp_dir.name) / name)
+        create_database_if_not_exists(db_path, **layout)
+        with ObservationWriter(db_path, flush_every=500) as writer:
+            for observation in self.observations:
+                writer.insert(observation)
+        return db_path
+
+    def _fetch(self, db_path: str, statement: str) -> list[tuple]:
+        with closing(sqlite3.connect(db_path)) as conn:
+            return conn.execute(statement).fetchall()
+
+    def test_old_raw_rows_are_replaced_by_averaged_buckets(self):
+        summary = compact_observations(self.db_path, _POLICY, now=_NOW)
+
+        compacted = sum(o["ts"] < _HORIZON for o in self.observations)
+        self.assertEqual(summary.rows_compacted, compacted)
+        self.assertEqual(summary.buckets_written, compacted // 5)
+        self.assertEqual(summary.buckets_expired, 0)
+        self.assertEqual(
+            self._fetch(self.db_path, "SELECT MIN(ts), COUNT(*) FROM observations"),
+            [(_HORIZON, len(self.observations) - compacted)],
+        )
+        self.assertEqual(
+            self._fetch(
+                self.db_path,
+                "SELECT ts, sample_count, outTemp, rain FROM observations_downsampled "
+                "ORDER BY ts LIMIT 2",
+            ),
+            [
+                ("2024-02-28 00:00:00", 5, 2.0, 0.5),
+                ("2024-02-28 00:05:00", 5, 7.0, 0.5),
+            ],
+        )
+
+    def test_rollups_of_compacted_hours_are_kept(self):
+        statement = "SELECT * FROM observations_hourly ORDER BY hour, name"
+        rollups = self._fetch(self.db_path, statement)
+
+        compact_observations(self.db_path, _POLICY, now=_NOW)
+        backfill_rollups(self.db_path)
+        with ObservationWriter(self.db_path) as writer:
+            writer.insert({"ts": "2024-02-28 00:00:30", "outTemp": 100.0})
+
+        self.assertEqual(self._fetch(self.db_path, statement), rollups)
+
+    def test_raw_queries_refuse_compacted_hours(self):
+        compact_observations(self.db_path, _POLICY, now=_NOW)
+
+        def hourly_count(start_date: str, tz: str) -> int:
+            result = query_hourly_aggregated_data(
+                self.db_path,
+                ["avg_outTemp"],
+                start_date=start_date,
+                end_date="2024-03-05",
+                tz=tz,
+            )
+            return sum(
+                row["count"] for hours in result.values() for row in hours if row
+            )
+
+        # Rollups still answer whole-hour offsets across the compacted range
+        self.assertEqual(hourly_count("2024-02-27", "+05:00"), len(self.observations))
+        # Local 2024-03-04 starts at 2024-03-03 18:30 UTC, after the horizon
+        self.assertEqual(
+            hourly_count("2024-03-04", "+05:30"),
+            sum(o["ts"] >= "2024-03-03 18:30:00" for o in self.observations),
+        )
+        with self.assertRaises(CompactedRangeError):
+            hourly_count("2024-02-27", "+05:30")
+
+    def test_late_rows_merge_into_existing_buckets(self):
+        compact_observations(self.db_path, _POLICY, now=_NOW)
+        with ObservationWriter(self.db_path) as writer:
+            writer.insert({"ts": "2024-02-28 00:00:30", "outTemp": 8.0})
+
+        summary = compact_observations(self.db_path, _POLICY, now=_NOW)
+
+        self.assertEqual(summary.rows_compacted, 1)
+        self.assertEqual(
+            self._fetch(
+                self.db_path,
+                "SELECT ts, sample_count, outTemp, rain FROM observations_downsampled "
+                "ORDER BY ts LIMIT 1",
+            ),
+            [("2024-02-28 00:00:00", 6, 3.0, 0.5)],
+        )
+
+    def test_each_transaction_compacts_a_bounded_chunk(self):
+        checks = []
+
+        def stop_after_one_chunk() -> bool:
+            checks.append(None)
+            return len(checks) > 1
+
+        summary = compact_observations(
+            self.db_path,
+            _POLICY,
+            now=_NOW,
+            should_stop=stop_after_one_chunk,
+        )
+
+        self.assertEqual(summary.rows_compacted, 6 * 60)
+        self.assertEqual(
+            self._fetch(self.db_path, "SELECT MIN(ts) FROM observations"),
+            [("2024-02-28 06:00:00",)],
+        )
+
+    def test_downsampled_buckets_expire(self):
+        policy = RetentionPolicy(raw_days=7, downsample_minutes=5, downsampled_days=8)
+
+        summary = compact_observations(self.db_path, policy, now=_NOW)
+
+        self.assertEqual(summary.buckets_expired, (3 * 24 + 12) * 12 + 6)
+        self.assertEqual(
+            self._fetch(self.db_path, "SELECT MIN(ts) FROM observations_downsampled"),
+            [("2024-03-02 12:30:00",)],
+        )
+
+    def test_epoch_and_partitioned_layouts_compact_alike(self):
+        compact_observations(self.db_path, _POLICY, now=_NOW)
+        statement = (
+            "SELECT ts, sample_count, outTemp, rain FROM observations_downsampled "
+            "ORDER BY ts"
+        )
+        expected = self._fetch(self.db_path, statement)
+
+        for layout in ("epoch_ts", "monthly_partitions"):
+            with self.subTest(layout=layout):
+                db_path = self._create_database(f"{layout}.db", **{layout: True})
+
+                compact_observations(db_path, _POLICY, now=_NOW)
+
+                self.assertEqual(self._fetch(db_path, statement), expected)
+                self.assertEqual(
+                    query_db_metrics(db_path)["row_count"],
+                    query_db_metrics(self.db_path)["row_count"],
+                )
+
+        partitions = self._fetch(
+            str(Path(self.temp_dir.name) / "monthly_partitions.db"),
+            "SELECT month FROM observations_partitions",
+        )
+        self.assertEqual(partitions, [("2024-03",)])
+
+    def test_database_without_rollups_is_not_compacted(self):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute("DROP TABLE observations_hourly")
+            conn.commit()
+
+        with self.assertRaises(RollupsRequiredError):
+            compact_observations(self.db_path, _POLICY, now=_NOW)
+
+
+class TestCompactionJob(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.temp_dir.name) / "weather.db")
+        create_database_if_not_exists(self.db_path)
+        self.logger = logging.getLogger(__name__)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_run_once_compacts_old_rows(self):
+        old_ts = (datetime.now(UTC) - timedelta(days=10)).strftime("%Y-%m-%d %H:%M:%S")
+        with ObservationWriter(self.db_path) as writer:
+            writer.insert({"ts": old_ts, "outTemp": 60.0})
+            writer.insert({"outTemp": 61.0})
+        job = CompactionJob(self.db_path, _POLICY, self.logger)
+
+        with self.assertLogs(self.logger, logging.INFO):
+            summary = job.run_once()
+
+        self.assertIsNotNone(summary)
+        self.assertEqual(summary.rows_compacted, 1)
+        self.assertEqual(query_db_metrics(self.db_path)["row_count"], 1)
+
+    def test_failed_pass_is_logged(self):
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute("DROP TABLE observations_hourly")
+            conn.commit()
+        job = CompactionJob(self.db_path, _POLICY, self.logger)
+
+        with self.assertLogs(self.logger, logging.ERROR):
+            self.assertIsNone(job.run_once())
+
+    def test_stop_ends_the_background_thread(self):
+        job = CompactionJob(self.db_path, _POLICY, self.logger, interval_seconds=60)
+
+        running = set(threading.enumerate())
+        job.start()
+        started = set(threading.enumerate()) - running
+        job.stop()
+
+        self.assertEqual(len(started), 1)
+        self.assertFalse(any(thread.is_alive() for thread in started))
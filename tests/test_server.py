@@ -1,20 +1,44 @@
+import gzip
 import json
 import socket
 import tempfile
+import threading
 import time
-from datetime import datetime
-from http.client import HTTPResponse
+from datetime import UTC, datetime, timedelta
+from http.client import HTTPConnection, HTTPResponse
 from pathlib import Path
 from typing import Any, cast
 from unittest import TestCase
+from unittest.mock import patch
 from urllib.error import HTTPError
 from urllib.request import urlopen
 
+from ambientweather2sqlite import server as server_module
 from ambientweather2sqlite.database import (
     create_database_if_not_exists,
     insert_observation,
 )
-from ambientweather2sqlite.server import Server, _tz_from_query, create_request_handler
+from ambientweather2sqlite.models import (
+    EncodedBody,
+    ResponseFormat,
+    ResponseValidators,
+)
+from ambientweather2sqlite.response_cache import ResponseCache
+from ambientweather2sqlite.server import (
+    Server,
+    _tz_from_query,
+    conditional_database_response,
+    create_request_handler,
+    database_response,
+    encode_body,
+    is_not_modified,
+    keep_alive_headers,
+    negotiate_content_encoding,
+    response_validators,
+)
+from ambientweather2sqlite.snapshot import LiveSnapshotStore
+
+_DEFAULT_FORMAT = ResponseFormat()
 
 
 class TestServer(TestCase):
@@ -236,6 +260,560 @@ class TestServer(TestCase):
         typed_duplicate_handler_class.teardown_logger()
 
 
+class TestServerConcurrency(TestCase):
+    def setUp(self):
+        self.temp_db = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        self.db_path = self.temp_db.name
+        self.temp_db.close()
+        Path(self.db_path).unlink(missing_ok=True)
+        create_database_if_not_exists(self.db_path)
+
+        self.release_query = threading.Event()
+        self.query_started = threading.Event()
+
+        def slow_query(**_kwargs: object) -> list[object]:
+            self.query_started.set()
+            self.release_query.wait(timeout=5)
+            return []
+
+        query_patch = patch(
+            "ambientweather2sqlite.server.query_daily_aggregated_data",
+            side_effect=slow_query,
+        )
+        query_patch.start()
+        self.addCleanup(query_patch.stop)
+
+    def tearDown(self):
+        self.release_query.set()
+        Path(self.db_path).unlink(missing_ok=True)
+
+    def _start_server(self, max_concurrent_requests: int) -> int:
+        server = Server(
+            "http://127.0.0.1:9",
+            self.db_path,
+            0,
+            "127.0.0.1",
+            max_concurrent_requests=max_concurrent_requests,
+        )
+        server.start()
+        self.addCleanup(server.shutdown)
+        return server.httpd.server_address[1]
+
+    def _start_slow_request(self, port: int) -> threading.Thread:
+        def fetch() -> None:
+            with urlopen(
+                f"http://127.0.0.1:{port}/daily?tz=UTC&q=avg_outTemp",
+                timeout=5,
+            ) as response:
+                response.read()
+
+        thread = threading.Thread(target=fetch, daemon=True)
+        thread.start()
+        self.assertTrue(self.query_started.wait(timeout=2))
+        return thread
+
+    def test_health_responds_while_a_slow_query_runs(self):
+        port = self._start_server(max_concurrent_requests=4)
+        slow_request = self._start_slow_request(port)
+
+        with urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+            self.assertEqual(json.load(response)["status"], "ok")
+
+        self.release_query.set()
+        slow_request.join(timeout=2)
+        self.assertFalse(slow_request.is_alive())
+
+    def test_requests_beyond_the_limit_wait_for_a_free_slot(self):
+        port = self._start_server(max_concurrent_requests=1)
+        slow_request = self._start_slow_request(port)
+
+        with self.assertRaises(TimeoutError):
+            urlopen(f"http://127.0.0.1:{port}/health", timeout=0.3)
+
+        self.release_query.set()
+        slow_request.join(timeout=2)
+        with urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+            self.assertEqual(response.status, 200)
+
+
+class TestServerLiveSnapshot(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.snapshots = LiveSnapshotStore()
+        server = Server(
+            "http://127.0.0.1:9",
+            str(Path(self.temp_dir.name) / "weather.db"),
+            0,
+            "127.0.0.1",
+            snapshots=self.snapshots,
+        )
+        server.start()
+        self.addCleanup(server.shutdown)
+        self.port = server.httpd.server_address[1]
+
+        station_patch = patch(
+            "ambientweather2sqlite.server.mureq.get",
+            return_value="<html></html>",
+        )
+        self.station_get = station_patch.start()
+        self.addCleanup(station_patch.stop)
+
+    def _get_json(self, path: str) -> dict[str, Any]:
+        with urlopen(f"http://127.0.0.1:{self.port}{path}", timeout=1) as response:
+            return json.load(response)
+
+    def test_live_data_is_served_from_the_latest_snapshot(self):
+        self.snapshots.publish({"outTemp": 71.5}, {"outTemp": "Outdoor Temperature"})
+
+        payload = self._get_json("/")
+
+        self.station_get.assert_not_called()
+        self.assertEqual(payload["data"], {"outTemp": 71.5})
+        self.assertEqual(
+            payload["metadata"]["labels"],
+            {"outTemp": "Outdoor Temperature"},
+        )
+        self.assertGreaterEqual(payload["metadata"]["age_seconds"], 0)
+
+    def test_fresh_query_fetches_from_station_and_replaces_snapshot(self):
+        self.snapshots.publish({"outTemp": 71.5}, {})
+
+        with patch(
+            "ambientweather2sqlite.server.extract_live_data",
+            return_value=({"outTemp": 60.0}, {}),
+        ):
+            payload = self._get_json("/?fresh=1")
+
+        self.station_get.assert_called_once_with(
+            "http://127.0.0.1:9",
+            auto_retry=True,
+            pool=None,
+        )
+        self.assertEqual(payload["data"], {"outTemp": 60.0})
+        self.assertEqual(payload["metadata"]["age_seconds"], 0)
+        latest = self.snapshots.latest()
+        self.assertIsNotNone(latest)
+        self.assertEqual(cast("Any", latest).data, {"outTemp": 60.0})
+
+    def test_station_is_fetched_until_a_snapshot_is_published(self):
+        self._get_json("/")
+
+        self.station_get.assert_called_once()
+        self.assertIsNotNone(self.snapshots.latest())
+
+
+class TestDatabaseResponseCache(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db_path = str(Path(self.temp_dir.name) / "weather.db")
+        create_database_if_not_exists(self.db_path)
+        self.now = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
+        insert_observation(self.db_path, {"ts": self.now, "outTemp": 70.0})
+        self.cache = ResponseCache()
+
+    def _get(
+        self,
+        path: str,
+        response_format: ResponseFormat = _DEFAULT_FORMAT,
+    ) -> tuple[EncodedBody, int]:
+        return database_response(
+            self.db_path,
+            path,
+            lambda *_: None,
+            self.cache,
+            response_format,
+        )
+
+    def test_repeat_queries_are_served_from_the_cache(self):
+        path = "/daily?q=avg_outTemp&tz=UTC&days=7"
+        first_body, _ = self._get(path)
+
+        with patch(
+            "ambientweather2sqlite.server.query_daily_aggregated_data",
+        ) as mock_query:
+            body, status = self._get(path.replace("days=7&", "").replace("&days=7", ""))
+            self.assertEqual(self._get(path), (first_body, 200))
+
+        self.assertEqual((body, status), (first_body, 200))
+        mock_query.assert_not_called()
+
+    def test_flush_into_the_cached_window_invalidates(self):
+        path = f"/hourly?q=avg_outTemp&tz=UTC&start_date={self.now[:10]}"
+        self._get(path)
+        later = f"{self.now}.5"
+        insert_observation(self.db_path, {"ts": later, "outTemp": 90.0})
+        self.cache.invalidate(later, later)
+
+        body, _ = self._get(path)
+
+        hour = int(self.now[11:13])
+        payload = json.loads(body.content)["data"][self.now[:10]]
+        self.assertEqual(payload[hour]["count"], 2)
+
+    def test_each_response_format_is_cached_separately(self):
+        path = "/daily?q=avg_outTemp&tz=UTC"
+        gzip_format = ResponseFormat(pretty=True, content_encoding="gzip")
+        plain, _ = self._get(path)
+        pretty, _ = self._get(path, gzip_format)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self._get(path, gzip_format)[0], pretty)
+        self.assertEqual(json.loads(plain.content), json.loads(pretty.content))
+        self.assertIn(b"\n", pretty.content)
+        self.assertNotIn(b" ", plain.content)
+
+    def test_errors_are_not_cached(self):
+        self._get("/daily?q=avg_missing&tz=UTC")
+        self._get("/daily?q=avg_outTemp&tz=Not/AZone")
+
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestConditionalRequests(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db_path = str(Path(self.temp_dir.name) / "weather.db")
+        create_database_if_not_exists(self.db_path)
+        insert_observation(
+            self.db_path,
+            {"ts": "2020-01-01 12:00:00", "outTemp": 50.0},
+        )
+        self._insert_now(70.0)
+
+        server = Server("http://127.0.0.1:9", self.db_path, 0, "127.0.0.1")
+        server.start()
+        self.addCleanup(server.shutdown)
+        self.port = server.httpd.server_address[1]
+
+    def _insert_now(self, out_temp: float) -> None:
+        insert_observation(self.db_path, {"outTemp": out_temp})
+
+    def _request(
+        self,
+        path: str,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=1)
+        try:
+            conn.request("GET", path, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            conn.close()
+
+    def test_unchanged_data_returns_304_until_a_new_observation(self):
+        path = "/daily?q=avg_outTemp&tz=UTC&days=1"
+        status, headers, _ = self._request(path)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Cache-Control"], "no-cache")
+
+        status, revalidated, body = self._request(
+            path,
+            {"If-None-Match": headers["ETag"]},
+        )
+        self.assertEqual((status, body), (304, b""))
+        self.assertEqual(revalidated["ETag"], headers["ETag"])
+
+        time.sleep(0.01)
+        self._insert_now(71.0)
+        status, changed, _ = self._request(path, {"If-None-Match": headers["ETag"]})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(changed["ETag"], headers["ETag"])
+
+    def test_historical_range_is_cacheable_and_ignores_new_observations(self):
+        path = "/hourly?q=avg_outTemp&tz=UTC&start_date=2020-01-01&end_date=2020-01-02"
+        status, headers, _ = self._request(path)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Cache-Control"], "public, max-age=300")
+        self.assertEqual(headers["Last-Modified"], "Wed, 01 Jan 2020 12:00:00 GMT")
+
+        self._insert_now(72.0)
+        status, _, _ = self._request(
+            path,
+            {"If-Modified-Since": headers["Last-Modified"]},
+        )
+        self.assertEqual(status, 304)
+        self.assertEqual(self._request(path)[1]["ETag"], headers["ETag"])
+
+    def test_imports_into_a_historical_range_change_its_etag(self):
+        path = "/hourly?q=avg_outTemp&tz=UTC&start_date=2020-01-01&end_date=2020-01-02"
+        _, headers, _ = self._request(path)
+
+        insert_observation(
+            self.db_path,
+            {"ts": "2020-01-01 11:00:00", "outTemp": 40.0},
+        )
+        status, changed, _ = self._request(path, {"If-None-Match": headers["ETag"]})
+
+        self.assertEqual(status, 200)
+        self.assertNotEqual(changed["ETag"], headers["ETag"])
+
+    def test_unparseable_latest_timestamp_omits_last_modified(self):
+        path = "/hourly?q=avg_outTemp&tz=UTC&start_date=2020-01-01&end_date=2020-01-02"
+        with patch(
+            "ambientweather2sqlite.server.query_latest_timestamp",
+            return_value="not a timestamp",
+        ):
+            validators = response_validators(self.db_path, path, ResponseFormat())
+
+        self.assertIsNotNone(validators)
+        self.assertIsNone(cast("ResponseValidators", validators).last_modified)
+
+    def test_cache_hits_reuse_the_cached_validators(self):
+        path = "/hourly?q=avg_outTemp&tz=UTC&start_date=2020-01-01&end_date=2020-01-02"
+        cache = ResponseCache()
+        body, _, headers = conditional_database_response(
+            self.db_path,
+            path,
+            lambda *_: None,
+            cache,
+        )
+        etag = dict(headers)["ETag"]
+
+        with patch(
+            "ambientweather2sqlite.server.query_latest_timestamp",
+        ) as mock_latest:
+            cached = conditional_database_response(
+                self.db_path,
+                path,
+                lambda *_: None,
+                cache,
+            )
+            not_modified = conditional_database_response(
+                self.db_path,
+                path,
+                lambda *_: None,
+                cache,
+                if_none_match=etag,
+            )
+
+        mock_latest.assert_not_called()
+        self.assertEqual(cached, (body, 200, headers))
+        self.assertEqual(not_modified[:2], (EncodedBody(b""), 304))
+
+    def test_error_responses_have_no_validators(self):
+        status, headers, _ = self._request("/daily?q=avg_outTemp")
+        self.assertEqual(status, 400)
+        self.assertNotIn("ETag", headers)
+
+    def test_if_none_match_accepts_lists_weak_tags_and_wildcards(self):
+        validators = ResponseValidators(
+            etag='"abc"',
+            last_modified=None,
+            cache_control="no-cache",
+        )
+        self.assertTrue(is_not_modified(validators, '"xyz", W/"abc"', None))
+        self.assertTrue(is_not_modified(validators, "*", None))
+        self.assertFalse(is_not_modified(validators, '"xyz"', None))
+        self.assertFalse(
+            is_not_modified(validators, None, "Wed, 01 Jan 2020 12:00:00 GMT"),
+        )
+
+
+class TestResponseEncoding(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db_path = str(Path(self.temp_dir.name) / "weather.db")
+        create_database_if_not_exists(self.db_path)
+        self.today = datetime.now(UTC).date()
+        insert_observation(self.db_path, {"outTemp": 70.0})
+
+        server = Server("http://127.0.0.1:9", self.db_path, 0, "127.0.0.1")
+        server.start()
+        self.addCleanup(server.shutdown)
+        self.port = server.httpd.server_address[1]
+        start_date = self.today - timedelta(days=30)
+        self.path = f"/hourly?q=avg_outTemp&tz=UTC&start_date={start_date}"
+
+    def _request(
+        self,
+        path: str,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[dict[str, str], bytes]:
+        conn = HTTPConnection("127.0.0.1", self.port, timeout=1)
+        try:
+            conn.request("GET", path, headers=headers or {})
+            response = conn.getresponse()
+            return dict(response.getheaders()), response.read()
+        finally:
+            conn.close()
+
+    def test_responses_are_compact_unless_pretty_is_requested(self):
+        compact_headers, compact = self._request(self.path)
+        _, pretty = self._request(f"{self.path}&pretty=1")
+
+        self.assertEqual(json.loads(compact), json.loads(pretty))
+        self.assertNotIn(b"\n", compact)
+        self.assertIn(b'\n  "data": {', pretty)
+        self.assertEqual(compact_headers["Content-Length"], str(len(compact)))
+        self.assertNotIn("Content-Encoding", compact_headers)
+
+    def test_gzip_is_negotiated_from_accept_encoding(self):
+        _, identity = self._request(self.path)
+        headers, body = self._request(
+            self.path,
+            {"Accept-Encoding": "br;q=1.0, gzip;q=0.8, deflate;q=0.5"},
+        )
+
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+        self.assertEqual(headers["Content-Length"], str(len(body)))
+        self.assertEqual(gzip.decompress(body), identity)
+        self.assertLess(len(body), len(identity))
+
+    def test_small_bodies_are_not_compressed(self):
+        body = encode_body({"status": "ok"}, ResponseFormat(content_encoding="gzip"))
+        self.assertEqual(body, EncodedBody(b'{"status":"ok"}'))
+
+    def test_negotiate_content_encoding(self):
+        cases = [
+            (None, None),
+            ("identity", None),
+            ("gzip, deflate", "gzip"),
+            ("deflate, gzip;q=0.5", "deflate"),
+            ("gzip;q=0", None),
+            ("*", "gzip"),
+            ("*;q=0.1, gzip;q=0", "deflate"),
+        ]
+        for accept_encoding, expected in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(
+                    negotiate_content_encoding(accept_encoding),
+                    expected,
+                )
+
+
+class TestKeepAlive(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db_path = str(Path(self.temp_dir.name) / "weather.db")
+        create_database_if_not_exists(self.db_path)
+
+    def _start_server(self, max_concurrent_requests: int = 8) -> int:
+        server = Server(
+            "http://127.0.0.1:9",
+            self.db_path,
+            0,
+            "127.0.0.1",
+            max_concurrent_requests=max_concurrent_requests,
+        )
+        server.start()
+        self.addCleanup(server.shutdown)
+        return server.httpd.server_address[1]
+
+    def _get(self, conn: HTTPConnection, path: str) -> HTTPResponse:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response
+
+    def test_requests_share_one_connection(self):
+        conn = HTTPConnection("127.0.0.1", self._start_server(), timeout=1)
+        self.addCleanup(conn.close)
+
+        first = self._get(conn, "/health")
+        sock = conn.sock
+        second = self._get(conn, "/metrics")
+
+        self.assertEqual((first.status, second.status), (200, 200))
+        self.assertIsNotNone(sock)
+        self.assertIs(conn.sock, sock)
+        self.assertEqual(first.getheader("Keep-Alive"), "timeout=5, max=99")
+        self.assertEqual(second.getheader("Keep-Alive"), "timeout=5, max=98")
+        self.assertIsNone(second.getheader("Connection"))
+
+    def test_connection_closes_after_request_cap(self):
+        conn = HTTPConnection("127.0.0.1", self._start_server(), timeout=1)
+        self.addCleanup(conn.close)
+
+        with patch.object(server_module, "KEEP_ALIVE_MAX_REQUESTS", 2):
+            first = self._get(conn, "/health")
+            second = self._get(conn, "/health")
+
+        self.assertEqual(first.getheader("Keep-Alive"), "timeout=5, max=1")
+        self.assertEqual(second.getheader("Connection"), "close")
+        self.assertIsNone(conn.sock)
+
+    def test_idle_connection_is_closed_by_server(self):
+        with patch.object(server_module, "KEEP_ALIVE_TIMEOUT_SECONDS", 0.1):
+            port = self._start_server()
+        with socket.create_connection(("127.0.0.1", port), timeout=2) as sock:
+            sock.sendall(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            received = b""
+            while chunk := sock.recv(4096):
+                received += chunk
+
+        self.assertTrue(received.startswith(b"HTTP/1.1 200"))
+
+    def test_idle_connection_does_not_hold_a_request_slot(self):
+        port = self._start_server(max_concurrent_requests=1)
+        idle_conn = HTTPConnection("127.0.0.1", port, timeout=1)
+        self.addCleanup(idle_conn.close)
+        self.assertEqual(self._get(idle_conn, "/health").status, 200)
+
+        conn = HTTPConnection("127.0.0.1", port, timeout=1)
+        self.addCleanup(conn.close)
+
+        self.assertEqual(self._get(conn, "/health").status, 200)
+        self.assertEqual(self._get(idle_conn, "/health").status, 200)
+
+    def test_slow_client_receives_a_large_body_after_the_idle_timeout(self):
+        content = b"0" * (16 * 1024 * 1024)
+        with patch.object(server_module, "KEEP_ALIVE_TIMEOUT_SECONDS", 0.1):
+            port = self._start_server()
+
+        with (
+            patch(
+                "ambientweather2sqlite.server.conditional_database_response",
+                return_value=(EncodedBody(content), 200, []),
+            ),
+            socket.socket() as sock,
+        ):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.settimeout(2)
+            sock.connect(("127.0.0.1", port))
+            sock.sendall(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            # Stall past the idle timeout while the server is still sending
+            time.sleep(0.3)
+            with sock.makefile("rb") as response:
+                status_line = response.readline()
+                while response.readline() not in {b"\r\n", b""}:
+                    pass
+                body = response.read(len(content))
+
+        self.assertTrue(status_line.startswith(b"HTTP/1.1 200"))
+        self.assertEqual(body, content)
+
+    def test_keep_alive_headers(self):
+        cases = [
+            (1, True, False, [("Keep-Alive", "timeout=5, max=99")], False),
+            (
+                1,
+                True,
+                True,
+                [("Keep-Alive", "timeout=5, max=99"), ("Connection", "keep-alive")],
+                False,
+            ),
+            (1, False, False, [("Connection", "close")], True),
+            (100, True, False, [("Connection", "close")], True),
+        ]
+        for served, client_keep_alive, http_1_0, headers, close in cases:
+            with self.subTest(served=served, client_keep_alive=client_keep_alive):
+                self.assertEqual(
+                    keep_alive_headers(
+                        served,
+                        client_keep_alive=client_keep_alive,
+                        http_1_0=http_1_0,
+                    ),
+                    (headers, close),
+                )
+
+
 class TestTzFromQuery(TestCase):
     def test_returns_timezone_from_query(self):
         result = _tz_from_query({"tz": ["UTC"]})